@@ -1,22 +1,30 @@
 """
 App package initializer.
 Exposes core utilities, agent classes, and API routers.
+Agents and routers are resolved on first access, so `import app` stays cheap.
 """
 
 # Core Utilities
 from .core import get_logger
 
-# Agent Classes
-from .agents import (
-    RetrieverAgent,
-    EvaluatorAgent,
-    ExtractorAgent,
-    SummarizerAgent,
-)
+_LAZY_EXPORTS = {
+    # Agent Classes
+    "RetrieverAgent": "app.agents",
+    "EvaluatorAgent": "app.agents",
+    "ExtractorAgent": "app.agents",
+    "SummarizerAgent": "app.agents",
+    # API Routers
+    "query_router": "app.routes",
+    "upload_router": "app.routes",
+    "admin_router": "app.routes",
+}
 
-# API Routers
-from .routes.query import router as query_router
-from .routes.upload import router as upload_router
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
@@ -27,4 +35,5 @@ __all__ = [
     "SummarizerAgent",
     "query_router",
     "upload_router",
-]
\ No newline at end of file
+    "admin_router",
+]
@@ -1,12 +1,82 @@
-# app/agents/__init__.py
-from .evaluator import EvaluatorAgent
-from .extractor import ExtractorAgent
-from .retriever import RetrieverAgent
-from .summarizer import SummarizerAgent
+"""
+Agent classes and the process-wide agent instances.
+Agent modules import LangChain, OpenAI and Chroma, so they are only imported when an
+agent class is first accessed, and the shared instances used by the routes are only
+built when first requested (get_retriever(), ...). Importing the package is cheap.
+"""
+import importlib
+import threading
+
+_AGENT_MODULES = {
+    "EvaluatorAgent": ".evaluator",
+    "ExtractorAgent": ".extractor",
+    "RetrieverAgent": ".retriever",
+    "SummarizerAgent": ".summarizer",
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def __getattr__(name):
+    if name in _AGENT_MODULES:
+        return getattr(importlib.import_module(_AGENT_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _shared(class_name: str):
+    """Builds the shared instance of an agent class on first use."""
+    agent = _instances.get(class_name)
+    if agent is None:
+        with _instances_lock:
+            agent = _instances.get(class_name)
+            if agent is None:
+                agent = _instances[class_name] = __getattr__(class_name)()
+    return agent
+
+
+def set_shared(class_name: str, agent):
+    """
+    Replaces the shared instance of an agent class (benchmarks and tests inject agents here).
+    None drops it, so the next get_*() builds a fresh default instance.
+    """
+    with _instances_lock:
+        if agent is None:
+            _instances.pop(class_name, None)
+        else:
+            _instances[class_name] = agent
+
+
+def peek_shared(class_name: str):
+    """The shared instance of an agent class if it has been built, without building it."""
+    return _instances.get(class_name)
+
+
+def get_retriever():
+    return _shared("RetrieverAgent")
+
+
+def get_extractor():
+    return _shared("ExtractorAgent")
+
+
+def get_evaluator():
+    return _shared("EvaluatorAgent")
+
+
+def get_summarizer():
+    return _shared("SummarizerAgent")
+
 
 __all__ = [
     "EvaluatorAgent",
     "ExtractorAgent",
     "RetrieverAgent",
-    "SummarizerAgent"
+    "SummarizerAgent",
+    "get_retriever",
+    "get_extractor",
+    "get_evaluator",
+    "get_summarizer",
+    "set_shared",
+    "peek_shared",
 ]
@@ -1,10 +1,19 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
+import hashlib
 import json
 import re
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_classic.output_parsers import ResponseSchema, StructuredOutputParser
 from app import get_logger
+from app.agents.ranking import explain_choice, is_high_risk, rank_offers
+from app.core.risk import requires_reliability
+from app.agents.routing import SKIP, ModelRouter, QueryPlan, RouteDecision
+from app.core.deadline import Deadline, DeadlineExceeded, run_with_deadline
+from app.core.memo import EvaluationMemo, memo_key
+from app.core.usage_callbacks import UsageCallbackHandler
+from app.core.warmup import open_chat_connection
+from app.models.records import OfferRecord, as_dict
 
 logger = get_logger(__name__)
 
@@ -22,6 +31,8 @@ Read the user query to understand their main priorities:
 - "risk", "reliable", "quality": `risk_assessment`
 - "payment", "credit", "terms": `payment_terms`
 
+Intents detected for this query: {intents}
+
 ---
 
 ### 2. Rank Offers
@@ -57,10 +68,20 @@ Return ONLY a valid JSON object. Do not include any other text.
 {offers}
 """
 
+# Part of every memo key, so editing the prompt never serves answers to the old one
+PROMPT_VERSION = hashlib.sha256(PROMPT_TEMPLATE_STRING.encode()).hexdigest()[:12]
+
+EVALUATION_FIELDS = ("evaluation_reason", "score_explanation", "priority_breakdown")
+
 class EvaluatorAgent:
-    def __init__(self, model_name: str = "gpt-4o"):
+    def __init__(self, model_name: str = "gpt-4o", router: Optional[ModelRouter] = None,
+                 memo: Optional[EvaluationMemo] = None):
+        self.model_name = model_name
         self.llm = ChatOpenAI(model=model_name, temperature=0)
-        logger.info(f"EvaluatorAgent initialized with model: {model_name}")
+        self._llms = {}
+        self.router = router or ModelRouter(complex_model=model_name)
+        self.memo = memo or EvaluationMemo()
+        logger.info("EvaluatorAgent initialized with model: %s", model_name)
 
         self.response_schemas = [
             ResponseSchema(name="supplier", description="Best supplier name or 'No Offer'"),
@@ -86,100 +107,167 @@ class EvaluatorAgent:
             o for o in offers 
             if pattern.search(o.get("item", "")) or pattern_no_space.search(o.get("item", ""))
         ]
-        logger.debug(f"Size filter ({required_mm}mm): {len(filtered)}/{len(offers)} offers remain.")
+        logger.debug("Size filter (%smm): %d/%d offers remain.", required_mm, len(filtered), len(offers))
         return filtered
 
     def _query_implies_reliability(self, query: str) -> bool:
         """Checks if the query implies a high-stakes, risk-averse purchase."""
-        q = query.lower()
-        reliability_keywords = ["large order", "large quantity", "critical", "important", "engineering", "lowest risk", "reliable"]
-        if any(k in q for k in reliability_keywords):
-            return True
-        
-        # Check for large quantity numbers
-        qty_match = re.search(r"(?:over|more than|greater than|>=|)\s*([\d,]+)\s*(?:units|pcs|pieces|items)?", q)
-        if qty_match:
-            try:
-                qty = int(qty_match.group(1).replace(",", ""))
-                if qty >= 1000:
-                    return True
-            except ValueError:
-                pass
-        return False
-
-    def _is_high_risk(self, offer: Dict) -> bool:
-        """Checks if an offer is flagged as high risk in any relevant notes field."""
-        risk_text = " ".join([
-            str(offer.get("risk_assessment") or ""),
-            str(offer.get("risk_note") or ""),
-            str(offer.get("notes") or ""),
-            str(offer.get("supplier_comments") or "")
-        ]).lower()
-        return any(kw in risk_text for kw in ["high risk", "quality issues", "major quality", "production delays"])
-
-    def evaluate(self, query: str, offers: List[Dict]) -> Optional[Dict]:
+        return requires_reliability(query)
+
+    def _is_high_risk(self, offer: Union[OfferRecord, Dict]) -> bool:
+        """Records carry the flag stored at ingest; dicts are scanned."""
+        return offer.high_risk if isinstance(offer, OfferRecord) else is_high_risk(offer)
+
+    def _llm_for(self, model: str):
+        """One client per routed model; the default model uses `self.llm`."""
+        if model == self.model_name:
+            return self.llm
+        if model not in self._llms:
+            self._llms[model] = ChatOpenAI(model=model, temperature=0)
+        return self._llms[model]
+
+    def open_connections(self) -> int:
+        """Opens the connection of every model the router can pick (startup warmup). Returns the count."""
+        models = [self.model_name]
+        if self.router.enabled:
+            models += [self.router.simple_model, self.router.complex_model]
+        models = list(dict.fromkeys(models))
+        for model in models:
+            open_chat_connection(self._llm_for(model))
+        return len(models)
+
+    def _rank_locally(self, offers: List[Union[OfferRecord, Dict]], mode: str = "local") -> Dict:
+        """Cheap fallback: pick the winner with the local priority-chain ranking."""
+        ranked = rank_offers(offers)
+        best = as_dict(ranked[0])
+        best.update(explain_choice(best, ranked))
+        best["evaluation_mode"] = mode
+        logger.info("Local ranking selected supplier: %s", best.get("supplier"))
+        return best
+
+    @staticmethod
+    def _routed(best: Dict, decision: RouteDecision) -> Dict:
+        best["model_route"] = decision.tier
+        return best
+
+    @staticmethod
+    def _memo_key(plan: QueryPlan, reliability: bool, offers: List[Union[OfferRecord, Dict]],
+                  model: str) -> Optional[str]:
+        """None unless every candidate is a stored record (plain dicts have no id/version)."""
+        if not all(isinstance(o, OfferRecord) and o.id for o in offers):
+            return None
+        return memo_key(plan.size_mm, plan.max_price, plan.max_delivery_days, plan.quantity, plan.intents,
+                        reliability, [(o.id, o.version) for o in offers], PROMPT_VERSION, model)
+
+    def _from_memo(self, cached: Dict, offers: List[OfferRecord], decision: RouteDecision) -> Optional[Dict]:
+        """Rebuilds a memoized result from the current candidates (None if the winner is gone)."""
+        if cached["offer_id"] is None:
+            return self._routed({"supplier": "No Offer", **{f: cached[f] for f in EVALUATION_FIELDS}}, decision)
+        winner = next((o for o in offers if o.id == cached["offer_id"]), None)
+        if winner is None:
+            return None
+        best = as_dict(winner)
+        best.update({f: cached[f] for f in EVALUATION_FIELDS}, evaluation_mode="memo")
+        return self._routed(best, decision)
+
+    def evaluate(self, query: str, offers: List[Union[OfferRecord, Dict]], deadline: Optional[Deadline] = None,
+                 plan: Optional[QueryPlan] = None) -> Optional[Dict]:
+        """
+        Selects the best offer from retrieved OfferRecords (or plain offer dicts) and
+        returns it as a dict with the evaluation fields added. The router decides whether the LLM is needed and which
+        model to use; trivial cases are ranked locally (evaluation_mode="routed").
+        With a deadline, the LLM call is bounded by the remaining budget and falls back
+        to local ranking (evaluation_mode="local").
+        The chosen tier is returned in "model_route" on every result, "No Offer" included
+        (a No Offer decided by the size or risk filter, before routing, is a "skip").
+        LLM results are memoized on the query plan and the candidates' ids and versions;
+        a memo hit is returned with evaluation_mode="memo".
+        """
         if not offers:
             logger.warning("No offers provided for evaluation.")
             return None
 
-        logger.info(f"Evaluating {len(offers)} offers for query: '{query}'")
+        logger.info("Evaluating %d offers for query: '%s'", len(offers), query)
         
         #  Filter by size
         filtered_offers = self._filter_by_size(query, offers)
         if not filtered_offers:
             logger.warning("No size-matching offers found.")
-            return {
+            return self._routed({
                 "supplier": "No Offer",
                 "evaluation_reason": "No supplier found matching the required product size.",
                 "score_explanation": f"Query specified a size not found in offers.",
                 "priority_breakdown": "Product size match"
-            }
+            }, RouteDecision(SKIP, None, "no size-matching offers", 0))
 
         # Filter by risk if query is critical
-        if self._query_implies_reliability(query):
+        reliability = self._query_implies_reliability(query)
+        if reliability:
             logger.info("🔒 Query implies reliability. Applying strict risk filter.")
             reliable_offers = [o for o in filtered_offers if not self._is_high_risk(o)]
             
             if not reliable_offers:
                 logger.warning("All size-matching offers were disqualified due to high risk.")
-                return {
+                return self._routed({
                     "supplier": "No Offer",
                     "evaluation_reason": "All matching suppliers were disqualified due to high risk for a critical order.",
                     "score_explanation": "All suppliers matching the size constraint were found to be high risk.",
                     "priority_breakdown": "Risk assessment was the highest priority."
-                }
+                }, RouteDecision(SKIP, None, "all candidates high risk", 0))
             
             # Use only the reliable offers for the LLM
             offers_to_evaluate = reliable_offers
-            logger.info(f"Risk filter applied: {len(offers_to_evaluate)}/{len(filtered_offers)} offers remaining.")
+            logger.info("Risk filter applied: %d/%d offers remaining.", len(offers_to_evaluate), len(filtered_offers))
         else:
             offers_to_evaluate = filtered_offers 
+
+        plan = plan or QueryPlan.from_query(query)
+        decision = self.router.route(plan, offers_to_evaluate)
+        if decision.skip_llm:
+            return self._routed(self._rank_locally(offers_to_evaluate, mode="routed"), decision)
+
+        key = self._memo_key(plan, reliability, offers_to_evaluate, decision.model)
+        cached = self.memo.get(key) if key else None
+        if cached is not None:
+            memoized = self._from_memo(cached, offers_to_evaluate, decision)
+            if memoized is not None:
+                logger.info("Evaluation memo hit: supplier %s.", memoized.get("supplier"))
+                return memoized
+
         try:
-            offers_text = json.dumps(offers_to_evaluate, indent=2)
+            offers_text = json.dumps([as_dict(o) for o in offers_to_evaluate], indent=2)
         
-            formatted_prompt = self.prompt_template.format(
+            messages = self.prompt_template.format_messages(
                 query=query,
+                intents=", ".join(plan.intents) or "general",
                 offers=offers_text,
                 format_instructions=self.format_instructions
             )
-            messages = formatted_prompt.to_messages()
-            result = self.llm(messages)
+            result = run_with_deadline(
+                self._llm_for(decision.model).invoke, messages,
+                config={"callbacks": [UsageCallbackHandler("evaluator")]},
+                deadline=deadline
+            )
             parsed = self.output_parser.parse(result.content)
 
             supplier = parsed.get("supplier", "No Offer").strip()
-            logger.info(f"Evaluator selected supplier: {supplier}")
+            logger.info("Evaluator selected supplier: %s", supplier)
 
             # Find the original offer object to return
-            best = next((o for o in offers_to_evaluate if supplier.lower() in o.get("supplier", "").lower()), None)
+            winner = next((o for o in offers_to_evaluate if supplier.lower() in o.get("supplier", "").lower()), None)
+            best = as_dict(winner) if winner else None
             
             if not best or supplier.lower() == "no offer":
                 # Handle case where LLM returns "No Offer"
-                return {
+                result = {
                     "supplier": "No Offer",
                     "evaluation_reason": parsed.get("reason", "No suitable supplier found after evaluation."),
                     "score_explanation": parsed.get("score_explanation", ""),
                     "priority_breakdown": parsed.get("priority_breakdown", "")
                 }
+                if key:
+                    self.memo.put(key, {"offer_id": None, **{f: result[f] for f in EVALUATION_FIELDS}})
+                return self._routed(result, decision)
             
             # Add LLM reasoning to the chosen offer
             best.update({
@@ -187,9 +275,15 @@ class EvaluatorAgent:
                 "score_explanation": parsed.get("score_explanation", ""),
                 "priority_breakdown": parsed.get("priority_breakdown", "")
             })
-            return best
+            if key:
+                self.memo.put(key, {"offer_id": winner.id, **{f: best[f] for f in EVALUATION_FIELDS}})
+            return self._routed(best, decision)
+
+        except DeadlineExceeded as e:
+            logger.warning("Evaluator LLM over budget (%s). Falling back to local ranking.", e)
+            return self._routed(self._rank_locally(offers_to_evaluate), decision)
 
         except Exception as e:
-            logger.error(f"Evaluation error: {e}", exc_info=True)
+            logger.error("Evaluation error: %s", e, exc_info=True)
             # Fallback in case of LLM error
-            return offers_to_evaluate[0] if offers_to_evaluate else None
\ No newline at end of file
+            return self._routed(as_dict(offers_to_evaluate[0]), decision)
\ No newline at end of file
@@ -3,13 +3,21 @@ ExtractorAgent
     The ExtractorAgent is the first component in our system.
     Its job is to take messy, unstructured quotation text like:
     “QuickFix is offering 10mm steel bolts (Product ID: SB-10) at $0.75 per unit… Delivery: 10 business days...”
+    Short quotations can be packed into one request (extract_batch), so the prompt is sent once for all of them.
 """
+import contextvars
 import json
 import os
-from typing import List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
 from dotenv import load_dotenv
 from openai import OpenAI
 from app.models.models import Offer
+from app.core import config
+from app.core.json_stream import JSONArrayStreamParser
+from app.core.profiling import follow
+from app.core.usage import record_usage
 from app import get_logger
 
 logger = get_logger(__name__)
@@ -17,7 +25,7 @@ logger = get_logger(__name__)
 load_dotenv()
 SYSTEM_PROMPT = """
 You are an information extraction assistant for supplier quotations.
-Extract a JSON list of offers from the following raw text.
+Extract the supplier offers from the following raw text.
 
 Each offer must include:
 - supplier (string)
@@ -28,12 +36,59 @@ Each offer must include:
 - delivery_days (integer or null)
 - payment_terms (string or null)
 - risk_note (string or null)
+- valid_from (ISO date YYYY-MM-DD the price applies from, or null)
+- valid_until (ISO date YYYY-MM-DD the quotation expires, or null)
 - raw_text (original quoted snippet)
 
-Return ONLY a valid JSON list of offers.
+Return ONLY a valid JSON object of the form {"offers": [ ... ]}.
 No extra text. No commentary.
 """
 
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+The text holds several independent quotations, each between <<<QUOTATION n>>> and <<<END QUOTATION n>>>.
+Extract the offers of every quotation, and give each offer one more field:
+- source_id (integer n of the quotation the offer was taken from)
+Never combine details from different quotations into one offer.
+"""
+
+
+def pack_documents(texts: List[str], max_docs: int = config.EXTRACT_BATCH_MAX_DOCS,
+                   max_chars: int = config.EXTRACT_BATCH_MAX_CHARS) -> List[List[int]]:
+    """Splits text indices, in order, into groups within both limits; an oversized text gets a group of its own."""
+    groups, current, size = [], [], 0
+    for i, text in enumerate(texts):
+        if current and (len(current) >= max_docs or size + len(text) > max_chars):
+            groups.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += len(text)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def pack_prompt(texts: List[str]) -> str:
+    """Delimits each quotation with its 1-based source id."""
+    return "\n\n".join(f"<<<QUOTATION {n}>>>\n{text.strip()}\n<<<END QUOTATION {n}>>>"
+                        for n, text in enumerate(texts, 1))
+
+
+def split_offers(data, count: int) -> List[List[Offer]]:
+    """
+    Routes the offers of a packed answer back to their quotations by source_id.
+    Raises ValueError when any offer cannot be attributed, so the caller can fall back.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("offers"), list):
+        raise ValueError("LLM output did not contain an offers list.")
+    split = [[] for _ in range(count)]
+    for item in data["offers"]:
+        source_id = item.pop("source_id", None) if isinstance(item, dict) else None
+        if type(source_id) is not int or not 1 <= source_id <= count:
+            raise ValueError(f"Offer with missing or unknown source_id {source_id!r}.")
+        split[source_id - 1].append(Offer(**item))
+    return split
+
+
 class ExtractorAgent:
     def __init__(self):
         logger.info("ExtractorAgent initialized.")
@@ -42,8 +97,12 @@ class ExtractorAgent:
             logger.warning("OPENAI_API_KEY not found in environment variables.")
         self.client = OpenAI(api_key=api_key)
 
-    def extract_offers(self, text: str) -> List[Offer]:
-        logger.info("Starting offer extraction using LLM.")
+    def stream_offers(self, text: str) -> Iterator[Offer]:
+        """
+        Streams the extraction in JSON mode and yields each Offer as soon as
+        its object is complete, so downstream embedding can start early.
+        """
+        logger.info("Starting streaming offer extraction using LLM.")
         try:
             # Build chat messages
             messages = [
@@ -52,38 +111,101 @@ class ExtractorAgent:
             ]
             logger.debug("Prepared system and user messages for OpenAI API.")
 
-            # Call OpenAI Chat API
-            response = self.client.chat.completions.create(
+            # Call OpenAI Chat API (JSON mode guarantees no markdown fences)
+            start_time = time.perf_counter()
+            stream = self.client.chat.completions.create(
                 model="gpt-4o",
                 messages=messages,
-                temperature=0
+                temperature=0,
+                response_format={"type": "json_object"},
+                stream=True,
+                stream_options={"include_usage": True}
             )
-            logger.info("Received response from OpenAI model.")
 
-            # Extract returned JSON string from LLM response
-            json_text = response.choices[0].message.content.strip()
+            parser = JSONArrayStreamParser()
+            count = 0
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None)
+                if usage:
+                    # Final chunk carries the token usage for the whole response
+                    record_usage("extractor", chunk.model, usage.prompt_tokens, usage.completion_tokens,
+                                 time.perf_counter() - start_time)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                for data in parser.feed(delta):
+                    count += 1
+                    yield Offer(**data)
 
-            # Clean Markdown fences (```json ... ```)
-            if json_text.startswith("```"):
-                logger.debug("Cleaning Markdown formatting from LLM output.")
-                json_text = json_text.strip("`")
-                json_text = json_text.replace("json", "", 1).strip()
-                json_text = json_text.replace("```", "").strip()
-
-            # Log raw output for debugging (comment out if too verbose)
-            logger.debug(f"Raw LLM output: {json_text[:300]}...")
-
-            # Convert string to list of Offer objects
-            offer_list = json.loads(json_text)
-            logger.info(f"Parsed {len(offer_list)} offers successfully.")
-
-            offers = [Offer(**data) for data in offer_list]
-            logger.info("Offer objects created successfully.")
-            return offers
+            if not parser.started:
+                raise ValueError("LLM output did not contain an offers list.")
+            logger.info("Streamed %d offers successfully.", count)
 
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON output from LLM: {e}", exc_info=True)
+            logger.error("Failed to parse JSON output from LLM: %s", e, exc_info=True)
             raise
         except Exception as e:
-            logger.error(f"Error during offer extraction: {e}", exc_info=True)
+            logger.error("Error during offer extraction: %s", e, exc_info=True)
             raise
+
+    def extract_offers(self, text: str) -> List[Offer]:
+        """Extracts all offers from a quotation (collects the streamed result)."""
+        offers = list(self.stream_offers(text))
+        logger.info("Offer objects created successfully.")
+        return offers
+
+    def _extract_packed(self, texts: List[str]) -> List[List[Offer]]:
+        """One request for several quotations; offers per quotation, in order."""
+        start_time = time.perf_counter()
+        response = self.client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": pack_prompt(texts)}
+            ],
+            temperature=0,
+            response_format={"type": "json_object"}
+        )
+        usage = getattr(response, "usage", None)
+        if usage:
+            record_usage("extractor", response.model, usage.prompt_tokens, usage.completion_tokens,
+                         time.perf_counter() - start_time)
+        return split_offers(json.loads(response.choices[0].message.content), len(texts))
+
+    def extract_batch(self, texts: List[str], workers: int = 1, return_exceptions: bool = False) -> List:
+        """
+        Extracts many quotations, packing short ones into shared requests (`workers` requests at a time).
+        A pack whose answer cannot be parsed or attributed is extracted again one quotation at a time,
+        as is any quotation the packed answer returned no offers for.
+        Returns the offers per text, in order. With `return_exceptions`, a quotation that failed
+        holds its exception instead of raising.
+        """
+        results = [None] * len(texts)
+        groups = pack_documents(texts)
+
+        def run(group):
+            if len(group) > 1:
+                try:
+                    for i, offers in zip(group, self._extract_packed([texts[i] for i in group])):
+                        results[i] = offers
+                except Exception as e:
+                    logger.warning("Packed extraction of %d quotations failed (%s); extracting them one by one.",
+                                   len(group), e)
+            for i in group:
+                if results[i]:
+                    continue
+                try:
+                    results[i] = self.extract_offers(texts[i])
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[i] = e
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="extract") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, follow(run), group) for group in groups]
+            for future in futures:
+                future.result()
+        logger.info("Extracted %d quotation(s) in %d pack(s).", len(texts), len(groups))
+        return results
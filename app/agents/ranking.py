@@ -0,0 +1,76 @@
+"""
+Local offer ranking.
+Applies the EvaluatorAgent's strict priority chain without an LLM:
+    risk (Low > Moderate > High > Unknown) → unit price → delivery days
+    → payment terms (longer net terms first) → minimum quantity
+Used as the fallback when the LLM cannot answer within the request budget.
+Works on offer dicts and on OfferRecords (which carry their risk precomputed).
+"""
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.core.risk import RISK_ORDER, classify_risk
+
+
+def risk_level(note: Optional[str]) -> str:
+    """Maps supplier note text to Low / Moderate / High / Unknown."""
+    return classify_risk(note).level
+
+
+def offer_risk(offer) -> str:
+    """Risk level of an offer; records carry it precomputed, dicts are scanned."""
+    cached = getattr(offer, "risk", None)
+    return cached or risk_level(offer.get("risk_assessment") or offer.get("risk_note"))
+
+
+def is_high_risk(offer) -> bool:
+    """Checks if an offer is flagged as high risk in any relevant notes field."""
+    return classify_risk(
+        offer.get("risk_assessment"), offer.get("risk_note"),
+        offer.get("notes"), offer.get("supplier_comments")
+    ).high_risk
+
+
+def _payment_days(terms: Optional[str]) -> int:
+    match = re.search(r"net\s*(\d+)", (terms or "").lower())
+    return int(match.group(1)) if match else 0
+
+
+def _number(value) -> float:
+    return value if isinstance(value, (int, float)) else math.inf
+
+
+def priority_key(offer: Dict) -> Tuple:
+    """Sort key implementing the priority chain (smaller is better)."""
+    return (
+        RISK_ORDER[offer_risk(offer)],
+        _number(offer.get("unit_price")),
+        _number(offer.get("delivery_days")),
+        -_payment_days(offer.get("payment_terms")),
+        _number(offer.get("min_quantity")),
+    )
+
+
+def rank_offers(offers: List[Dict]) -> List[Dict]:
+    """Returns the offers ordered best-first by the priority chain."""
+    return sorted(offers, key=priority_key)
+
+
+def explain_choice(best: Dict, ranked: List[Dict]) -> Dict:
+    """Evaluator-style reasoning fields for a locally ranked winner."""
+    best_risk = offer_risk(best)
+    reason = (
+        f"{best.get('supplier')} ranks first on the priority chain: {best_risk} risk, "
+        f"unit price {best.get('unit_price')}, delivery in {best.get('delivery_days')} days."
+    )
+    runners_up = [
+        f"{o.get('supplier')} ({offer_risk(o)} risk, "
+        f"price {o.get('unit_price')}, {o.get('delivery_days')} days)"
+        for o in ranked[1:3]
+    ]
+    return {
+        "evaluation_reason": reason,
+        "score_explanation": "Next best: " + "; ".join(runners_up) if runners_up else "Only one offer was eligible.",
+        "priority_breakdown": "Risk > unit price > delivery days > payment terms > minimum quantity (local ranking).",
+    }
@@ -0,0 +1,93 @@
+"""
+Local reranking of the retrieval pool.
+RetrieverAgent.search fetches a wide pool of nearest neighbours; this scores the whole
+pool at once with numpy and keeps the best k, so a cheaper or faster offer that sits a
+little further away in embedding space still reaches the evaluator.
+
+    score = w * similarity + (1 - w) * mean(constraint scores that apply)
+
+Similarity is the vector distance rescaled to [0, 1] within the pool. Constraint scores
+(each in [0, 1], read from the stored metadata) only count when the query asks for them:
+    size      - item size equals the size in the query
+    price cap - unit price at or under "under $1"; cheapness - lower price within the pool
+    deadline  - delivery within "within a week"; speed - fewer delivery days within the pool
+    risk      - Low > Moderate > Unknown > High, for reliability-critical or risk queries
+Without any applicable constraint the vector order is kept.
+"""
+import re
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.agents.routing import QueryPlan
+from app.core import config
+from app.models.records import OfferRecord
+
+RISK_SCORES = {"Low": 1.0, "Moderate": 0.5, "Unknown": 0.25, "High": 0.0}
+# Score for an offer that does not state the field a constraint is about
+MISSING_SCORE = 0.5
+# Relative overshoot of a price cap or deadline at which its score reaches 0
+OVER_LIMIT_TOLERANCE = 0.25
+
+
+def _values(records: Sequence[OfferRecord], name: str) -> np.ndarray:
+    return np.array([v if isinstance(v, (int, float)) else np.nan
+                     for v in (getattr(r, name) for r in records)], dtype=float)
+
+
+def _within(values: np.ndarray, limit: float) -> np.ndarray:
+    """1 at or under the limit, falling linearly to 0 at OVER_LIMIT_TOLERANCE above it (missing: MISSING_SCORE)."""
+    over = np.clip((values - limit) / (max(limit, 1e-9) * OVER_LIMIT_TOLERANCE), 0.0, 1.0)
+    return np.where(np.isnan(values), MISSING_SCORE, 1.0 - over)
+
+
+def _lower_is_better(values: np.ndarray) -> np.ndarray:
+    """Min-max scaled so the lowest value in the pool scores 1; missing values score 0."""
+    if np.isnan(values).all():
+        return np.zeros_like(values)
+    low, high = np.nanmin(values), np.nanmax(values)
+    scaled = (high - values) / (high - low) if high > low else np.ones_like(values)
+    return np.where(np.isnan(values), 0.0, scaled)
+
+
+def constraint_scores(records: Sequence[OfferRecord], plan: QueryPlan, reliability: bool) -> List[np.ndarray]:
+    """One [0, 1] score array per constraint the query expresses."""
+    scores = []
+    if plan.size_mm:
+        sizes = [re.search(r"(\d+)\s*mm", (r.item or "").lower()) for r in records]
+        scores.append(np.array([1.0 if m and m.group(1) == plan.size_mm else 0.0 for m in sizes]))
+
+    prices = _values(records, "unit_price")
+    if plan.max_price is not None:
+        scores.append(_within(prices, plan.max_price))
+    if plan.max_price is not None or "price" in plan.intents:
+        scores.append(_lower_is_better(prices))
+
+    days = _values(records, "delivery_days")
+    if plan.max_delivery_days is not None:
+        scores.append(_within(days, plan.max_delivery_days))
+    if plan.max_delivery_days is not None or "delivery" in plan.intents:
+        scores.append(_lower_is_better(days))
+
+    if reliability or "risk" in plan.intents:
+        scores.append(np.array([RISK_SCORES[r.risk] for r in records]))
+    return scores
+
+
+def rerank(records: Sequence[OfferRecord], distances: Sequence[float], plan: QueryPlan, k: int,
+           reliability: bool = False, similarity_weight: Optional[float] = None) -> List[OfferRecord]:
+    """The k best records of the pool by blended similarity and constraint score (stable on ties)."""
+    if not records:
+        return []
+    weight = config.RERANK_SIMILARITY_WEIGHT if similarity_weight is None else similarity_weight
+    dist = np.asarray(distances, dtype=float)
+    spread = dist.max() - dist.min()
+    similarity = (dist.max() - dist) / spread if spread > 0 else np.ones_like(dist)
+
+    constraints = constraint_scores(records, plan, reliability)
+    if constraints:
+        score = weight * similarity + (1.0 - weight) * np.mean(constraints, axis=0)
+    else:
+        score = similarity
+    order = np.argsort(-score, kind="stable")[:k]
+    return [records[i] for i in order]
@@ -1,28 +1,254 @@
 import uuid
 import time
 import re
-from typing import List
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from langchain_openai import OpenAIEmbeddings
 from chromadb import PersistentClient
+from chromadb.errors import NotFoundError
 from app.models.models import Offer
+from app.models.records import OfferRecord
+from app.agents.routing import QueryPlan
+from app.agents.rerank import rerank
+from app.core import config
+from app.core.deadline import Deadline, DeadlineExceeded, run_with_deadline
+from app.core.profiling import follow
+from app.core.vectorstore import ARCHIVE_PREFIX, get_chroma_client, open_collection
+from app.core.usage import estimate_tokens, record_usage
+from app.core.dedup import candidate_filter, fingerprint, is_duplicate
+from app.core.risk import classify_risk, requires_reliability
+from app.core.intents import IntentIndex
+from app.core.query_cache import QueryEmbeddingCache
 from app import get_logger
 
 logger = get_logger(__name__)
 
+# Product categories used to route offers into shards (matched on Offer.item / query text)
+CATEGORY_PATTERN = re.compile(r"\b(bolt|nut|washer|rivet|screw)s?\b")
+PRODUCT_ID_PATTERN = re.compile(r"\b([a-z]{1,4})-?\d+\b")
+EMBEDDING_MODEL = "text-embedding-3-small"
+# valid_until_ts for offers without an expiry (9999-12-31)
+VALID_FOREVER_TS = 253402300799
+# Temporary name while a collection is rebuilt (never matches the offer prefix)
+REBUILD_PREFIX = "rebuild__"
+
+
+def _slug(value: str) -> str:
+    """Reduces a tenant or category name to characters Chroma accepts in collection names."""
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-") or "default"
+
+
+def _parse_date(value: Optional[str], end_of_day: bool = False) -> Optional[int]:
+    """ISO date/datetime → epoch seconds (UTC). Unparseable values are ignored."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        logger.warning("Ignoring unparseable validity date: %r", value)
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if end_of_day and len(value.strip()) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    return int(parsed.timestamp())
+
+
+def validity_fields(offer: Offer, now: float) -> Dict:
+    """Ingest timestamp and numeric validity window stored as offer metadata."""
+    valid_until = _parse_date(offer.valid_until, end_of_day=True)
+    if valid_until is None:
+        days = config.OFFER_DEFAULT_VALIDITY_DAYS
+        valid_until = int(now) + days * 86400 if days else VALID_FOREVER_TS
+    return {
+        "ingested_at": now,
+        "valid_from_ts": _parse_date(offer.valid_from) or int(now),
+        "valid_until_ts": valid_until,
+    }
+
 
 class RetrieverAgent:
-    def __init__(self, persist_dir: str = "./chroma_db"):
-        """Initializes persistent ChromaDB store and OpenAI embeddings."""
+    def __init__(
+        self,
+        persist_dir: Optional[str] = None,
+        collection_name: str = config.CHROMA_COLLECTION,
+        shard_by: str = config.CHROMA_SHARD_BY,
+        client=None,
+    ):
+        """
+        Initializes the ChromaDB store and OpenAI embeddings.
+        Uses the shared process-wide client (persistent or HTTP, per CHROMA_MODE)
+        unless an explicit client or persist_dir is given.
+        """
         try:
-            logger.info(f"Initializing RetrieverAgent with persistence at: {persist_dir}")
-            self.client = PersistentClient(path=persist_dir)
-            self.collection = self.client.get_or_create_collection("supplier_offers")
-            self.embedder = OpenAIEmbeddings(model="text-embedding-3-small")
-            logger.info("RetrieverAgent successfully initialized.")
+            if client is not None:
+                self.client = client
+                self.persist_dir = persist_dir
+            elif persist_dir:
+                logger.info("Initializing RetrieverAgent with persistence at: %s", persist_dir)
+                self.client = PersistentClient(path=persist_dir)
+                self.persist_dir = persist_dir
+            else:
+                logger.info("Initializing RetrieverAgent with shared Chroma client (%s)", config.CHROMA_MODE)
+                self.client = get_chroma_client()
+                self.persist_dir = config.CHROMA_PERSIST_DIR if config.CHROMA_MODE == "persistent" else None
+            self.collection_name = collection_name
+            self.shard_by = {s.strip() for s in shard_by.split(",") if s.strip() and s.strip() != "none"}
+            self._collections: Dict[str, object] = {}
+            self._collections_lock = threading.Lock()
+            # Serializes duplicate lookup + write so concurrent ingests cannot both miss a duplicate
+            self._write_lock = threading.Lock()
+            self._shard_pool = ThreadPoolExecutor(
+                max_workers=config.SHARD_SEARCH_WORKERS,
+                thread_name_prefix="shard-search"
+            )
+            self.collection = self._get_collection(collection_name)
+            self.embedder = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+            self.intent_index = IntentIndex(self.client)
+            self.query_cache = QueryEmbeddingCache()
+            logger.info("RetrieverAgent successfully initialized (sharding: %s).", sorted(self.shard_by) or "none")
         except Exception as e:
-            logger.error(f"Failed to initialize RetrieverAgent: {e}", exc_info=True)
+            logger.error("Failed to initialize RetrieverAgent: %s", e, exc_info=True)
             raise
 
+    # ----------- Shard Routing -----------
+
+    def _get_collection(self, name: str):
+        """Returns a cached collection handle, creating the collection on first use."""
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._collections_lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = open_collection(self.client, name)
+                    self._collections[name] = collection
+        return collection
+
+    def _reload_collection(self, name: str):
+        """
+        Drops a cached handle that stopped working (the collection was rebuilt, possibly by
+        another process) and looks the collection up again without creating it.
+        Raises NotFoundError while the rebuilt collection is not swapped in yet.
+        """
+        with self._collections_lock:
+            self._collections.pop(name, None)
+            collection = self.client.get_collection(name)
+            self._collections[name] = collection
+        if name == self.collection_name:
+            self.collection = collection
+        return collection
+
+    def _offer_category(self, offer: Offer) -> str:
+        """Category of an offer: item keyword first, then product ID prefix, else 'general'."""
+        match = CATEGORY_PATTERN.search((offer.item or "").lower())
+        if match:
+            return match.group(1)
+        pid_match = PRODUCT_ID_PATTERN.search((offer.product_id or "").lower())
+        if pid_match:
+            return f"pid-{pid_match.group(1)}"
+        return "general"
+
+    def _query_categories(self, query: str) -> List[str]:
+        """Categories named in the query. Empty means the query is ambiguous."""
+        return sorted({m.group(1) for m in CATEGORY_PATTERN.finditer(query.lower())})
+
+    def _tenant_prefix(self, tenant: Optional[str]) -> str:
+        if "tenant" in self.shard_by and tenant:
+            return f"{self.collection_name}__t-{_slug(tenant)}"
+        return self.collection_name
+
+    def _shard_name(self, category: str, tenant: Optional[str] = None) -> str:
+        """Collection name for a (category, tenant) pair under the configured shard layout."""
+        name = self._tenant_prefix(tenant)
+        if "category" in self.shard_by:
+            name = f"{name}__{_slug(category)}"
+        return name
+
+    def _shards_for_query(self, query: str, tenant: Optional[str] = None) -> List[str]:
+        """
+        Shards to search: the named categories, or every shard of the tenant when ambiguous.
+        The tenant's unsharded collection is always included, so offers stored before
+        category sharding was switched on stay reachable. So are the fallback shards
+        (`pid-*` and `general`): an offer lands there when its item names no category,
+        which says nothing about whether it matches a query that does.
+        """
+        if not self.shard_by:
+            return [self.collection_name]
+
+        categories = self._query_categories(query) if "category" in self.shard_by else []
+        prefix = self._tenant_prefix(tenant)
+        existing = {c.name for c in self.client.list_collections()}
+
+        if categories:
+            names = [self._shard_name(c, tenant) for c in categories]
+            fallback = sorted(name for name in existing if name == f"{prefix}__general"
+                              or name.startswith(f"{prefix}__pid-"))
+            return [name for name in dict.fromkeys([prefix] + names + fallback) if name in existing]
+
+        # Ambiguous query: fan out over the tenant's shards (including the legacy unsharded collection)
+        shards = []
+        for name in existing:
+            if name == prefix:
+                shards.append(name)
+            elif name.startswith(f"{prefix}__"):
+                suffix = name[len(prefix) + 2:]
+                # Without a tenant, never reach into tenant-isolated shards
+                if "__" not in suffix and not suffix.startswith("t-"):
+                    shards.append(name)
+        return sorted(shards)
+
+    def live_collections(self) -> List[str]:
+        """The base collection and every shard (tenant shards included), excluding archives."""
+        return sorted(
+            c.name for c in self.client.list_collections()
+            if c.name == self.collection_name or c.name.startswith(f"{self.collection_name}__")
+        )
+
+    def _validity_filter(self, now: Optional[float] = None, exclude_high_risk: bool = False) -> Dict:
+        """
+        Store-side filter keeping only offers whose validity window contains `now`
+        and, for reliability-critical queries, that were not classified high risk.
+        """
+        now = int(now or time.time())
+        clauses = [{"valid_from_ts": {"$lte": now}}, {"valid_until_ts": {"$gte": now}}]
+        if exclude_high_risk:
+            clauses.append({"high_risk": {"$ne": True}})
+        return {"$and": clauses}
+
+    def _query_shard(self, name: str, query_embedding: List[float], n_results: int,
+                     where: Optional[Dict] = None) -> List[tuple]:
+        """
+        Queries a single shard and returns (distance, id, metadata) triples.
+        A stale handle is looked up again once; a shard caught mid-rebuild returns no hits.
+        """
+        def query(collection):
+            count = collection.count()
+            if count == 0:
+                return None
+            return collection.query(
+                query_embeddings=[query_embedding],
+                n_results=min(n_results, count),
+                where=where,
+                include=["metadatas", "distances"]
+            )
+
+        try:
+            results = query(self._get_collection(name))
+        except NotFoundError:
+            try:
+                results = query(self._reload_collection(name))
+            except NotFoundError:
+                logger.warning("Shard %s is being rebuilt; skipped for this search.", name)
+                return []
+        if results is None:
+            return []
+        ids = results.get("ids", [[]])[0]
+        metadatas = results.get("metadatas", [[]])[0]
+        distances = results.get("distances", [[]])[0]
+        return list(zip(distances, ids, metadatas))
+
     def _offer_to_text(self, offer: Offer) -> str:
         """Converts an Offer object into descriptive text for embeddings."""
         return (
@@ -36,89 +262,437 @@ class RetrieverAgent:
             f"Risk note: {offer.risk_note or 'No risk notes provided'}."
         )
 
-    def _detect_intents(self, query: str) -> list[str]:
+    def _detect_intents(self, query: str, query_embedding: Optional[List[float]] = None) -> List[str]:
         """
         Identify all relevant intents in the query.
         Returns a list of intents such as ['price', 'delivery', 'risk'].
+        With the query embedding, paraphrases are caught by the prototype index as well.
         """
-        q = query.lower()
-        intents = []
+        return self.intent_index.detect(query, query_embedding, self.embedder)
 
-        if any(word in q for word in ["price", "cheapest", "cost", "under", "budget"]):
-            intents.append("price")
+    # ----------- Versions & Archive -----------
 
-        if any(word in q for word in ["delivery", "fast", "quick", "urgent", "asap"]):
-            intents.append("delivery")
+    def _archive(self, collection, ids: List[str], reason: str) -> int:
+        """Copies offers (with their embeddings) into the shard's archive collection."""
+        if not ids:
+            return 0
+        records = collection.get(ids=ids, include=["documents", "metadatas", "embeddings"])
+        if not records["ids"]:
+            return 0
+        archived_at = time.time()
+        self._get_collection(f"{ARCHIVE_PREFIX}{collection.name}").upsert(
+            ids=[f"{id_}@v{meta.get('version', 1)}" for id_, meta in zip(records["ids"], records["metadatas"])],
+            documents=records["documents"],
+            embeddings=records["embeddings"],
+            metadatas=[dict(meta, archived_at=archived_at, archived_reason=reason) for meta in records["metadatas"]]
+        )
+        return len(records["ids"])
 
-        if any(word in q for word in ["risk", "reliable", "dependable", "trust", "quality"]):
-            intents.append("risk")
+    def archive_expired(self, now: Optional[float] = None) -> int:
+        """Moves offers whose validity window has ended out of the live index. Returns the count."""
+        now = int(now or time.time())
+        archived = 0
+        with self._write_lock:
+            for name in self.live_collections():
+                collection = self._get_collection(name)
+                expired = collection.get(where={"valid_until_ts": {"$lt": now}}, include=[])
+                if expired["ids"]:
+                    archived += self._archive(collection, expired["ids"], "expired")
+                    collection.delete(ids=expired["ids"])
+        if archived:
+            logger.info("Archived %d expired offer(s).", archived)
+        return archived
 
-        if any(word in q for word in ["bulk", "large order", "quantity"]):
-            intents.append("bulk")
-        # Default fallback
-        if not intents:
-            intents.append("general")
-        return intents
+    def archive_superseded(self, now: Optional[float] = None) -> int:
+        """
+        Archives the versions replaced by future-dated re-quotes that have taken effect
+        (until then both stay live and the validity filter picks one). Returns the count.
+        """
+        now = int(now or time.time())
+        archived = 0
+        with self._write_lock:
+            for name in self.live_collections():
+                collection = self._get_collection(name)
+                due = collection.get(where={"$and": [{"supersede_pending": True}, {"valid_from_ts": {"$lte": now}}]},
+                                     include=["metadatas"])
+                if not due["ids"]:
+                    continue
+                replaced = collection.get(ids=[meta["supersedes"] for meta in due["metadatas"]], include=[])["ids"]
+                if replaced:
+                    archived += self._archive(collection, replaced, "superseded")
+                    collection.delete(ids=replaced)
+                collection.update(ids=due["ids"], metadatas=[{"supersede_pending": False} for _ in due["ids"]])
+        if archived:
+            logger.info("Archived %d superseded offer(s).", archived)
+        return archived
 
+    def withdraw_offers(self, ids: List[str], reason: str = "withdrawn") -> int:
+        """Moves the given offers out of the live index (into the archive). Returns the count."""
+        if not ids:
+            return 0
+        withdrawn = 0
+        with self._write_lock:
+            for name in self.live_collections():
+                collection = self._get_collection(name)
+                found = collection.get(ids=ids, include=[])["ids"]
+                if found:
+                    withdrawn += self._archive(collection, found, reason)
+                    collection.delete(ids=found)
+        if withdrawn:
+            logger.info("Withdrew %d offer(s) (%s).", withdrawn, reason)
+        return withdrawn
 
-    def add_offers(self, offers: List[Offer]) -> None:
-        """Adds supplier offers into the Chroma vector store."""
+    def backfill_metadata(self, page_size: int = 1000) -> int:
+        """
+        Adds validity and risk metadata to offers stored before those fields existed,
+        so store-side filters treat them like newly ingested offers.
+        """
+        updated = 0
+        for name in self.live_collections():
+            collection = self._get_collection(name)
+            offset = 0
+            while True:
+                page = collection.get(limit=page_size, offset=offset, include=["metadatas"])
+                if not page["ids"]:
+                    break
+                missing = [(id_, meta) for id_, meta in zip(page["ids"], page["metadatas"])
+                           if "valid_until_ts" not in meta or "risk_level" not in meta]
+                if missing:
+                    now = time.time()
+                    validity = dict(ingested_at=now, valid_from_ts=0, valid_until_ts=VALID_FOREVER_TS)
+                    collection.update(
+                        ids=[id_ for id_, _ in missing],
+                        metadatas=[{**validity, **meta, **classify_risk(meta.get("risk_note")).metadata()}
+                                   for _, meta in missing]
+                    )
+                    updated += len(missing)
+                offset += page_size
+        if updated:
+            logger.info("Backfilled validity/risk metadata for %d offer(s).", updated)
+        return updated
+
+    # ----------- Purge & Rebuild -----------
+
+    def _archive_collections(self) -> List[str]:
+        prefix = f"{ARCHIVE_PREFIX}{self.collection_name}"
+        return sorted(c.name for c in self.client.list_collections() if c.name.startswith(prefix))
+
+    def purge_offers(self, supplier: Optional[str] = None, older_than_s: Optional[float] = None,
+                     include_archive: bool = True, page_size: int = 1000) -> int:
+        """
+        Permanently deletes offers from `supplier` (case-insensitive exact name) and/or
+        ingested more than `older_than_s` seconds ago. Both criteria must hold when both
+        are given. Returns the number of offers deleted.
+        """
+        if not supplier and older_than_s is None:
+            raise ValueError("Purge needs a supplier, an age, or both.")
+        where = {"ingested_at": {"$lt": time.time() - older_than_s}} if older_than_s is not None else None
+        wanted = supplier.strip().lower() if supplier else None
+        names = self.live_collections() + (self._archive_collections() if include_archive else [])
+
+        deleted = 0
+        with self._write_lock:
+            for name in names:
+                collection = self._get_collection(name)
+                ids, offset = [], 0
+                while True:
+                    page = collection.get(where=where, limit=page_size, offset=offset, include=["metadatas"])
+                    if not page["ids"]:
+                        break
+                    ids.extend(
+                        id_ for id_, meta in zip(page["ids"], page["metadatas"])
+                        if wanted is None or str(meta.get("supplier", "")).strip().lower() == wanted
+                    )
+                    offset += page_size
+                if ids:
+                    collection.delete(ids=ids)
+                    deleted += len(ids)
+        logger.info("Purged %d offer(s) (supplier=%s, older_than_s=%s).", deleted, supplier, older_than_s)
+        return deleted
+
+    def rebuild_collection(self, name: str, page_size: int = 1000) -> int:
+        """
+        Rebuilds one collection from its stored records and embeddings: a fresh HNSW
+        index without deleted entries, built with the configured HNSW settings.
+        Writes in this process are blocked meanwhile. Between dropping the old collection
+        and renaming the new one, searches skip this shard; handles cached elsewhere (other
+        workers) fail once and are looked up again. Run it from one process only: the
+        temporary collection name is unique per run, but two concurrent rebuilds of the
+        same collection would still swap over each other. Returns the number of offers kept.
+        """
+        with self._write_lock:
+            source = self._get_collection(name)
+            temp_name = f"{REBUILD_PREFIX}{uuid.uuid4().hex[:8]}__{name}"
+            target = open_collection(self.client, temp_name, metadata=source.metadata or None)
+
+            copied = 0
+            while True:
+                page = source.get(limit=page_size, offset=copied, include=["documents", "metadatas", "embeddings"])
+                if not page["ids"]:
+                    break
+                target.add(ids=page["ids"], documents=page["documents"],
+                           metadatas=page["metadatas"], embeddings=page["embeddings"])
+                copied += len(page["ids"])
+
+            self.client.delete_collection(name)
+            target.modify(name=name)
+            with self._collections_lock:
+                self._collections.pop(name, None)
+                self._collections.pop(temp_name, None)
+            if name == self.collection_name:
+                self.collection = self._get_collection(name)
+        logger.info("Rebuilt collection %s (%d offers).", name, copied)
+        return copied
+
+    def _collapse_duplicates(self, collection, idx: List[int], offers: List[Offer],
+                             ids: List[str], metas: List[Dict]) -> List[int]:
+        """
+        Folds near-duplicates into one versioned offer. An offer matching a stored offer
+        (or an earlier one in the same batch) takes over its id with version + 1, and the
+        stored version it supersedes is moved to the archive.
+        A re-quote whose valid_from is still in the future does not replace the current
+        version yet: it is stored next to it under a new id, marked as pending, and the
+        current version is archived once the re-quote takes effect (see archive_superseded).
+        Two offers of a batch that replace the same stored offer without matching each other
+        are merged as well (the later valid_from wins), so no id is written twice.
+        Returns the batch indices left after in-batch duplicates are merged.
+        """
+        now = time.time()
+        for i in idx:
+            metas[i].update(fingerprint(offers[i].supplier, offers[i].product_id, offers[i].raw_text))
+            metas[i]["version"] = 1
+
+        stored = collection.get(where=candidate_filter([metas[i] for i in idx]), include=["metadatas"])
+        existing = list(zip(stored["ids"], stored["metadatas"]))
+
+        def take_over(i: int, old_id: str, old_meta: Dict):
+            ids[i] = old_id
+            if old_meta.get("supersede_pending"):
+                # Replacing a pending re-quote: the version it was going to supersede still is
+                metas[i].update(supersedes=old_meta["supersedes"], supersede_pending=True)
+
+        kept: List[int] = []
+        superseded: List[str] = []
+        for i in idx:
+            threshold = config.DEDUP_SIMILARITY
+            future = metas[i]["valid_from_ts"] > now
+            earlier = next((j for j in kept if is_duplicate(
+                metas[i], offers[i].supplier, metas[j], offers[j].supplier, threshold)), None)
+            if earlier is not None:
+                metas[i]["version"] = metas[earlier]["version"] + 1
+                if future and metas[earlier]["valid_from_ts"] <= now:
+                    metas[i].update(supersedes=ids[earlier], supersede_pending=True)
+                else:
+                    take_over(i, ids[earlier], metas[earlier])
+                    kept.remove(earlier)
+            else:
+                # Tenants sharing a collection (no tenant sharding) never supersede each other;
+                # of several stored versions (current and pending), the latest is the one to replace
+                match = max(((sid, meta) for sid, meta in existing
+                             if meta.get("tenant") == metas[i].get("tenant") and is_duplicate(
+                                 metas[i], offers[i].supplier, meta, meta.get("supplier"), threshold)),
+                            key=lambda m: m[1].get("version", 1), default=None)
+                if match:
+                    metas[i]["version"] = match[1].get("version", 1) + 1
+                    if future and match[1].get("valid_from_ts", 0) <= now:
+                        metas[i].update(supersedes=match[0], supersede_pending=True)
+                    else:
+                        holder = next((j for j in kept if ids[j] == match[0]), None)
+                        if holder is not None:
+                            # An earlier offer of this batch already replaces it: one id, so keep the later quote
+                            if metas[holder]["valid_from_ts"] > metas[i]["valid_from_ts"]:
+                                continue
+                            metas[i]["version"] = metas[holder]["version"] + 1
+                            kept.remove(holder)
+                        else:
+                            superseded.append(match[0])
+                        take_over(i, *match)
+            kept.append(i)
+
+        self._archive(collection, superseded, "superseded")
+
+        collapsed = sum(1 for i in kept if metas[i]["version"] > 1) + len(idx) - len(kept)
+        if collapsed:
+            logger.info("Collapsed %d near-duplicate offer(s) in %s.", collapsed, collection.name)
+        return kept
+
+    def add_offers(self, offers: List[Offer], tenant: Optional[str] = None) -> List[str]:
+        """
+        Adds supplier offers into the Chroma vector store, routed to their shard.
+        Near-duplicates of stored offers replace them as a new version instead of adding vectors.
+        Returns the ids the offers were stored under.
+        """
         if not offers:
             logger.warning("No offers provided for addition to vector store.")
-            return
+            return []
 
-        logger.info(f"Adding {len(offers)} offers to vector store...")
+        logger.info("Adding %d offers to vector store...", len(offers))
         start_time = time.time()
 
         try:
             ids = [str(uuid.uuid4()) for _ in offers]
-            docs = [self._offer_to_text(o) for o in offers]
             metas = [o.model_dump(exclude_none=True) for o in offers]
-            embeddings = self.embedder.embed_documents(docs)
+            now = time.time()
+            for meta, offer in zip(metas, offers):
+                meta.update(validity_fields(offer, now))
+                # Classified once here; queries filter on it and records reuse it
+                meta.update(classify_risk(offer.risk_note).metadata())
+
+            # Group by destination shard so each collection gets a single write
+            shards: Dict[str, List[int]] = {}
+            for i, offer in enumerate(offers):
+                category = self._offer_category(offer)
+                metas[i]["category"] = category
+                if tenant:
+                    metas[i]["tenant"] = tenant
+                shards.setdefault(self._shard_name(category, tenant), []).append(i)
+
+            stored_ids = []
+            with self._write_lock:
+                for name, idx in shards.items():
+                    collection = self._get_collection(name)
+                    try:
+                        collection.count()
+                    except NotFoundError:
+                        collection = self._reload_collection(name)  # Rebuilt by another process
+                    if config.DEDUP_ENABLED:
+                        idx = self._collapse_duplicates(collection, idx, offers, ids, metas)
+
+                    docs = [self._offer_to_text(offers[i]) for i in idx]
+                    embed_start = time.time()
+                    embeddings = self.embedder.embed_documents(docs)
+                    record_usage("retriever", EMBEDDING_MODEL, estimate_tokens(docs), 0,
+                                 time.time() - embed_start, kind="embedding")
+
+                    collection.upsert(
+                        ids=[ids[i] for i in idx],
+                        documents=docs,
+                        embeddings=embeddings,
+                        metadatas=[metas[i] for i in idx]
+                    )
+                    stored_ids.extend(ids[i] for i in idx)
 
-            self.collection.add(
-                ids=ids,
-                documents=docs,
-                embeddings=embeddings,
-                metadatas=metas
-            )
             elapsed = time.time() - start_time
-            logger.info(f"Added {len(offers)} offers to ChromaDB in {elapsed:.2f}s.")
+            logger.info("Stored %d of %d offers in ChromaDB (%d shard(s)) in %.2fs.", len(stored_ids), len(offers), len(shards), elapsed)
+            return stored_ids
         except Exception as e:
-            logger.error(f"Error adding offers: {e}", exc_info=True)
+            logger.error("Error adding offers: %s", e, exc_info=True)
             raise
 
-    def search(self, query: str, k: int = 5) -> List[Offer]:
+    # ----------- Warmup -----------
+
+    def warm_index(self) -> int:
+        """
+        Runs a one-neighbour query against every non-empty live shard, so the store loads
+        each HNSW index before the first real query needs it. Returns the shards touched.
+        """
+        touched = 0
+        for name in self.live_collections():
+            collection = self._get_collection(name)
+            sample = collection.peek(1)
+            embeddings = sample.get("embeddings")
+            if embeddings is None or len(embeddings) == 0:
+                continue
+            collection.query(query_embeddings=[list(embeddings[0])], n_results=1, include=[])
+            touched += 1
+        return touched
+
+    def prime_queries(self, queries: List[str]) -> int:
+        """
+        Loads the intent prototypes and embeds the uncached `queries` in one call into the
+        query cache (this also opens the embeddings connection). Returns the queries embedded.
+        """
+        self.intent_index.load(self.embedder)
+        missing = [q for q in dict.fromkeys(queries)
+                   if self.query_cache.get(EMBEDDING_MODEL, q, record=False) is None]
+        if not missing:
+            return 0
+        embed_start = time.time()
+        embeddings = self.embedder.embed_documents(missing)
+        record_usage("retriever", EMBEDDING_MODEL, estimate_tokens(missing), 0,
+                     time.time() - embed_start, kind="embedding")
+        for query, embedding in zip(missing, embeddings):
+            self.query_cache.put(EMBEDDING_MODEL, query, embedding)
+        return len(missing)
+
+    def search(self, query: str, k: int = 5, tenant: Optional[str] = None,
+               exclude_high_risk: Optional[bool] = None, plan: Optional[QueryPlan] = None,
+               deadline: Optional[Deadline] = None) -> List[OfferRecord]:
         """
         Performs intent-aware semantic retrieval:
-        1. Detects size (e.g., '10 mm') and multiple query intents (price, delivery, risk, etc.).
-        2. Performs vector search using OpenAI embeddings.
-        3. Applies keyword filtering for product, size, and intent relevance.
+        1. Detects size (e.g., '10 mm') and multiple query intents (price, delivery, risk, etc.),
+           scoring the query embedding against the intent prototypes. When `plan` is given
+           its intents are replaced with these, so the model router sees the same reading.
+        2. Performs vector search using OpenAI embeddings, only on the relevant shards
+           (in parallel when there are several: see _shards_for_query),
+           restricted inside the store to offers whose validity window is current (and to
+           the tenant's offers when tenants share collections).
+           High-risk offers are excluded in the store as well when `exclude_high_risk`
+           is set (by default: when the query implies a reliability-critical order).
+        3. Applies keyword filtering for product, size, and intent relevance. The risk intent
+           only ranks offers (Low before High); when fewer than k offers match an intent, the
+           relevant offers that match none top the results up.
+        4. Reranks the wide candidate pool (RETRIEVAL_POOL_SIZE per shard) locally, blending
+           similarity with the query's size, price cap, delivery deadline and risk
+           constraints, and keeps the top k.
+        Results are OfferRecords built directly from the stored metadata.
+        With a deadline, the embedding call is bounded by the remaining budget, and
+        DeadlineExceeded is raised when the budget runs out before the results are ready.
         """
-        logger.info(f"🔍 Searching for query: '{query}' (top {k})")
+        logger.info("🔍 Searching for query: '%s' (top %d)", query, k)
         start_time = time.time()
 
         try:
             query_lower = query.lower()
             mm_match = re.search(r"(\d+)\s*mm", query_lower)
             query_mm = mm_match.group(1) if mm_match else None
-            intents = self._detect_intents(query)
             product_keywords = ["bolt", "fastener", "steel", "alloy", "component"]
 
-            # ---  Embed query ---
-            query_embedding = self.embedder.embed_query(query)
+            # ---  Embed query (recent queries come from the cache) ---
+            query_embedding = self.query_cache.get(EMBEDDING_MODEL, query)
+            if query_embedding is None:
+                embed_start = time.time()
+                query_embedding = run_with_deadline(self.embedder.embed_query, query, deadline=deadline,
+                                                    min_budget_ms=0)
+                record_usage("retriever", EMBEDDING_MODEL, estimate_tokens([query]), 0,
+                             time.time() - embed_start, kind="embedding")
+                self.query_cache.put(EMBEDDING_MODEL, query, query_embedding)
+            intents = self._detect_intents(query, query_embedding)
+            if plan is not None:
+                plan.intents = [i for i in intents if i != "general"]
 
-            # --- Perform semantic search ---
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=k * 2  # fetch more to allow filtering
-            )
+            # --- Perform semantic search over the relevant shards ---
+            n_results = max(k * 2, config.RETRIEVAL_POOL_SIZE)  # wide pool, narrowed by filtering and reranking
+            shards = self._shards_for_query(query, tenant)
+            if exclude_high_risk is None:
+                # Keyword rule only: the fuzzy risk intent just weights the rerank
+                exclude_high_risk = requires_reliability(query)
+            # Currently valid (and, if required, not high-risk) offers only, filtered inside Chroma
+            where = self._validity_filter(exclude_high_risk=exclude_high_risk)
+            if tenant and "tenant" not in self.shard_by:
+                where["$and"].append({"tenant": tenant})  # No tenant shards: isolate by metadata
+            if len(shards) == 1:
+                hits = self._query_shard(shards[0], query_embedding, n_results, where)
+            else:
+                futures = [
+                    self._shard_pool.submit(follow(self._query_shard), name, query_embedding, n_results, where)
+                    for name in shards
+                ]
+                hits = [hit for future in futures for hit in future.result()]
+            hits.sort(key=lambda hit: hit[0])
+            logger.debug("Searched %d shard(s): %s", len(shards), shards)
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(f"Retrieval did not finish within the {deadline.budget_ms}ms budget.")
 
-            retrieved_offers = [Offer(**meta) for meta in results.get("metadatas", [[]])[0]]
+            # A re-quote that took effect hides the version it replaces until the sweeper archives it
+            replaced = {meta["supersedes"] for _, _, meta in hits if meta.get("supersede_pending")}
+            hits = [hit for hit in hits if hit[1] not in replaced][:n_results]
+            retrieved_offers = [OfferRecord.from_metadata(meta, id=id_) for _, id_, meta in hits]
 
             # ---  Filter for relevance ---
-            filtered_offers = []
-            for offer in retrieved_offers:
+            filtered_offers, filtered_distances = [], []
+            unmatched = []  # Relevant product and size, but none of the intents
+            for (distance, _, _), offer in zip(hits, retrieved_offers):
                 text = (offer.item or "").lower()
 
                 # Product relevance
@@ -138,23 +712,37 @@ class RetrieverAgent:
                         if (
                             (intent == "delivery" and re.search(r"delivery|days|ship|arrive", text))
                             or (intent == "price" and re.search(r"price|unit|cost|\$", text))
-                            or (intent == "risk" and re.search(r"risk|reliable|quality|defect", text))
+                            or (intent == "risk" and offer.risk != "Unknown")
                             or (intent == "bulk" and re.search(r"bulk|large|quantity|min", text))
+                            or (intent == "payment" and offer.payment_terms)
                         ):
                             matched = True
                             break
                     if not matched:
+                        unmatched.append((distance, offer))
                         continue  # skip if none of the detected intents matched
 
                 filtered_offers.append(offer)
+                filtered_distances.append(distance)
 
-            # --- Fallback & Logging ---
-            final_results = filtered_offers[:k] if filtered_offers else retrieved_offers[:k]
+            # --- Rerank the pool (falling back to the unfiltered one) & Logging ---
+            if plan is None:
+                plan = QueryPlan.from_query(query)
+                plan.intents = [i for i in intents if i != "general"]
+            if filtered_offers:
+                final_results = rerank(filtered_offers, filtered_distances, plan, k, reliability=exclude_high_risk)
+                if len(final_results) < k and unmatched:
+                    # The intent filter is soft: top up with the relevant offers it left out
+                    final_results += rerank([offer for _, offer in unmatched], [d for d, _ in unmatched], plan,
+                                            k - len(final_results), reliability=exclude_high_risk)
+            else:
+                final_results = rerank(retrieved_offers, [hit[0] for hit in hits], plan, k,
+                                       reliability=exclude_high_risk)
 
             elapsed = time.time() - start_time
             logger.info(
-                f"Retrieved {len(final_results)} relevant offers "
-                f"(intents: {', '.join(intents)}) in {elapsed:.2f}s."
+                "Retrieved %d relevant offers from a pool of %d (intents: %s) in %.2fs.",
+                len(final_results), len(hits), ", ".join(intents), elapsed
             )
 
             if not final_results:
@@ -162,7 +750,11 @@ class RetrieverAgent:
 
             return final_results
 
+        except DeadlineExceeded:
+            logger.warning("Retrieval over budget.")
+            raise
+
         except Exception as e:
-            logger.error(f"Error during vector search: {e}", exc_info=True)
+            logger.error("Error during vector search: %s", e, exc_info=True)
             raise
 
@@ -0,0 +1,151 @@
+"""
+Query-complexity model routing.
+Chooses how much model an evaluation needs from the query plan and the candidates:
+    skip    - one candidate, or the winner dominates the runner-up → local ranking, no LLM
+    simple  - a clear winner the LLM only has to justify → ROUTER_SIMPLE_MODEL
+    complex - competing intents or a close call → ROUTER_COMPLEX_MODEL
+"""
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app import get_logger
+from app.agents.ranking import offer_risk, priority_key, rank_offers
+from app.core import config
+from app.core.intents import keyword_intents
+
+logger = get_logger(__name__)
+
+SKIP, SIMPLE, COMPLEX = "skip", "simple", "complex"
+
+
+_CAP_WORDS = r"(?:under|below|less than|at most|up to|no more than|max(?:imum)?(?: of)?)"
+_PRICE_CAP = re.compile(_CAP_WORDS + r"\s*(?:\$\s*(\d+(?:\.\d+)?)|(\d+(?:\.\d+)?)\s*(?:dollars?|usd|\$))")
+_DEADLINE = re.compile(r"(?:within|in under|in less than|in at most|no more than)\s+(\d+|a|an|one|two)\s+"
+                       r"(?:business\s+|working\s+)?(days?|weeks?)")
+_NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2}
+_QUANTITY = re.compile(r"(\d[\d,]*)\s*(?:units?|pcs|pieces|items)\b")
+
+
+def _price_cap(q: str) -> Optional[float]:
+    """Unit-price ceiling such as "under $1" or "below 0.80 dollars"."""
+    match = _PRICE_CAP.search(q)
+    return float(match.group(1) or match.group(2)) if match else None
+
+
+def _delivery_deadline(q: str) -> Optional[int]:
+    """Delivery deadline in days, such as "within 10 business days" or "within a week"."""
+    match = _DEADLINE.search(q)
+    if not match:
+        return None
+    count = _NUMBER_WORDS.get(match.group(1)) or int(match.group(1))
+    return count * 7 if match.group(2).startswith("week") else count
+
+
+def _quantity(q: str) -> Optional[int]:
+    """Order quantity such as "1,000 units" or "500 pcs"."""
+    match = _QUANTITY.search(q)
+    return int(match.group(1).replace(",", "")) if match else None
+
+
+@dataclass
+class QueryPlan:
+    """
+    What a query asks for, parsed once per request.
+    Intents start from the keyword lists; RetrieverAgent.search replaces them with the
+    embedding-based ones once the query has been embedded.
+    """
+    query: str
+    intents: List[str] = field(default_factory=list)
+    size_mm: Optional[str] = None
+    max_price: Optional[float] = None
+    max_delivery_days: Optional[int] = None
+    quantity: Optional[int] = None
+
+    @classmethod
+    def from_query(cls, query: str) -> "QueryPlan":
+        q = query.lower()
+        size = re.search(r"(\d+)\s*mm", q)
+        return cls(query=query, intents=keyword_intents(query), size_mm=size.group(1) if size else None,
+                   max_price=_price_cap(q), max_delivery_days=_delivery_deadline(q), quantity=_quantity(q))
+
+    @property
+    def ambiguous(self) -> bool:
+        """More than one competing priority, so the trade-off needs judgement."""
+        return len(self.intents) > 1
+
+
+@dataclass
+class RouteDecision:
+    tier: str
+    model: Optional[str]
+    reason: str
+    candidates: int
+    margin: Optional[float] = None
+
+    @property
+    def skip_llm(self) -> bool:
+        return self.tier == SKIP
+
+
+def _price_margin(best: Dict, runner_up: Dict) -> Optional[float]:
+    """Relative unit-price gap of the runner-up over the winner (None when a price is missing)."""
+    a, b = best.get("unit_price"), runner_up.get("unit_price")
+    if not isinstance(a, (int, float)) or not isinstance(b, (int, float)) or max(a, b) <= 0:
+        return None
+    return (b - a) / max(a, b)
+
+
+def _dominates(best: Dict, runner_up: Dict) -> bool:
+    """Better on risk, price and delivery at once, and strictly better on at least one."""
+    a, b = priority_key(best)[:3], priority_key(runner_up)[:3]
+    if any(math.isinf(v) for v in a):
+        return False
+    return all(x <= y for x, y in zip(a, b)) and a != b
+
+
+class ModelRouter:
+    def __init__(self, simple_model: str = config.ROUTER_SIMPLE_MODEL,
+                 complex_model: str = config.ROUTER_COMPLEX_MODEL,
+                 close_margin: float = config.ROUTER_CLOSE_MARGIN,
+                 enabled: bool = config.ROUTER_ENABLED):
+        self.simple_model = simple_model
+        self.complex_model = complex_model
+        self.close_margin = close_margin
+        self.enabled = enabled
+
+    def route(self, plan: QueryPlan, offers: List[Dict]) -> RouteDecision:
+        """Picks the evaluation tier for `offers` (already size/risk filtered)."""
+        decision = self._decide(plan, offers)
+        logger.info(
+            "Routing decision: tier=%s model=%s candidates=%d intents=%s margin=%s reason=%s",
+            decision.tier, decision.model or "-", decision.candidates, ",".join(plan.intents) or "-",
+            "-" if decision.margin is None else round(decision.margin, 3), decision.reason,
+            extra={"route": decision.tier, "model": decision.model, "candidates": decision.candidates}
+        )
+        return decision
+
+    def _decide(self, plan: QueryPlan, offers: List[Dict]) -> RouteDecision:
+        n = len(offers)
+        if not self.enabled:
+            return RouteDecision(COMPLEX, self.complex_model, "routing disabled", n)
+        if n <= 1:
+            return RouteDecision(SKIP, None, "single candidate", n)
+
+        best, runner_up = rank_offers(offers)[:2]
+        margin = _price_margin(best, runner_up)
+        if _dominates(best, runner_up):
+            return RouteDecision(SKIP, None, "winner dominates runner-up", n, margin)
+        if plan.ambiguous:
+            return RouteDecision(COMPLEX, self.complex_model, "competing intents", n, margin)
+
+        if offer_risk(best) == offer_risk(runner_up) and (margin is None or margin < self.close_margin):
+            return RouteDecision(COMPLEX, self.complex_model, "close call", n, margin)
+        return RouteDecision(SIMPLE, self.simple_model, "clear winner", n, margin)
+
+    def summary_model(self, tier: Optional[str]) -> Optional[str]:
+        """Summaries only restate the decision: no LLM after a skip, the small model otherwise."""
+        if self.enabled and tier == SKIP:
+            return None
+        return self.simple_model
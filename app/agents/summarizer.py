@@ -2,18 +2,26 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from app import get_logger
+from app.agents.ranking import risk_level
+from app.agents.routing import ModelRouter
+from app.core.deadline import Deadline, DeadlineExceeded, run_with_deadline
+from app.core.usage_callbacks import UsageCallbackHandler
+from app.core.warmup import open_chat_connection
+from typing import Dict, Optional
+import json
 import time
 
 logger = get_logger(__name__)
 
 class SummarizerAgent:
-    def __init__(self):
+    def __init__(self, router: Optional[ModelRouter] = None):
         """
         SummarizerAgent
         Generates concise, factual summaries of evaluator decisions.
         Aligned with EvaluatorAgent priorities — never re-ranks or re-evaluates offers.
         """
         logger.info("SummarizerAgent initialized.")
+        self.router = router or ModelRouter()
 
         self.prompt = ChatPromptTemplate.from_messages([
             (
@@ -34,17 +42,58 @@ class SummarizerAgent:
             )
         ])
 
-        # Compose LCEL chain
+        # Compose LCEL chain for the router's summary model; other models get their own
+        self.llm = ChatOpenAI(model=self.router.simple_model, temperature=0)
         self.chain = (
             self.prompt
-            | ChatOpenAI(model="gpt-4o-mini", temperature=0)
+            | self.llm
             | StrOutputParser()
         )
+        self._chains = {}
 
-    def summarize(self, query: str, best_offer: str) -> str:
+    def _chain_for(self, model: str):
+        """One chain per routed model; the router's simple model uses `self.chain`."""
+        if model == self.router.simple_model:
+            return self.chain
+        if model not in self._chains:
+            self._chains[model] = self.prompt | ChatOpenAI(model=model, temperature=0) | StrOutputParser()
+        return self._chains[model]
+
+    def open_connections(self) -> int:
+        """Opens the chat model's connection (startup warmup). Returns the count."""
+        open_chat_connection(self.llm)
+        return 1
+
+    @staticmethod
+    def template_summary(offer: Dict, reason: str = "") -> str:
+        """
+        Builds a summary straight from the offer fields, without an LLM.
+        Used when the request budget does not leave room for summarization.
+        """
+        parts = [f"{offer.get('supplier', 'Unknown')} was selected for {offer.get('item', 'the requested item')}"]
+        if offer.get("product_id"):
+            parts[0] += f" (Product ID: {offer['product_id']})"
+        if offer.get("unit_price") is not None:
+            parts.append(f"at ${offer['unit_price']} per unit")
+        if offer.get("min_quantity"):
+            parts.append(f"for orders of {offer['min_quantity']} units or more")
+        if offer.get("delivery_days") is not None:
+            parts.append(f"with delivery in {offer['delivery_days']} days")
+        if offer.get("payment_terms"):
+            parts.append(f"on {offer['payment_terms']} payment terms")
+        summary = " ".join(parts) + f". Supplier risk: {risk_level(offer.get('risk_note'))}."
+        if reason:
+            summary += f" {reason}"
+        return summary
+
+    def summarize(self, query: str, best_offer: str, deadline: Optional[Deadline] = None,
+                  route: Optional[str] = None, reason: str = "") -> str:
         """
         Summarizes evaluator results in natural language.
         Mirrors EvaluatorAgent's strict decision logic — zero hallucination tolerance.
+        `route` is the evaluator's routing tier; after a "skip" the summary is built
+        from the offer fields and `reason` without an LLM.
+        Raises DeadlineExceeded when the LLM cannot finish within the request budget.
         """
         logger.info("Starting summarization process.")
         start_time = time.time()
@@ -58,18 +107,28 @@ class SummarizerAgent:
                     "Therefore, no recommendation can be made from the evaluated offers."
                 )
 
+            model = self.router.summary_model(route)
+            if model is None:
+                logger.info("Routing decision: summarizer tier=skip model=- reason=evaluator skipped LLM")
+                return self.template_summary(json.loads(best_offer), reason)
+
             # Generate concise factual summary
-            summary = self.chain.invoke({
+            logger.info("Routing decision: summarizer tier=%s model=%s", route or "-", model)
+            summary = run_with_deadline(self._chain_for(model).invoke, {
                 "query": query,
                 "best_offer": best_offer
-            })
+            }, config={"callbacks": [UsageCallbackHandler("summarizer")]}, deadline=deadline)
 
             elapsed = time.time() - start_time
-            logger.info(f" Summarization completed in {elapsed:.2f}s.")
-            logger.debug(f" Generated Summary (first 250 chars): {summary[:250]}")
+            logger.info(" Summarization completed in %.2fs.", elapsed)
+            logger.debug(" Generated Summary (first 250 chars): %.250s", summary)
 
             return summary.strip()
 
+        except DeadlineExceeded:
+            logger.warning("Summarizer LLM over budget.")
+            raise
+
         except Exception as e:
-            logger.error(f" Summarization failed: {e}", exc_info=True)
+            logger.error(" Summarization failed: %s", e, exc_info=True)
             return "An error occurred during summarization."
@@ -0,0 +1,4 @@
+"""
+Command-line tools for operating the backend.
+Run them as modules, e.g. `python -m app.cli.snapshot export`.
+"""
@@ -0,0 +1,53 @@
+"""
+Directory ingestion CLI
+    python -m app.cli.ingest_dir DIR [--tenant T] [--manifest PATH] [--workers N] [--dry-run]
+    python -m app.cli.ingest_dir DIR --watch [--interval S]
+
+Extracts and stores only the quotation files that are new or changed since the last run
+(tracked in DIR/.ingest-manifest.json) and withdraws the offers of deleted files.
+"""
+import argparse
+import json
+import sys
+
+from app.agents.extractor import ExtractorAgent
+from app.agents.retriever import RetrieverAgent
+from app.core import config
+from app.core.dir_ingest import DirectorySync, DirectoryWatcher
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.ingest_dir", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Folder with supplier quotation files")
+    parser.add_argument("--tenant", help="Tenant the offers belong to")
+    parser.add_argument("--manifest", help="Manifest path (default: DIR/.ingest-manifest.json)")
+    parser.add_argument("--patterns", default=config.INGEST_DIR_PATTERNS, help="Comma-separated file patterns")
+    parser.add_argument("--workers", type=int, default=config.INGEST_DIR_WORKERS, help="Files extracted concurrently")
+    parser.add_argument("--batch-files", type=int, default=config.INGEST_DIR_BATCH_FILES,
+                        help="Files per batch; the manifest is saved after each one")
+    parser.add_argument("--persist-dir", help="ChromaDB directory (default: the configured CHROMA_MODE store)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    parser.add_argument("--watch", action="store_true", help="Keep running and re-sync every --interval seconds")
+    parser.add_argument("--interval", type=int, default=config.INGEST_WATCH_INTERVAL_S)
+    args = parser.parse_args(argv)
+
+    sync = DirectorySync(
+        args.directory, ExtractorAgent(), RetrieverAgent(persist_dir=args.persist_dir),
+        manifest_path=args.manifest, tenant=args.tenant, patterns=args.patterns,
+        workers=args.workers, batch_files=args.batch_files
+    )
+    if args.watch:
+        try:
+            DirectoryWatcher(sync, interval_s=args.interval).run()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    report = sync.sync(dry_run=args.dry_run)
+    print(json.dumps(report.as_dict(), indent=2))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Snapshot CLI
+    python -m app.cli.snapshot export [--out DIR]
+    python -m app.cli.snapshot import DIR [--batch-size N] [--no-verify]
+
+Works directly on the vector store (persistent or HTTP, per CHROMA_MODE) and makes no OpenAI calls.
+"""
+import argparse
+import sys
+
+from chromadb import PersistentClient
+
+from app.core import config
+from app.core.snapshot import SnapshotError, export_snapshot, import_snapshot, snapshot_path
+from app.core.vectorstore import get_chroma_client
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.snapshot", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persist-dir", help="ChromaDB directory (default: the configured CHROMA_MODE store)")
+    parser.add_argument("--collection", default=config.CHROMA_COLLECTION, help="Base collection name")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = sub.add_parser("export", help="Write the store to a snapshot directory")
+    export_cmd.add_argument("--out", help="Snapshot directory (default: a timestamped folder in SNAPSHOT_DIR)")
+
+    import_cmd = sub.add_parser("import", help="Bulk-load a snapshot directory into the store")
+    import_cmd.add_argument("path", help="Snapshot directory")
+    import_cmd.add_argument("--batch-size", type=int, default=config.SNAPSHOT_BATCH_SIZE)
+    import_cmd.add_argument("--no-verify", action="store_true", help="Skip checksum verification")
+
+    args = parser.parse_args(argv)
+    client = PersistentClient(path=args.persist_dir) if args.persist_dir else get_chroma_client()
+
+    try:
+        if args.command == "export":
+            out = args.out or snapshot_path(config.SNAPSHOT_DIR)
+            manifest = export_snapshot(client, out, args.collection)
+            for entry in manifest["collections"]:
+                print(f"{entry['name']}: {entry['count']} offers")
+            print(f"Snapshot written to {out}")
+        else:
+            loaded = import_snapshot(client, args.path, batch_size=args.batch_size, verify=not args.no_verify)
+            for name, count in loaded.items():
+                print(f"{name}: {count} offers")
+    except SnapshotError as e:
+        print(f"Snapshot error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
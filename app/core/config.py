@@ -0,0 +1,148 @@
+"""
+Runtime configuration for the backend.
+Every setting is read from environment variables (a `.env` file is honoured)
+so deployments can be tuned without code changes.
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+# ----------- Vector Store -----------
+# "persistent" opens ./chroma_db in-process; "http" talks to a shared Chroma server
+CHROMA_MODE = os.getenv("CHROMA_MODE", "persistent").lower()
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
+CHROMA_PORT = _env_int("CHROMA_PORT", 8000)
+CHROMA_SSL = os.getenv("CHROMA_SSL", "false").lower() == "true"
+# Attempts (with exponential backoff) to reach the server when CHROMA_MODE=http
+CHROMA_CONNECT_RETRIES = _env_int("CHROMA_CONNECT_RETRIES", 5)
+CHROMA_COLLECTION = os.getenv("CHROMA_COLLECTION", "supplier_offers")
+
+# Shard layout: "none" (single collection), "category", "tenant" or "category,tenant"
+# (sharded layouts still search the unsharded collection, so switching keeps old offers reachable)
+CHROMA_SHARD_BY = os.getenv("CHROMA_SHARD_BY", "none")
+# Max shards searched concurrently when a query spans several
+SHARD_SEARCH_WORKERS = _env_int("SHARD_SEARCH_WORKERS", 4)
+
+# HNSW index settings for new collections. Space, M and construction ef are fixed when a
+# collection is built (compaction rebuilds with the current values); search ef applies at once.
+CHROMA_HNSW_SPACE = os.getenv("CHROMA_HNSW_SPACE", "l2")
+CHROMA_HNSW_M = _env_int("CHROMA_HNSW_M", 16)
+CHROMA_HNSW_CONSTRUCTION_EF = _env_int("CHROMA_HNSW_CONSTRUCTION_EF", 100)
+CHROMA_HNSW_SEARCH_EF = _env_int("CHROMA_HNSW_SEARCH_EF", 100)
+
+# ----------- Snapshots -----------
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "./snapshots")
+SNAPSHOT_BATCH_SIZE = _env_int("SNAPSHOT_BATCH_SIZE", 5000)
+
+# ----------- Admin API -----------
+# Every /admin request must send it in the X-Admin-Token header (unset: admin API disabled)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# ----------- Ingestion -----------
+# Offers per embedding/upsert micro-batch while extraction is still streaming
+INGEST_BATCH_SIZE = _env_int("INGEST_BATCH_SIZE", 4)
+# Directory sync (python -m app.cli.ingest_dir): files picked up, files extracted concurrently,
+# files per batch (the manifest is saved after each batch) and the polling interval in --watch mode
+INGEST_DIR_PATTERNS = os.getenv("INGEST_DIR_PATTERNS", "*.txt,*.md")
+INGEST_DIR_WORKERS = _env_int("INGEST_DIR_WORKERS", 4)
+INGEST_DIR_BATCH_FILES = _env_int("INGEST_DIR_BATCH_FILES", 50)
+INGEST_WATCH_INTERVAL_S = _env_int("INGEST_WATCH_INTERVAL_S", 60)
+# Packed extraction: short quotations are sent to the extractor together, up to this many
+# per request and this many characters in total; a longer quotation is extracted on its own
+EXTRACT_BATCH_MAX_DOCS = _env_int("EXTRACT_BATCH_MAX_DOCS", 8)
+EXTRACT_BATCH_MAX_CHARS = _env_int("EXTRACT_BATCH_MAX_CHARS", 12000)
+
+# ----------- Latency Budget -----------
+# Default end-to-end budget for /evaluate-offers when the request sets no deadline_ms
+QUERY_DEADLINE_MS = _env_int("QUERY_DEADLINE_MS", 15000)
+# Below this remaining budget an LLM stage is skipped in favour of its local fallback
+MIN_LLM_BUDGET_MS = _env_int("MIN_LLM_BUDGET_MS", 500)
+# Threads available for deadline-bounded LLM calls
+LLM_CALL_WORKERS = _env_int("LLM_CALL_WORKERS", 16)
+
+# ----------- Usage Accounting -----------
+# Window for the rolling totals reported by /admin/usage
+USAGE_WINDOW_S = _env_int("USAGE_WINDOW_S", 3600)
+
+# ----------- Profiling -----------
+# Allow a single request to be profiled by sending "X-Profile: 1"
+PROFILING_ALLOW_HEADER = os.getenv("PROFILING_ALLOW_HEADER", "false").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+# Interval between stack samples of a profiled request
+PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "2"))
+
+# ----------- Near-Duplicate Detection -----------
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+# Estimated Jaccard similarity of raw_text shingles above which two offers are the same
+DEDUP_SIMILARITY = float(os.getenv("DEDUP_SIMILARITY", "0.8"))
+
+# ----------- Offer Validity -----------
+# Validity assumed for offers whose quotation states no expiry (0 = valid until superseded)
+OFFER_DEFAULT_VALIDITY_DAYS = _env_int("OFFER_DEFAULT_VALIDITY_DAYS", 0)
+# Background sweeper that archives expired offers out of the live index
+OFFER_SWEEPER_ENABLED = os.getenv("OFFER_SWEEPER_ENABLED", "true").lower() == "true"
+OFFER_SWEEP_INTERVAL_S = _env_int("OFFER_SWEEP_INTERVAL_S", 3600)
+
+# ----------- Store Compaction -----------
+# Background rebuild of every offer collection plus SQLite VACUUM (persistent mode).
+# Off by default: enable it in exactly one process (a single-worker deployment or one
+# dedicated maintenance process), or run POST /admin/maintenance/compact instead.
+STORE_COMPACTION_ENABLED = os.getenv("STORE_COMPACTION_ENABLED", "false").lower() == "true"
+STORE_COMPACT_INTERVAL_S = _env_int("STORE_COMPACT_INTERVAL_S", 86400)
+
+# ----------- Model Routing -----------
+# Pick the evaluator/summarizer model per query instead of always using the default model
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+ROUTER_SIMPLE_MODEL = os.getenv("ROUTER_SIMPLE_MODEL", "gpt-4o-mini")
+ROUTER_COMPLEX_MODEL = os.getenv("ROUTER_COMPLEX_MODEL", "gpt-4o")
+# Relative unit-price gap between the two best same-risk offers below which the call is "close"
+ROUTER_CLOSE_MARGIN = float(os.getenv("ROUTER_CLOSE_MARGIN", "0.05"))
+
+# ----------- Evaluation Memo -----------
+# Reuse an evaluator result when the constraints, candidate offers (ids + versions), prompt and model match
+EVAL_MEMO_ENABLED = os.getenv("EVAL_MEMO_ENABLED", "true").lower() == "true"
+EVAL_MEMO_MAX_ENTRIES = _env_int("EVAL_MEMO_MAX_ENTRIES", 2048)
+EVAL_MEMO_TTL_S = _env_int("EVAL_MEMO_TTL_S", 3600)
+
+# ----------- Intent Detection -----------
+# Collection holding the intent prototype embeddings (rebuilt when the prototypes or model change)
+INTENT_COLLECTION = os.getenv("INTENT_COLLECTION", "intent_prototypes")
+# Cosine similarity between the query and an intent's closest prototype needed to detect it
+INTENT_SIMILARITY_THRESHOLD = float(os.getenv("INTENT_SIMILARITY_THRESHOLD", "0.5"))
+
+# ----------- Retrieval Reranking -----------
+# Nearest neighbours fetched per shard before local reranking (at least 2*k)
+RETRIEVAL_POOL_SIZE = _env_int("RETRIEVAL_POOL_SIZE", 200)
+# Share of the rerank score given to vector similarity; the rest goes to the query's constraints
+RERANK_SIMILARITY_WEIGHT = float(os.getenv("RERANK_SIMILARITY_WEIGHT", "0.4"))
+
+# ----------- Warmup & Readiness -----------
+# Startup warmup behind /ready: open the store, load the index, build the agents and
+# embed the most frequent queries of the previous run (saved on shutdown)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_QUERIES = _env_int("WARMUP_QUERIES", 20)
+# Retries of a failing required warmup step, with exponential backoff from WARMUP_BACKOFF_S
+WARMUP_RETRIES = _env_int("WARMUP_RETRIES", 5)
+WARMUP_BACKOFF_S = float(os.getenv("WARMUP_BACKOFF_S", "1.0"))
+# Node-local state kept across restarts; not inside the store, which is remote in http mode (mount it as a volume)
+STATE_DIR = os.getenv("STATE_DIR", "./state")
+RECENT_QUERIES_FILE = os.getenv("RECENT_QUERIES_FILE", os.path.join(STATE_DIR, "recent_queries.json"))
+# Query embeddings kept in memory by RetrieverAgent
+EMBED_CACHE_MAX_ENTRIES = _env_int("EMBED_CACHE_MAX_ENTRIES", 4096)
+
+# ----------- Logging -----------
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" (one object per line) or "text"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Records waiting for the writer thread; further records are dropped (and counted) instead of blocking
+LOG_QUEUE_SIZE = _env_int("LOG_QUEUE_SIZE", 10000)
+# Fraction of DEBUG records kept when LOG_LEVEL=DEBUG (INFO and above are never sampled)
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
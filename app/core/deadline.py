@@ -0,0 +1,62 @@
+"""
+Per-request latency budgets.
+A Deadline is created once per request and handed to every stage, so each
+stage knows how much time is left and can switch to a cheaper path in time.
+"""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Optional, TypeVar
+
+from app.core import config
+from app.core.profiling import follow
+
+T = TypeVar("T")
+
+_executor = ThreadPoolExecutor(max_workers=config.LLM_CALL_WORKERS, thread_name_prefix="llm-call")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage cannot finish within the remaining request budget."""
+
+
+class Deadline:
+    def __init__(self, budget_ms: Optional[int] = None):
+        self.budget_ms = budget_ms if budget_ms is not None else config.QUERY_DEADLINE_MS
+        self.started = time.monotonic()
+        self.expires_at = self.started + self.budget_ms / 1000
+
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def allows_llm(self) -> bool:
+        """Whether enough budget is left to attempt an LLM call at all."""
+        return self.remaining() * 1000 >= config.MIN_LLM_BUDGET_MS
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def run_with_deadline(fn: Callable[..., T], *args, deadline: Optional[Deadline] = None,
+                      min_budget_ms: Optional[int] = None, **kwargs) -> T:
+    """
+    Runs `fn` and waits at most the remaining budget for it.
+    Without a deadline the call runs inline. The call is not started with less than
+    `min_budget_ms` left (default MIN_LLM_BUDGET_MS). On timeout the call is abandoned
+    (it finishes in the background) and DeadlineExceeded is raised.
+    """
+    if deadline is None:
+        return fn(*args, **kwargs)
+    min_budget_ms = config.MIN_LLM_BUDGET_MS if min_budget_ms is None else min_budget_ms
+    if deadline.expired or deadline.remaining() * 1000 < min_budget_ms:
+        raise DeadlineExceeded("Not enough budget left to start the call.")
+
+    ctx = contextvars.copy_context()
+    future = _executor.submit(ctx.run, follow(fn), *args, **kwargs)
+    try:
+        return future.result(timeout=deadline.remaining())
+    except FutureTimeout:
+        future.cancel()
+        raise DeadlineExceeded(f"Call did not finish within the {deadline.budget_ms}ms budget.")
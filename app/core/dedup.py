@@ -0,0 +1,116 @@
+"""
+Near-duplicate detection for supplier offers.
+Each offer's raw_text is reduced to a MinHash signature over word 3-grams, and the
+signature is split into LSH bands. The band hashes are stored as offer metadata
+(lsh_0 ... lsh_15), so finding candidate duplicates is a single `where` lookup in
+the vector store instead of a scan.
+"""
+import hashlib
+import re
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+_PRIME = np.uint64(4294967311)  # Smallest prime above 2**32
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, 2**32 - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**32 - 1, size=NUM_PERM, dtype=np.uint64)
+
+LSH_FIELDS = [f"lsh_{i}" for i in range(BANDS)]
+
+
+def _normalize(value: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]+", "", (value or "").lower())
+
+
+def shingles(text: str) -> Set[str]:
+    tokens = re.findall(r"[a-z0-9$.%]+", (text or "").lower())
+    if len(tokens) <= SHINGLE_SIZE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of the text's word shingles."""
+    grams = shingles(text)
+    if not grams:
+        return np.zeros(NUM_PERM, dtype=np.uint64)
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), "little") for g in grams),
+        dtype=np.uint64, count=len(grams)
+    )
+    # (a * x + b) mod p for every permutation and shingle at once; fits in uint64 since a, x < 2**32
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return permuted.min(axis=1)
+
+
+def band_hashes(signature: np.ndarray) -> List[str]:
+    return [
+        hashlib.md5(signature[i * ROWS:(i + 1) * ROWS].tobytes()).hexdigest()[:16]
+        for i in range(BANDS)
+    ]
+
+
+def encode_signature(signature: np.ndarray) -> str:
+    return signature.astype(np.uint32).tobytes().hex()
+
+
+def decode_signature(value: str) -> np.ndarray:
+    return np.frombuffer(bytes.fromhex(value), dtype=np.uint32).astype(np.uint64)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def dedup_key(supplier: Optional[str], product_id: Optional[str]) -> Optional[str]:
+    """Exact identity of an offer: normalized (supplier, product_id), when a product ID exists."""
+    if not product_id:
+        return None
+    return f"{_normalize(supplier)}|{_normalize(product_id)}"
+
+
+def same_supplier(a: Optional[str], b: Optional[str]) -> bool:
+    """'QuickFix' and 'QuickFix Industries' are the same supplier."""
+    a, b = _normalize(a), _normalize(b)
+    return bool(a and b) and (a.startswith(b) or b.startswith(a))
+
+
+def fingerprint(supplier: Optional[str], product_id: Optional[str], raw_text: str) -> Dict:
+    """Metadata fields stored with an offer for later duplicate lookups."""
+    signature = minhash(raw_text)
+    fields = dict(zip(LSH_FIELDS, band_hashes(signature)))
+    fields["minhash"] = encode_signature(signature)
+    key = dedup_key(supplier, product_id)
+    if key:
+        fields["dedup_key"] = key
+    return fields
+
+
+def candidate_filter(fingerprints: List[Dict]) -> Dict:
+    """Chroma `where` clause matching any stored offer that shares a key or an LSH band."""
+    clauses = []
+    for fp in fingerprints:
+        if "dedup_key" in fp:
+            clauses.append({"dedup_key": fp["dedup_key"]})
+        for field in LSH_FIELDS:
+            clauses.append({field: fp[field]})
+    # Collapse repeated clauses; Chroma requires at least two entries in an $or
+    unique = list({next(iter(c.items())): c for c in clauses}.values())
+    return unique[0] if len(unique) == 1 else {"$or": unique}
+
+
+def is_duplicate(fp: Dict, supplier: Optional[str], other_fp: Dict, other_supplier: Optional[str],
+                 threshold: float) -> bool:
+    """Same (supplier, product_id), or near-identical raw_text from the same supplier."""
+    if fp.get("dedup_key") and fp.get("dedup_key") == other_fp.get("dedup_key"):
+        return True
+    if not same_supplier(supplier, other_supplier) or "minhash" not in other_fp:
+        return False
+    return similarity(decode_signature(fp["minhash"]), decode_signature(other_fp["minhash"])) >= threshold
@@ -0,0 +1,230 @@
+"""
+Incremental ingestion of a directory of quotation files.
+A manifest (by default `<dir>/.ingest-manifest.json`) records every ingested file's
+size, mtime, SHA-256 and the offer ids it produced, so each sync only pays for the delta:
+
+    unchanged file      - skipped without being read (same size and mtime)
+    touched file        - re-hashed; same content, so only the manifest is updated
+    new / changed file  - extracted and stored; offers it no longer yields are withdrawn
+    deleted file        - its offers are withdrawn into the archive
+
+Files are extracted `workers` at a time (short ones packed into shared requests when the
+extractor supports it), and the manifest is saved after every batch of `batch_files`,
+so an interrupted sync resumes where it stopped.
+"""
+import contextvars
+import fnmatch
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core import config
+from app.core.logger import get_logger
+from app.core.maintenance import PeriodicTask
+
+logger = get_logger(__name__)
+
+MANIFEST_FILE = ".ingest-manifest.json"
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class SyncReport:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+    offers_stored: int = 0
+    offers_withdrawn: int = 0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def load_manifest(path: str) -> Dict[str, Dict]:
+    """{relative path: entry}; empty when the manifest does not exist yet."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported ingest manifest version: {manifest.get('version')}")
+    return manifest["files"]
+
+
+def save_manifest(path: str, files: Dict[str, Dict]):
+    """Writes atomically, so a crash never leaves a truncated manifest."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def scan_directory(directory: str, patterns: List[str]) -> Dict[str, os.stat_result]:
+    """Files under `directory` matching any pattern, skipping hidden files and folders."""
+    found = {}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.startswith(".") or not any(fnmatch.fnmatch(name, p) for p in patterns):
+                continue
+            path = os.path.join(root, name)
+            found[os.path.relpath(path, directory).replace(os.sep, "/")] = os.stat(path)
+    return found
+
+
+class DirectorySync:
+    def __init__(self, directory: str, extractor, retriever, manifest_path: Optional[str] = None,
+                 tenant: Optional[str] = None, patterns: str = config.INGEST_DIR_PATTERNS,
+                 workers: int = config.INGEST_DIR_WORKERS, batch_files: int = config.INGEST_DIR_BATCH_FILES):
+        self.directory = directory
+        self.extractor = extractor
+        self.retriever = retriever
+        self.manifest_path = manifest_path or os.path.join(directory, MANIFEST_FILE)
+        self.tenant = tenant
+        self.patterns = [p.strip() for p in patterns.split(",") if p.strip()]
+        self.workers = max(1, workers)
+        self.batch_files = max(1, batch_files)
+
+    def _read_file(self, rel_path: str, stat: os.stat_result, previous: Optional[Dict]) -> Tuple[Dict, Optional[str]]:
+        """Manifest entry for one new or modified file, and its text if the content changed (None otherwise)."""
+        with open(os.path.join(self.directory, rel_path), "rb") as f:
+            data = f.read()
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": hashlib.sha256(data).hexdigest()}
+        if previous and previous["sha256"] == entry["sha256"]:
+            return dict(entry, ids=previous["ids"], ingested_at=previous["ingested_at"]), None
+        return entry, data.decode("utf-8", errors="replace")
+
+    def _extract(self, texts: List[str], pool: ThreadPoolExecutor) -> List:
+        """
+        Offers (or the exception raised) per text. Extractors with extract_batch pack
+        short quotations into shared requests; others get one request per file.
+        """
+        if hasattr(self.extractor, "extract_batch"):
+            return self.extractor.extract_batch(texts, workers=self.workers, return_exceptions=True)
+        futures = [pool.submit(contextvars.copy_context().run, self.extractor.extract_offers, text) for text in texts]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _store(self, rel_path: str, entry: Dict, offers) -> Dict:
+        ids = self.retriever.add_offers(offers, tenant=self.tenant) if offers else []
+        if not offers:
+            logger.warning("No offers extracted from %s.", rel_path)
+        return dict(entry, ids=ids, ingested_at=time.time())
+
+    def _ingest_batch(self, batch: List[str], current: Dict[str, os.stat_result], files: Dict[str, Dict],
+                      pool: ThreadPoolExecutor) -> Dict:
+        """{relative path: manifest entry or the exception that failed it} for one batch of files."""
+        results = {}
+        texts = {}
+        reads = {rel_path: pool.submit(contextvars.copy_context().run, self._read_file,
+                                   rel_path, current[rel_path], files.get(rel_path))
+                 for rel_path in batch}
+        for rel_path, future in reads.items():
+            try:
+                results[rel_path], texts[rel_path] = future.result()
+            except Exception as e:
+                results[rel_path] = e
+
+        to_extract = [rel_path for rel_path in batch if texts.get(rel_path) is not None]
+        extracted = self._extract([texts[rel_path] for rel_path in to_extract], pool)
+        stores = {}
+        for rel_path, offers in zip(to_extract, extracted):
+            if isinstance(offers, Exception):
+                results[rel_path] = offers
+            else:
+                stores[rel_path] = pool.submit(contextvars.copy_context().run, self._store,
+                                               rel_path, results[rel_path], offers)
+        for rel_path, future in stores.items():
+            try:
+                results[rel_path] = future.result()
+            except Exception as e:
+                results[rel_path] = e
+        return results
+
+    def _withdraw(self, ids: Set[str], files: Dict[str, Dict]) -> int:
+        """Withdraws offers no manifest entry refers to any more (near-duplicates can be shared)."""
+        still_used = {id_ for entry in files.values() for id_ in entry["ids"]}
+        stale = sorted(ids - still_used)
+        return self.retriever.withdraw_offers(stale, reason="source file changed or removed") if stale else 0
+
+    def sync(self, dry_run: bool = False) -> SyncReport:
+        """One pass over the directory. With `dry_run`, only reports what would change."""
+        start_time = time.time()
+        files = load_manifest(self.manifest_path)
+        current = scan_directory(self.directory, self.patterns)
+        report = SyncReport()
+
+        pending = []
+        for rel_path, stat in sorted(current.items()):
+            entry = files.get(rel_path)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                report.unchanged += 1
+            else:
+                pending.append(rel_path)
+        removed = sorted(set(files) - set(current))
+
+        if dry_run:
+            report.added = [p for p in pending if p not in files]
+            report.changed = [p for p in pending if p in files]
+            report.removed = removed
+            return report
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dir-ingest") as pool:
+            for start in range(0, len(pending), self.batch_files):
+                batch = pending[start:start + self.batch_files]
+                replaced: Set[str] = set()
+                for rel_path, entry in self._ingest_batch(batch, current, files, pool).items():
+                    if isinstance(entry, Exception):
+                        logger.error("Failed to ingest %s: %s", rel_path, entry, exc_info=entry)
+                        report.failed[rel_path] = str(entry)
+                        continue
+                    previous = files.get(rel_path)
+                    if previous is None:
+                        report.added.append(rel_path)
+                    elif previous["sha256"] == entry["sha256"]:
+                        report.unchanged += 1
+                    else:
+                        report.changed.append(rel_path)
+                        replaced.update(previous["ids"])
+                    if previous is None or previous["sha256"] != entry["sha256"]:
+                        report.offers_stored += len(entry["ids"])
+                    files[rel_path] = entry
+                report.offers_withdrawn += self._withdraw(replaced, files)
+                save_manifest(self.manifest_path, files)
+
+        # Removals last, so a renamed file's offers are matched by the new copy before the old one goes
+        if removed:
+            gone = {id_ for rel_path in removed for id_ in files.pop(rel_path)["ids"]}
+            report.removed = removed
+            report.offers_withdrawn += self._withdraw(gone, files)
+            save_manifest(self.manifest_path, files)
+
+        logger.info(
+            "Directory sync of %s: %d added, %d changed, %d removed, %d unchanged, %d failed "
+            "(%d offers stored, %d withdrawn) in %.2fs.",
+            self.directory, len(report.added), len(report.changed), len(report.removed), report.unchanged,
+            len(report.failed), report.offers_stored, report.offers_withdrawn, time.time() - start_time
+        )
+        return report
+
+
+class DirectoryWatcher(PeriodicTask):
+    """Re-syncs a directory every `interval_s` seconds."""
+
+    def __init__(self, sync: DirectorySync, interval_s: int = config.INGEST_WATCH_INTERVAL_S):
+        super().__init__("dir-watcher", interval_s)
+        self.directory_sync = sync
+
+    def tick(self):
+        self.directory_sync.sync()
@@ -0,0 +1,58 @@
+"""
+Pipelined ingestion.
+Embeds and upserts offers in micro-batches while the extractor is still streaming,
+so embedding and storage overlap with LLM generation instead of waiting for it.
+"""
+import contextvars
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+from app.core import config
+from app.core.logger import get_logger
+from app.core.profiling import follow
+from app.models.models import Offer
+
+logger = get_logger(__name__)
+
+
+def ingest_stream(
+    offers: Iterable[Offer],
+    retriever,
+    batch_size: int = config.INGEST_BATCH_SIZE,
+    tenant: Optional[str] = None,
+) -> int:
+    """
+    Consumes an offer stream and stores it through `retriever.add_offers` in micro-batches.
+    One batch is written in the background while the next one is collected.
+    Batches written before a failure stay in the store. Returns the number of offers stored,
+    as reported by `add_offers` (near-duplicates collapsed within a batch count once).
+    """
+    start_time = time.time()
+    stored = 0
+    pending: Optional[Future] = None
+    batch: List[Offer] = []
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest") as writer:
+        def flush():
+            nonlocal pending, stored, batch
+            if pending is not None:
+                # Keep a single batch in flight and surface write errors
+                stored += len(pending.result())
+                pending = None
+            if batch:
+                # Carry the request context (usage accounting) into the writer thread
+                ctx = contextvars.copy_context()
+                pending = writer.submit(ctx.run, follow(retriever.add_offers), batch, tenant=tenant)
+                batch = []
+
+        for offer in offers:
+            batch.append(offer)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        if pending is not None:
+            stored += len(pending.result())
+
+    logger.info("Ingested %d offers in %.2fs (micro-batch size %d).", stored, time.time() - start_time, batch_size)
+    return stored
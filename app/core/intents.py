@@ -0,0 +1,157 @@
+"""
+Query intent detection.
+Each intent (price, delivery, risk, bulk, payment) is described by a few prototype
+phrases. Their embeddings are stored once in the `intent_prototypes` collection and
+held in memory as one normalized matrix, so scoring a query is a single dot product
+against the query embedding that retrieval computes anyway: no extra network call.
+The keyword lists stay as a cheap floor (and as the fallback when no embedding is available).
+"""
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core import config
+from app.core.locks import file_lock
+from app.core.logger import get_logger
+from app.core.risk import RISK_INTENT_KEYWORDS
+from app.core.vectorstore import open_collection
+
+logger = get_logger(__name__)
+
+INTENTS = ("price", "delivery", "risk", "bulk", "payment")
+
+INTENT_KEYWORDS = {
+    "price": ["price", "cheap", "cheapest", "cost", "under", "budget"],
+    "delivery": ["delivery", "fast", "quick", "urgent", "asap"],
+    "risk": RISK_INTENT_KEYWORDS,
+    "bulk": ["bulk", "large order", "quantity"],
+    "payment": ["payment", "credit", "terms"],
+}
+
+INTENT_PROTOTYPES = {
+    "price": [
+        "lowest price", "cheapest offer", "least expensive supplier",
+        "stay within budget", "best value for money", "lowest unit cost",
+    ],
+    "delivery": [
+        "fastest delivery", "shipped as soon as possible", "need it urgently",
+        "shortest lead time", "arrives quickly", "delivered this week",
+    ],
+    "risk": [
+        "most reliable supplier", "lowest supplier risk", "trusted vendor with a good track record",
+        "consistent quality", "dependable on-time delivery record", "avoid risky suppliers",
+    ],
+    "bulk": [
+        "large volume order", "buying in bulk", "high quantity purchase",
+        "thousands of units", "wholesale quantities", "low minimum order quantity",
+    ],
+    "payment": [
+        "favourable payment terms", "net 60 payment", "longer credit period",
+        "pay later", "flexible invoicing terms", "deferred payment",
+    ],
+}
+
+
+def keyword_intents(query: str) -> List[str]:
+    """Intents named literally in the query, in INTENTS order."""
+    q = query.lower()
+    return [intent for intent in INTENTS if any(w in q for w in INTENT_KEYWORDS[intent])]
+
+
+def _prototype_key(embedder) -> str:
+    """Changes whenever the prototypes or the embedding model change, forcing a re-embed."""
+    model = getattr(embedder, "model", None) or type(embedder).__name__
+    payload = json.dumps({"model": model, "prototypes": INTENT_PROTOTYPES}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class IntentIndex:
+    """Prototype embeddings for every intent, persisted in the vector store and scored in memory."""
+
+    def __init__(self, client, collection_name: str = config.INTENT_COLLECTION,
+                 threshold: float = config.INTENT_SIMILARITY_THRESHOLD):
+        self.client = client
+        self.collection_name = collection_name
+        self.threshold = threshold
+        self._matrix: Optional[np.ndarray] = None  # [prototypes, dim], rows L2-normalized
+        self._starts: Optional[np.ndarray] = None  # First row of each intent (rows are grouped by intent)
+        self._key: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _build(self, embedder, key: str) -> np.ndarray:
+        """Embeds all prototypes in one call and replaces the stored collection."""
+        phrases = [p for intent in INTENTS for p in INTENT_PROTOTYPES[intent]]
+        embeddings = embedder.embed_documents(phrases)
+        try:
+            self.client.delete_collection(self.collection_name)
+        except Exception:
+            pass  # Did not exist yet
+        collection = open_collection(self.client, self.collection_name, metadata={"prototype_key": key})
+        collection.add(
+            ids=[f"{intent}:{i}" for intent in INTENTS for i in range(len(INTENT_PROTOTYPES[intent]))],
+            documents=phrases,
+            metadatas=[{"intent": intent} for intent in INTENTS for _ in INTENT_PROTOTYPES[intent]],
+            embeddings=embeddings,
+        )
+        logger.info("Embedded %d intent prototypes into '%s'.", len(phrases), self.collection_name)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def _stored(self, key: str) -> Optional[np.ndarray]:
+        """The persisted prototype matrix, or None when missing or built for other prototypes/model."""
+        try:
+            collection = self.client.get_collection(self.collection_name)
+        except Exception:
+            return None
+        if (collection.metadata or {}).get("prototype_key") != key:
+            return None
+        ids = [f"{intent}:{i}" for intent in INTENTS for i in range(len(INTENT_PROTOTYPES[intent]))]
+        stored = collection.get(ids=ids, include=["embeddings"])
+        if len(stored["ids"]) != len(ids):
+            return None
+        by_id = dict(zip(stored["ids"], stored["embeddings"]))
+        return np.asarray([by_id[i] for i in ids], dtype=np.float32)
+
+    def load(self, embedder) -> np.ndarray:
+        """Loads (building on first use) the prototype matrix for `embedder`."""
+        key = _prototype_key(embedder)
+        if self._key == key:
+            return self._matrix
+        with self._lock:
+            if self._key != key:
+                matrix = self._stored(key)
+                if matrix is None:
+                    # One worker rebuilds; the others wait and read what it stored
+                    with file_lock(self.collection_name):
+                        matrix = self._stored(key)
+                        if matrix is None:
+                            matrix = self._build(embedder, key)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._matrix = matrix / np.where(norms == 0, 1.0, norms)
+                counts = [len(INTENT_PROTOTYPES[intent]) for intent in INTENTS]
+                self._starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                self._key = key
+        return self._matrix
+
+    def scores(self, query_embedding: List[float], embedder) -> Dict[str, float]:
+        """Best cosine similarity between the query and each intent's prototypes."""
+        matrix = self.load(embedder)
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        best = np.maximum.reduceat(matrix @ q, self._starts)
+        return {intent: float(score) for intent, score in zip(INTENTS, best)}
+
+    def detect(self, query: str, query_embedding: Optional[List[float]], embedder) -> List[str]:
+        """
+        Intents whose prototypes are within `threshold` of the query, plus any named by keyword.
+        Returns ['general'] when nothing matches.
+        """
+        found = set(keyword_intents(query))
+        if query_embedding is not None:
+            try:
+                found.update(i for i, s in self.scores(query_embedding, embedder).items() if s >= self.threshold)
+            except Exception as e:
+                logger.warning("Embedding intent detection unavailable, using keywords only: %s", e)
+        return [intent for intent in INTENTS if intent in found] or ["general"]
@@ -0,0 +1,63 @@
+"""
+Incremental JSON parsing for streamed LLM output.
+"""
+import json
+from typing import Dict, List
+
+
+class JSONArrayStreamParser:
+    """
+    Yields every object of the first JSON array in a document as soon as its closing brace arrives.
+    Anything before the array (e.g. `{"offers": ` or a stray markdown fence) is skipped.
+    Usage:
+        parser = JSONArrayStreamParser()
+        for chunk in stream:
+            for obj in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self):
+        self.started = False   # Opening '[' seen
+        self.finished = False  # Closing ']' seen
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consumes the next chunk of text and returns the objects it completed."""
+        completed = []
+        for ch in chunk:
+            if self.finished:
+                break
+            if not self.started:
+                self.started = ch == "["
+                continue
+
+            if self._depth == 0:
+                # Between array elements: only an object start or the array end matter
+                if ch == "{":
+                    self._depth = 1
+                    self._buffer = [ch]
+                elif ch == "]":
+                    self.finished = True
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.append(json.loads("".join(self._buffer)))
+                    self._buffer = []
+        return completed
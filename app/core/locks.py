@@ -0,0 +1,61 @@
+"""
+Coordination between the uvicorn workers of one node.
+Every worker runs the same lifespan, so work that must happen once per node (the offer
+sweeper, store compaction, rebuilding the intent prototypes, merging the recent queries
+file) goes through lock files in STATE_DIR:
+    file_lock(name)  - exclusive section, waits for the worker holding it
+    is_leader()      - True in the one worker that holds the leader lock until it exits
+Without fcntl (Windows) a node runs a single worker, so locks are no-ops and it leads.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from app.core import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_leader_file = None
+_leader_lock = threading.Lock()
+
+
+def _open(name: str):
+    os.makedirs(config.STATE_DIR, exist_ok=True)
+    return open(os.path.join(config.STATE_DIR, f"{name}.lock"), "a+")
+
+
+@contextmanager
+def file_lock(name: str):
+    """Holds the `name` lock for the block; also serializes threads of the same process."""
+    if fcntl is None:
+        yield
+        return
+    with _open(name) as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def is_leader() -> bool:
+    """
+    Takes the leader lock if no other process holds it. The winner keeps it open for its
+    lifetime (the OS drops it when the process dies), so later calls return True again.
+    """
+    global _leader_file
+    if fcntl is None:
+        return True
+    with _leader_lock:
+        if _leader_file is None:
+            handle = _open("leader")
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                return False
+            _leader_file = handle
+        return True
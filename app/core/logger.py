@@ -1,12 +1,134 @@
+"""
+Logging setup.
+Request threads only put records on a queue; one listener thread formats them and
+writes to stdout, so logging never blocks a request on I/O. Output is one JSON object
+per line (LOG_FORMAT=json) or the classic text format, and every record carries the
+id of the request that produced it.
+"""
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
-logging.basicConfig(
-    level=logging.INFO, 
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+import threading
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core import config
+
+# Set per request by the API middleware; copied into worker threads with the context
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(request_id)s | %(message)s"
+
+# Standard LogRecord attributes; anything else on a record came from `extra=`
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamps each record with the current request id. It runs in the thread that emits the
+    record, before the QueueHandler hands it off, which is why the contextvar is visible.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """Keeps a `rate` fraction of DEBUG records; INFO and above always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "thread": record.threadName,
+        }
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RESERVED_ATTRS)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener unformatted, so %-style arguments are only rendered
+    in the listener thread. Records are dropped (and counted) when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # In-process queue: no pickling, so the record does not need to be pre-formatted
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None, force: bool = False):
+    """Installs the queue handler on the root logger (once, unless `force`)."""
+    global _handler, _listener
+    with _setup_lock:
+        if _handler is not None and not force:
+            return
+        root = logging.getLogger()
+        if _listener is not None:
+            _listener.stop()
+            root.removeHandler(_handler)
+
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter() if (fmt or config.LOG_FORMAT) == "json" else logging.Formatter(TEXT_FORMAT))
+
+        _handler = NonBlockingQueueHandler(queue.Queue(config.LOG_QUEUE_SIZE))
+        _handler.addFilter(RequestContextFilter())
+        _handler.addFilter(DebugSampler(config.LOG_DEBUG_SAMPLE_RATE))
+        root.addHandler(_handler)
+        root.setLevel(level or config.LOG_LEVEL)
+
+        _listener = QueueListener(_handler.queue, stream)
+        _listener.start()
+
+
+def flush_logging():
+    """Waits until every queued record has been written (used at shutdown)."""
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+def dropped_records() -> int:
+    return _handler.dropped if _handler else 0
+
 
 def get_logger(name: str) -> logging.Logger:
     """
@@ -16,3 +138,7 @@ def get_logger(name: str) -> logging.Logger:
         logger = get_logger(__name__)
     """
     return logging.getLogger(name)
+
+
+configure_logging()
+atexit.register(lambda: _listener and _listener.stop())
@@ -0,0 +1,147 @@
+"""
+Background maintenance that runs off the request path.
+    OfferSweeper   - periodically archives offers whose validity window has ended, and the
+                     versions replaced by future-dated re-quotes that have taken effect
+    StoreCompactor - periodically rebuilds the offer collections and compacts SQLite
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Callable, Dict, Optional, Union
+
+from app.core import config
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PeriodicTask(threading.Thread):
+    """Daemon thread calling `tick()` every `interval_s` seconds until stopped."""
+
+    run_at_start = True
+
+    def __init__(self, name: str, interval_s: int):
+        super().__init__(name=name, daemon=True)
+        self.interval_s = interval_s
+        self._stop_event = threading.Event()
+
+    def setup(self):
+        """Runs once when the thread starts."""
+
+    def tick(self):
+        raise NotImplementedError
+
+    def run(self):
+        logger.info("%s started (every %ss).", self.name, self.interval_s)
+        try:
+            self.setup()
+        except Exception as e:
+            logger.error("%s setup failed: %s", self.name, e, exc_info=True)
+
+        if not self.run_at_start:
+            self._stop_event.wait(self.interval_s)
+        while not self._stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error("%s failed: %s", self.name, e, exc_info=True)
+            self._stop_event.wait(self.interval_s)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class RetrieverTask(PeriodicTask):
+    """
+    A periodic task over the offer store. Takes the retriever or a zero-argument
+    factory for it, so starting the task does not build the retriever on the caller's thread.
+    """
+
+    def __init__(self, name: str, retriever: Union[object, Callable[[], object]], interval_s: int):
+        super().__init__(name, interval_s)
+        self._retriever = retriever
+
+    @property
+    def retriever(self):
+        if callable(self._retriever):
+            self._retriever = self._retriever()
+        return self._retriever
+
+
+class OfferSweeper(RetrieverTask):
+    """Archives expired and superseded offers every `interval_s` seconds."""
+
+    def __init__(self, retriever, interval_s: int = config.OFFER_SWEEP_INTERVAL_S):
+        super().__init__("offer-sweeper", retriever, interval_s)
+
+    def setup(self):
+        # Offers stored before validity/risk metadata existed would otherwise miss store-side filters
+        self.retriever.backfill_metadata()
+
+    def tick(self):
+        self.retriever.archive_expired()
+        self.retriever.archive_superseded()
+
+
+class StoreCompactor(RetrieverTask):
+    """Compacts the vector store every `interval_s` seconds (first run after one interval)."""
+
+    run_at_start = False
+
+    def __init__(self, retriever, interval_s: int = config.STORE_COMPACT_INTERVAL_S):
+        super().__init__("store-compactor", retriever, interval_s)
+
+    def tick(self):
+        compact_store(self.retriever)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # Removed while walking
+    return total
+
+
+def vacuum_sqlite(persist_dir: str) -> bool:
+    """Reclaims free pages in Chroma's SQLite metadata store. Returns False if it could not run."""
+    path = os.path.join(persist_dir, "chroma.sqlite3")
+    if not os.path.exists(path):
+        return False
+    try:
+        with closing(sqlite3.connect(path, timeout=30)) as conn:
+            conn.execute("VACUUM")
+        return True
+    except sqlite3.Error as e:
+        logger.warning("SQLite VACUUM skipped: %s", e)
+        return False
+
+
+def compact_store(retriever) -> Dict:
+    """
+    Rebuilds every live offer collection (dropping index entries of deleted offers and
+    applying the configured HNSW settings) and, in persistent mode, VACUUMs SQLite.
+    Archives are left as they are, since they are never searched.
+    """
+    start_time = time.time()
+    persist_dir: Optional[str] = retriever.persist_dir
+    size_before = _dir_size(persist_dir) if persist_dir else None
+
+    rebuilt = {name: retriever.rebuild_collection(name) for name in retriever.live_collections()}
+    vacuumed = vacuum_sqlite(persist_dir) if persist_dir else False
+
+    report = {
+        "collections": rebuilt,
+        "vacuumed": vacuumed,
+        "bytes_before": size_before,
+        "bytes_after": _dir_size(persist_dir) if persist_dir else None,
+        "elapsed_s": round(time.time() - start_time, 3),
+    }
+    logger.info("Compacted %d collection(s) in %ss (bytes %s -> %s).",
+                len(rebuilt), report["elapsed_s"], report["bytes_before"], report["bytes_after"])
+    return report
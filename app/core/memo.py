@@ -0,0 +1,81 @@
+"""
+Evaluation memo.
+Different query strings often reduce to the same constraints (size, intents, reliability)
+and retrieve the same offers, so the LLM would be asked the same question again. The memo
+keys evaluator results on what the LLM actually decides from:
+
+    (size, price cap, delivery deadline, quantity, intents, reliability,
+     sorted candidate (id, version) pairs, prompt version, model)
+
+A re-ingested or superseded offer gets a new id or version, so any change to a candidate
+produces a new key; stale entries simply age out.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core import config
+
+
+def memo_key(size_mm: Optional[str], max_price: Optional[float], max_delivery_days: Optional[int],
+             quantity: Optional[int], intents: Iterable[str], reliability: bool,
+             candidates: List[Tuple[str, int]], prompt_version: str, model: str) -> str:
+    payload = {
+        "size_mm": size_mm,
+        "max_price": max_price,
+        "max_delivery_days": max_delivery_days,
+        "quantity": quantity,
+        "intents": sorted(set(intents)),
+        "reliability": reliability,
+        "candidates": sorted([id_, version] for id_, version in candidates),
+        "prompt": prompt_version,
+        "model": model,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class EvaluationMemo:
+    """Thread-safe LRU of evaluation results with a TTL."""
+
+    def __init__(self, max_entries: int = config.EVAL_MEMO_MAX_ENTRIES, ttl_s: int = config.EVAL_MEMO_TTL_S,
+                 enabled: bool = config.EVAL_MEMO_ENABLED):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl_s:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key: str, result: Dict):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,310 @@
+"""
+On-demand profiling of pipeline requests.
+Two modes, both off by default:
+    single     - a request sent with "X-Profile: 1" (when PROFILING_ALLOW_HEADER=true) is profiled;
+                 the .pstats file is stored in PROFILE_DIR and its id returned in X-Profile-Id
+    aggregate  - enabled from the admin API; the next N profiled requests are merged into one
+                 pstats.Stats so hot functions can be ranked across requests
+Profiles are sampled, not traced: a background thread reads the stacks of the request's
+threads every PROFILING_SAMPLE_INTERVAL_MS, so the profiled code runs at full speed. The
+request's threads are the handler thread plus the pool threads running work it handed off
+with follow() (shard searches, LLM calls, extraction, store writes); other requests' threads
+are never sampled. Times are estimates (the wall time between samples, attributed to the
+sampled stacks) and "calls" counts samples.
+Route handlers opt in with @profiled. When profiling is not active the only cost
+is one context variable lookup and one attribute read.
+Only one request is profiled at a time, which keeps the sampling overhead bounded; a
+request arriving while another is profiled runs unprofiled.
+"""
+import contextlib
+import contextvars
+import functools
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core import config
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+_requested: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("profile_request", default=None)
+
+# Runtime switch for the X-Profile header (admin API can flip it without a restart)
+header_enabled = config.PROFILING_ALLOW_HEADER
+
+# Held while a request is being profiled (one active profiler per process)
+_profiler_lock = threading.Lock()
+
+Func = Tuple[str, int, str]  # (filename, first line, function name), as in pstats
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler over a set of followed threads, exposing its samples as
+    pstats data (create_stats / dump_stats), so pstats.Stats and snakeviz read it
+    like a cProfile profile. Each sample is weighted with the wall time since the
+    previous one, since the sampler only runs when it gets the GIL.
+    """
+
+    def __init__(self, interval_s: Optional[float] = None):
+        self.interval_s = config.PROFILING_SAMPLE_INTERVAL_MS / 1000 if interval_s is None else interval_s
+        self.samples = 0
+        self.stats: Dict = {}
+        self._threads: Dict[int, int] = {}  # thread ident -> frames below the profiled code
+        self._samples: Counter = Counter()  # Samples with the function anywhere on the stack
+        self._own: Counter = Counter()  # Seconds with the function on top of the stack
+        self._inclusive: Counter = Counter()  # Seconds with the function anywhere on the stack
+        self._edges: Counter = Counter()  # (caller, callee) seconds
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _depth(frame) -> int:
+        depth = 0
+        while frame is not None:
+            depth += 1
+            frame = frame.f_back
+        return depth
+
+    @contextlib.contextmanager
+    def follow_thread(self):
+        """Samples the current thread, below the caller's frame, until the block exits."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = self._depth(sys._getframe(2))
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads.pop(ident, None)
+
+    def enable(self):
+        """Starts sampling; the calling thread is followed until disable()."""
+        with self._lock:
+            self._threads[threading.get_ident()] = self._depth(sys._getframe(1))
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._sampler.start()
+
+    def disable(self):
+        with self._lock:
+            self._threads.clear()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_s):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+
+    def _sample(self, weight: float):
+        frames = sys._current_frames()
+        with self._lock:
+            followed = list(self._threads.items())
+            for ident, root_depth in followed:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack: List[Func] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                if len(stack) <= root_depth:
+                    continue
+                stack = stack[:len(stack) - root_depth]  # Leaf first; drop the frames the work runs under
+                self.samples += 1
+                self._own[stack[0]] += weight
+                for func in set(stack):
+                    self._samples[func] += 1
+                    self._inclusive[func] += weight
+                for edge in set(zip(stack[1:], stack)):
+                    self._edges[edge] += weight
+
+    def create_stats(self):
+        """Converts the samples into pstats' {func: (cc, nc, tt, ct, callers)} layout."""
+        with self._lock:
+            callers: Dict[Func, Dict] = {func: {} for func in self._inclusive}
+            for (caller, callee), seconds in self._edges.items():
+                callers[callee][caller] = (1, 1, 0.0, seconds)
+            self.stats = {
+                func: (n, n, self._own[func], self._inclusive[func], callers[func])
+                for func, n in self._samples.items()
+            }
+
+    def dump_stats(self, path: str):
+        self.create_stats()
+        with open(path, "wb") as f:
+            marshal.dump(self.stats, f)
+
+
+_active: contextvars.ContextVar[Optional[SamplingProfiler]] = contextvars.ContextVar("active_profiler", default=None)
+
+
+def follow(fn: Callable) -> Callable:
+    """
+    Wraps work handed to another thread, so the profile of the current request (if any)
+    samples that thread while it runs the work. Call it on the request's thread.
+    """
+    profiler = _active.get()
+    if profiler is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        with profiler.follow_thread():
+            return fn(*args, **kwargs)
+    return run
+
+
+class AggregateProfiler:
+    """Merges the profiles of the next `remaining` requests into one Stats object."""
+
+    def __init__(self):
+        self.active = False
+        self.remaining = 0
+        self.collected = 0
+        self._stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+
+    def start(self, requests: int):
+        with self._lock:
+            self.active = True
+            self.remaining = requests
+            self.collected = 0
+            self._stats = None
+
+    def stop(self):
+        with self._lock:
+            self.active = False
+            self.remaining = 0
+
+    def claim(self) -> bool:
+        """Reserves a slot for the current request, if aggregation is still running."""
+        if not self.active:
+            return False
+        with self._lock:
+            if not self.active or self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            if self.remaining == 0:
+                self.active = False
+            return True
+
+    def add(self, profiler: SamplingProfiler):
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profiler)
+            else:
+                self._stats.add(profiler)
+            self.collected += 1
+
+    def report(self, limit: int = 30, sort: str = "cumulative") -> Dict:
+        with self._lock:
+            return {
+                "active": self.active,
+                "remaining": self.remaining,
+                "requests_collected": self.collected,
+                "hot_functions": hot_functions(self._stats, limit, sort) if self._stats else [],
+            }
+
+
+aggregate = AggregateProfiler()
+
+
+def hot_functions(stats: pstats.Stats, limit: int = 30, sort: str = "cumulative") -> List[Dict]:
+    """Top functions of a Stats object as JSON-friendly rows."""
+    stats.sort_stats(sort)
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        calls, primitive_calls, total_time, cumulative_time, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": calls,
+            "total_time_s": round(total_time, 6),
+            "cumulative_time_s": round(cumulative_time, 6),
+        })
+    return rows
+
+
+def request_profile(header_value: Optional[str]) -> Optional[Dict]:
+    """Called by the middleware: marks the current request for profiling and returns its result holder."""
+    if not header_enabled or header_value not in ("1", "true"):
+        return None
+    holder = {}
+    _requested.set(holder)
+    return holder
+
+
+def profiled(fn):
+    """Profiles the wrapped route handler when the request asked for it or aggregation is running."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        holder = _requested.get()
+        if holder is None and not aggregate.active:
+            return fn(*args, **kwargs)
+        if not _profiler_lock.acquire(blocking=False):
+            logger.info("Another request is being profiled; %s runs unprofiled.", fn.__name__)
+            return fn(*args, **kwargs)
+
+        try:
+            collect = aggregate.claim()
+            if holder is None and not collect:
+                return fn(*args, **kwargs)
+            profiler = SamplingProfiler()
+            token = _active.set(profiler)
+            start_time = time.perf_counter()
+            try:
+                profiler.enable()
+                return fn(*args, **kwargs)
+            finally:
+                profiler.disable()
+                _active.reset(token)
+                elapsed = time.perf_counter() - start_time
+                if collect:
+                    aggregate.add(profiler)
+                if holder is not None:
+                    holder["id"] = save_profile(profiler, fn.__name__)
+                    holder["elapsed_s"] = elapsed
+        finally:
+            _profiler_lock.release()
+    return wrapper
+
+
+def save_profile(profiler: SamplingProfiler, label: str) -> str:
+    """Writes a .pstats file to PROFILE_DIR and returns its id."""
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(os.path.join(config.PROFILE_DIR, f"{profile_id}.pstats"))
+    logger.info("Stored request profile %s", profile_id)
+    return profile_id
+
+
+def load_profile(profile_id: str) -> pstats.Stats:
+    """Loads a stored profile by id. Raises FileNotFoundError for unknown ids."""
+    if os.path.basename(profile_id) != profile_id:
+        raise FileNotFoundError(profile_id)
+    path = os.path.join(config.PROFILE_DIR, f"{profile_id}.pstats")
+    if not os.path.exists(path):
+        raise FileNotFoundError(profile_id)
+    return pstats.Stats(path, stream=io.StringIO())
+
+
+def list_profiles() -> List[str]:
+    if not os.path.isdir(config.PROFILE_DIR):
+        return []
+    return sorted(f[:-len(".pstats")] for f in os.listdir(config.PROFILE_DIR) if f.endswith(".pstats"))
@@ -0,0 +1,88 @@
+"""
+Query embedding cache.
+Users ask the same handful of questions over and over, and each one used to cost an
+embedding round trip before retrieval could start. RetrieverAgent keeps the embeddings
+of recent queries in this LRU and counts how often each query is asked; the most frequent
+ones are saved on shutdown so the next start can embed them during warmup.
+"""
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from app.core import config
+
+
+def normalize_query(query: str) -> str:
+    """Whitespace-insensitive key; case is kept, since it changes the embedding."""
+    return " ".join(query.split())
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU of query embeddings (per embedding model) with ask counts."""
+
+    def __init__(self, max_entries: int = config.EMBED_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self._asked: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, model: str, query: str, record: bool = True) -> Optional[List[float]]:
+        """The cached embedding or None. `record` counts the query as asked (warmup lookups do not)."""
+        query = normalize_query(query)
+        with self._lock:
+            if record:
+                self._asked[query] += 1
+                if len(self._asked) > 2 * self.max_entries:
+                    self._asked = Counter(dict(self._asked.most_common(self.max_entries)))
+            embedding = self._entries.get((model, query))
+            if embedding is None:
+                self.misses += record
+                return None
+            self._entries.move_to_end((model, query))
+            self.hits += record
+            return embedding
+
+    def put(self, model: str, query: str, embedding: List[float]):
+        with self._lock:
+            key = (model, normalize_query(query))
+            self._entries[key] = list(embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def top_queries(self, n: int) -> List[str]:
+        with self._lock:
+            return [query for query, _ in self._asked.most_common(n)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._asked.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "distinct_queries": len(self._asked)}
+
+
+def load_recent_queries(path: str = config.RECENT_QUERIES_FILE) -> List[str]:
+    """Queries saved by the previous run, most frequent first (empty when there is no file)."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [q for q in json.load(f).get("queries", []) if isinstance(q, str)]
+
+
+def save_recent_queries(queries: List[str], path: str = config.RECENT_QUERIES_FILE):
+    """Writes atomically next to the store, so a crash never leaves a truncated file."""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"queries": queries}, f, indent=1)
+    os.replace(tmp_path, path)
@@ -0,0 +1,78 @@
+"""
+Supplier risk classification.
+One keyword table for every place that needs a risk judgement: offers are classified
+once in RetrieverAgent.add_offers and the result is stored as metadata
+(risk_level, high_risk, risk_flags), so queries filter on it inside Chroma instead
+of re-scanning notes on every request.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+RISK_LEVELS = ("Low", "Moderate", "High", "Unknown")
+RISK_ORDER = {level: rank for rank, level in enumerate(RISK_LEVELS)}
+
+# Checked in this order; the first level with a matching keyword wins
+LEVEL_KEYWORDS = (
+    ("High", ["high risk", "quality issues", "major quality", "production delays"]),
+    ("Low", ["low risk", "reliable", "95%"]),
+    ("Moderate", ["moderate"]),
+)
+
+FLAG_KEYWORDS = {
+    "quality_issues": ["quality issues", "major quality", "defect", "didn't meet specifications"],
+    "delivery_delays": ["production delays", "delays", "late delivery"],
+    "on_time_record": ["on-time", "on time"],
+}
+
+# Queries that name one of these (or order 1,000+ units) only accept offers that are not high risk
+RELIABILITY_KEYWORDS = ["large order", "large quantity", "critical", "important", "engineering", "lowest risk", "reliable"]
+RELIABILITY_MIN_QUANTITY = 1000
+# Queries whose ranking should weigh supplier risk (the retriever's "risk" intent)
+RISK_INTENT_KEYWORDS = ["risk", "reliable", "dependable", "trust", "quality"]
+
+
+@dataclass(frozen=True)
+class RiskProfile:
+    level: str
+    flags: Tuple[str, ...] = ()
+
+    @property
+    def high_risk(self) -> bool:
+        return self.level == "High"
+
+    def metadata(self) -> Dict:
+        """Chroma-compatible (scalar) metadata fields."""
+        return {"risk_level": self.level, "high_risk": self.high_risk, "risk_flags": ",".join(self.flags)}
+
+    @classmethod
+    def from_metadata(cls, meta: Dict) -> Optional["RiskProfile"]:
+        """The stored classification, or None for offers ingested before it existed."""
+        if meta.get("risk_level") not in RISK_ORDER:
+            return None
+        flags = meta.get("risk_flags") or ""
+        return cls(meta["risk_level"], tuple(f for f in flags.split(",") if f))
+
+
+def classify_risk(*texts: Optional[str]) -> RiskProfile:
+    """Classifies supplier notes (risk_note, comments, ...) into a level and flags."""
+    text = " ".join(t for t in texts if t).lower()
+    level = next((lvl for lvl, words in LEVEL_KEYWORDS if any(w in text for w in words)), "Unknown")
+    flags = tuple(flag for flag, words in FLAG_KEYWORDS.items() if any(w in text for w in words))
+    return RiskProfile(level, flags)
+
+
+def requires_reliability(query: str) -> bool:
+    """Checks if the query implies a high-stakes, risk-averse purchase."""
+    q = query.lower()
+    if any(k in q for k in RELIABILITY_KEYWORDS):
+        return True
+
+    # Check for large quantity numbers
+    qty_match = re.search(r"(?:over|more than|greater than|>=|)\s*([\d,]+)\s*(?:units|pcs|pieces|items)?", q)
+    if qty_match:
+        try:
+            return int(qty_match.group(1).replace(",", "")) >= RELIABILITY_MIN_QUANTITY
+        except ValueError:
+            pass
+    return False
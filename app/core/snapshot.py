@@ -0,0 +1,198 @@
+"""
+Vector store snapshots.
+Exports every offer collection and its archive (ids, documents, metadata, embeddings) to a directory:
+
+    <snapshot>/manifest.json                  format version, counts, dims, SHA-256 checksums
+    <snapshot>/<collection>/embeddings.npy    float32 [count, dim], memory-mappable
+    <snapshot>/<collection>/records.jsonl.gz  one {"id", "document", "metadata"} per row
+
+Importing bulk-loads the stored embeddings straight into a store, so no OpenAI calls are needed.
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from app.core.logger import get_logger
+from app.core.vectorstore import ARCHIVE_PREFIX, open_collection
+
+logger = get_logger(__name__)
+
+SNAPSHOT_FORMAT = "procure-sense-snapshot"
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+EXPORT_PAGE_SIZE = 1000
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, incomplete or fails checksum verification."""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _offer_collections(client, collection_prefix: str) -> List:
+    """The base collection and all of its shards, with their archives (superseded and expired versions)."""
+    prefixes = (collection_prefix, f"{ARCHIVE_PREFIX}{collection_prefix}")
+    return sorted(
+        (c for c in client.list_collections()
+         if any(c.name == p or c.name.startswith(f"{p}__") for p in prefixes)),
+        key=lambda c: c.name
+    )
+
+
+def _export_collection(collection, out_dir: str) -> Dict:
+    """Pages through one collection, writing embeddings into a memmapped .npy as it goes."""
+    os.makedirs(out_dir, exist_ok=True)
+    expected = collection.count()
+    emb_path = os.path.join(out_dir, "embeddings.npy")
+    rec_path = os.path.join(out_dir, "records.jsonl.gz")
+
+    embeddings = None
+    written = 0
+    with gzip.open(rec_path, "wt", encoding="utf-8") as records:
+        while written < expected:
+            page = collection.get(
+                limit=min(EXPORT_PAGE_SIZE, expected - written),
+                offset=written,
+                include=["documents", "metadatas", "embeddings"]
+            )
+            if not page["ids"]:
+                break  # Collection shrank while exporting
+            page_emb = np.asarray(page["embeddings"], dtype=np.float32)
+            if embeddings is None:
+                embeddings = np.lib.format.open_memmap(
+                    emb_path, mode="w+", dtype=np.float32, shape=(expected, page_emb.shape[1])
+                )
+            embeddings[written:written + len(page_emb)] = page_emb
+            for id_, doc, meta in zip(page["ids"], page["documents"], page["metadatas"]):
+                records.write(json.dumps({"id": id_, "document": doc, "metadata": meta}) + "\n")
+            written += len(page["ids"])
+
+    dim = 0
+    if embeddings is not None:
+        dim = embeddings.shape[1]
+        embeddings.flush()
+        del embeddings
+    else:
+        np.save(emb_path, np.zeros((0, 0), dtype=np.float32))
+
+    return {
+        "name": collection.name,
+        "count": written,
+        "dim": dim,
+        "metadata": collection.metadata,
+    }
+
+
+def export_snapshot(client, out_dir: str, collection_prefix: str) -> Dict:
+    """
+    Exports the base collection, all its shards and their archives into `out_dir`.
+    Returns the manifest that was written.
+    """
+    start_time = time.time()
+    os.makedirs(out_dir, exist_ok=True)
+
+    collections = []
+    checksums = {}
+    for collection in _offer_collections(client, collection_prefix):
+        entry = _export_collection(collection, os.path.join(out_dir, collection.name))
+        collections.append(entry)
+        for filename in ("embeddings.npy", "records.jsonl.gz"):
+            rel_path = f"{collection.name}/{filename}"
+            checksums[rel_path] = _sha256(os.path.join(out_dir, rel_path))
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "collections": collections,
+        "checksums": checksums,
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    total = sum(c["count"] for c in collections)
+    logger.info("Exported %d offers from %d collection(s) to %s in %.2fs.", total, len(collections), out_dir, time.time() - start_time)
+    return manifest
+
+
+def read_manifest(snapshot_dir: str, verify: bool = True) -> Dict:
+    """Loads a snapshot manifest, optionally verifying every file checksum."""
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise SnapshotError(f"No snapshot manifest found at {manifest_path}")
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format: {manifest.get('format')} v{manifest.get('version')}")
+
+    if verify:
+        for rel_path, expected in manifest["checksums"].items():
+            path = os.path.join(snapshot_dir, rel_path)
+            if not os.path.exists(path):
+                raise SnapshotError(f"Snapshot file missing: {rel_path}")
+            if _sha256(path) != expected:
+                raise SnapshotError(f"Checksum mismatch for {rel_path}")
+    return manifest
+
+
+def _iter_records(path: str) -> Iterator[Dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def import_snapshot(client, snapshot_dir: str, batch_size: int = 5000, verify: bool = True) -> Dict:
+    """
+    Bulk-loads a snapshot into `client`, upserting in large batches.
+    Embeddings are read through a memory map, so the snapshot is never fully loaded into RAM.
+    Returns {collection name: offers loaded}.
+    """
+    start_time = time.time()
+    manifest = read_manifest(snapshot_dir, verify=verify)
+    batch_size = max(1, min(batch_size, client.get_max_batch_size()))
+
+    loaded = {}
+    for entry in manifest["collections"]:
+        name, count = entry["name"], entry["count"]
+        collection = open_collection(client, name, metadata=entry.get("metadata") or None)
+        if count == 0:
+            loaded[name] = 0
+            continue
+
+        embeddings = np.load(os.path.join(snapshot_dir, name, "embeddings.npy"), mmap_mode="r")
+        records = _iter_records(os.path.join(snapshot_dir, name, "records.jsonl.gz"))
+        for start in range(0, count, batch_size):
+            end = min(start + batch_size, count)
+            batch = [next(records) for _ in range(end - start)]
+            collection.upsert(
+                ids=[r["id"] for r in batch],
+                documents=[r["document"] for r in batch],
+                metadatas=[r["metadata"] for r in batch],
+                embeddings=np.asarray(embeddings[start:end])
+            )
+        loaded[name] = count
+
+    logger.info("Imported %d offers into %d collection(s) in %.2fs.", sum(loaded.values()), len(loaded), time.time() - start_time)
+    return loaded
+
+
+def snapshot_path(root: str, name: Optional[str] = None) -> str:
+    """Resolves a snapshot name under `root`, refusing paths that escape it."""
+    name = name or time.strftime("snapshot-%Y%m%d-%H%M%S", time.gmtime())
+    root = os.path.abspath(root)
+    path = os.path.abspath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise SnapshotError(f"Invalid snapshot name: {name}")
+    return path
@@ -0,0 +1,181 @@
+"""
+Token, cost and latency accounting for every LLM and embedding call.
+Each call is recorded once and attributed to:
+    - the current request (returned in X-Usage-* response headers)
+    - a process-wide ledger with rolling totals per agent, route and model (/admin/usage)
+Usage:
+    with track_request("/procure-sense-rag/evaluate-offers") as usage:
+        ...                              # agents call record_usage(...)
+    usage.totals()
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from app.core import config
+
+# USD per 1M tokens: (prompt, completion)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "text-embedding-3-small": (0.02, 0.0),
+}
+
+
+@dataclass
+class UsageRecord:
+    agent: str
+    model: str
+    kind: str  # "llm" or "embedding"
+    prompt_tokens: int
+    completion_tokens: int
+    wall_time: float
+    route: str = "background"
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def cost_usd(self) -> float:
+        prompt_price, completion_price = MODEL_PRICES.get(self._price_key(), (0.0, 0.0))
+        return (self.prompt_tokens * prompt_price + self.completion_tokens * completion_price) / 1_000_000
+
+    def _price_key(self) -> str:
+        # Dated model names ("gpt-4o-2024-08-06") are billed like their base model
+        return max((m for m in MODEL_PRICES if self.model.startswith(m)), key=len, default=self.model)
+
+
+def _aggregate(records: Iterable[UsageRecord]) -> Dict:
+    totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "wall_time_s": 0.0}
+    for r in records:
+        totals["calls"] += 1
+        totals["prompt_tokens"] += r.prompt_tokens
+        totals["completion_tokens"] += r.completion_tokens
+        totals["cost_usd"] += r.cost_usd
+        totals["wall_time_s"] += r.wall_time
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    totals["wall_time_s"] = round(totals["wall_time_s"], 3)
+    return totals
+
+
+def _group(records: List[UsageRecord], key: str) -> Dict[str, Dict]:
+    groups: Dict[str, List[UsageRecord]] = {}
+    for r in records:
+        groups.setdefault(getattr(r, key), []).append(r)
+    return {name: _aggregate(items) for name, items in sorted(groups.items())}
+
+
+class RequestUsage:
+    """Usage collected while serving a single request."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.records: List[UsageRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: UsageRecord):
+        with self._lock:
+            self.records.append(record)
+
+    def totals(self) -> Dict:
+        return _aggregate(self.records)
+
+    def by_agent(self) -> Dict[str, Dict]:
+        return _group(self.records, "agent")
+
+
+class UsageLedger:
+    """Process-wide usage: lifetime totals plus a rolling window of recent calls."""
+
+    def __init__(self, window_s: int = config.USAGE_WINDOW_S, max_records: int = 100_000):
+        self.window_s = window_s
+        self.started = time.time()
+        self._recent: deque = deque(maxlen=max_records)
+        self._lifetime = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+        self._lock = threading.Lock()
+
+    def add(self, record: UsageRecord):
+        with self._lock:
+            self._recent.append(record)
+            self._lifetime["calls"] += 1
+            self._lifetime["prompt_tokens"] += record.prompt_tokens
+            self._lifetime["completion_tokens"] += record.completion_tokens
+            self._lifetime["cost_usd"] += record.cost_usd
+
+    def report(self, window_s: Optional[int] = None) -> Dict:
+        window_s = min(window_s or self.window_s, self.window_s)
+        now = time.time()
+        cutoff = now - window_s
+        with self._lock:
+            # Records older than the ledger window can never be reported again
+            while self._recent and self._recent[0].timestamp < now - self.window_s:
+                self._recent.popleft()
+            recent = [r for r in self._recent if r.timestamp >= cutoff]
+            lifetime = dict(self._lifetime, cost_usd=round(self._lifetime["cost_usd"], 6))
+        return {
+            "window_s": window_s,
+            "window_totals": _aggregate(recent),
+            "by_agent": _group(recent, "agent"),
+            "by_route": _group(recent, "route"),
+            "by_model": _group(recent, "model"),
+            "lifetime_totals": lifetime,
+            "since": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+        }
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            return [dict(asdict(r), cost_usd=r.cost_usd) for r in list(self._recent)[-limit:]]
+
+
+ledger = UsageLedger()
+_current_request: contextvars.ContextVar[Optional[RequestUsage]] = contextvars.ContextVar("request_usage", default=None)
+
+
+@contextmanager
+def track_request(route: str):
+    """Collects the usage of every call made while handling one request."""
+    usage = RequestUsage(route)
+    token = _current_request.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_request.reset(token)
+
+
+def record_usage(agent: str, model: str, prompt_tokens: int, completion_tokens: int,
+                 wall_time: float, kind: str = "llm") -> UsageRecord:
+    """Records one model call against the current request (if any) and the global ledger."""
+    request = _current_request.get()
+    record = UsageRecord(
+        agent=agent,
+        model=model,
+        kind=kind,
+        prompt_tokens=prompt_tokens or 0,
+        completion_tokens=completion_tokens or 0,
+        wall_time=wall_time,
+        route=request.route if request else "background",
+    )
+    if request is not None:
+        request.add(record)
+    ledger.add(record)
+    return record
+
+
+_encoding = None
+
+
+def estimate_tokens(texts: Iterable[str]) -> int:
+    """Token count for embedding inputs (the embeddings client does not report usage)."""
+    global _encoding
+    texts = list(texts)
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False  # Encoding unavailable (e.g. offline): fall back to ~4 chars per token
+    if _encoding:
+        return sum(len(_encoding.encode(t)) for t in texts)
+    return sum(max(1, len(t) // 4) for t in texts)
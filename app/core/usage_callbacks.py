@@ -0,0 +1,43 @@
+"""
+LangChain callback feeding app.core.usage.
+Kept apart from the ledger so that importing usage accounting (middleware, admin
+routes) does not import LangChain; only the agents that call chat models load it.
+"""
+import time
+from typing import Dict
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from app.core.usage import record_usage
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """LangChain callback that records token usage and wall time of chat model calls."""
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        wall_time = time.perf_counter() - self._started.pop(run_id, time.perf_counter())
+        llm_output = response.llm_output or {}
+        token_usage = llm_output.get("token_usage") or {}
+        prompt_tokens = token_usage.get("prompt_tokens")
+        completion_tokens = token_usage.get("completion_tokens")
+
+        if prompt_tokens is None and response.generations and response.generations[0]:
+            message = getattr(response.generations[0][0], "message", None)
+            usage_metadata = getattr(message, "usage_metadata", None) or {}
+            prompt_tokens = usage_metadata.get("input_tokens", 0)
+            completion_tokens = usage_metadata.get("output_tokens", 0)
+
+        record_usage(self.agent, llm_output.get("model_name", "unknown"),
+                     prompt_tokens or 0, completion_tokens or 0, wall_time)
@@ -0,0 +1,106 @@
+"""
+Chroma client factory.
+One client is shared per process so every agent and route reuses the same
+connection pool (HTTP mode) or the same embedded store (persistent mode).
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+from app.core import config
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Collections holding superseded and expired offers (never searched) are named archive__<collection>
+ARCHIVE_PREFIX = "archive__"
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _connect():
+    # Imported on first connect: chromadb is heavy and not needed to start serving
+    from chromadb import HttpClient, PersistentClient
+
+    if config.CHROMA_MODE == "http":
+        delay = 1.0
+        for attempt in range(1, config.CHROMA_CONNECT_RETRIES + 1):
+            try:
+                client = HttpClient(host=config.CHROMA_HOST, port=config.CHROMA_PORT, ssl=config.CHROMA_SSL)
+                client.heartbeat()
+                logger.info("Connected to Chroma server at %s:%s", config.CHROMA_HOST, config.CHROMA_PORT)
+                return client
+            except Exception as e:
+                if attempt == config.CHROMA_CONNECT_RETRIES:
+                    raise
+                logger.warning("Chroma server not reachable (attempt %d): %s. Retrying in %.0fs.", attempt, e, delay)
+                time.sleep(delay)
+                delay *= 2
+    if config.CHROMA_MODE != "persistent":
+        raise ValueError(f"Unknown CHROMA_MODE: {config.CHROMA_MODE}")
+    logger.info("Opening persistent Chroma store at %s", config.CHROMA_PERSIST_DIR)
+    return PersistentClient(path=config.CHROMA_PERSIST_DIR)
+
+
+def get_chroma_client():
+    """Returns the process-wide Chroma client, connecting on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _connect()
+    return _client
+
+
+def hnsw_configuration() -> Dict:
+    """Collection configuration carrying the configured HNSW settings."""
+    return {"hnsw": {
+        "space": config.CHROMA_HNSW_SPACE,
+        "max_neighbors": config.CHROMA_HNSW_M,
+        "ef_construction": config.CHROMA_HNSW_CONSTRUCTION_EF,
+        "ef_search": config.CHROMA_HNSW_SEARCH_EF,
+    }}
+
+
+def open_collection(client, name: str, metadata: Optional[Dict] = None):
+    """
+    get_or_create_collection with the configured HNSW settings.
+    Chroma ignores the configuration for collections that already exist, so ef_search
+    is updated in place; build-time settings only change when the collection is rebuilt.
+    """
+    wanted = hnsw_configuration()["hnsw"]
+    collection = client.get_or_create_collection(name, metadata=metadata, configuration={"hnsw": wanted})
+    current = (getattr(collection, "configuration", None) or {}).get("hnsw") or {}
+    if not current:
+        return collection
+
+    if current.get("ef_search") != wanted["ef_search"]:
+        collection.modify(configuration={"hnsw": {"ef_search": wanted["ef_search"]}})
+        logger.info("Set ef_search=%s on collection %s", wanted["ef_search"], name)
+    build = ("space", "max_neighbors", "ef_construction")
+    if any(current.get(k) != wanted[k] for k in build):
+        logger.warning(
+            "Collection %s was built with %s; the next compaction rebuilds it with %s.",
+            name, {k: current.get(k) for k in build}, {k: wanted[k] for k in build}
+        )
+    return collection
+
+
+def check_health() -> Dict:
+    """Pings the vector store and reports its mode, status and round-trip latency."""
+    start_time = time.time()
+    try:
+        get_chroma_client().heartbeat()
+        status = "ok"
+        error = None
+    except Exception as e:
+        logger.error("Vector store health check failed: %s", e)
+        status = "unavailable"
+        error = str(e)
+    return {
+        "mode": config.CHROMA_MODE,
+        "status": status,
+        "latency_ms": round((time.time() - start_time) * 1000, 2),
+        "error": error,
+    }
@@ -0,0 +1,144 @@
+"""
+Startup warmup behind the /ready probe.
+/ping answers as soon as FastAPI is up, but the first queries after a deploy used to pay
+for opening the store, loading the HNSW indexes, building the agents and embedding the
+query. The warmup does that work on a background thread, step by step:
+
+    store       - build the shared retriever (opens the Chroma client and collections)
+    index       - query every non-empty shard once, so its index is loaded into memory
+    agents      - build the remaining shared agents and open their chat-model connections
+    embeddings  - load the intent prototypes and embed the most frequent queries of the
+                  previous run into the query cache (opens the embeddings connection)
+
+The node is ready once the required steps (store, index, agents) succeeded. A failing
+required step is retried with exponential backoff; once the retries are used up the
+warmup is failed, and the next /ready call starts a new round. Embedding is best effort:
+a failure is reported in /ready but queries can still be served.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.core import config
+from app.core.logger import get_logger
+from app.core.query_cache import load_recent_queries
+
+logger = get_logger(__name__)
+
+PENDING, WARMING, READY, FAILED = "pending", "warming", "ready", "failed"
+OPTIONAL_STEPS = ("embeddings",)
+MAX_BACKOFF_S = 30.0
+
+
+def open_chat_connection(llm):
+    """Opens the HTTPS connection of a ChatOpenAI client (kept in its pool) with a model lookup; no tokens."""
+    llm.root_client.models.retrieve(llm.model_name)
+
+
+class Warmup:
+    def __init__(self, retriever_factory: Callable[[], object], agent_factories: List[Callable[[], object]] = (),
+                 queries_path: Optional[str] = config.RECENT_QUERIES_FILE, max_queries: int = config.WARMUP_QUERIES,
+                 retries: int = config.WARMUP_RETRIES, backoff_s: float = config.WARMUP_BACKOFF_S):
+        self.retriever_factory = retriever_factory
+        self.agent_factories = list(agent_factories)
+        self.queries_path = queries_path
+        self.max_queries = max_queries
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.state = PENDING
+        self.steps: Dict[str, Dict] = {}
+        self.elapsed_s: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def _step(self, name: str, fn: Callable[[], object]) -> bool:
+        """Runs one step; required steps are retried with exponential backoff."""
+        attempts = 1 if name in OPTIONAL_STEPS else self.retries + 1
+        delay = self.backoff_s
+        for attempt in range(1, attempts + 1):
+            start_time = time.perf_counter()
+            try:
+                detail = fn()
+                self.steps[name] = {"ok": True, "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 1),
+                                    "attempts": attempt}
+                if detail is not None:
+                    self.steps[name]["detail"] = detail
+                return True
+            except Exception as e:
+                self.steps[name] = {"ok": False, "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 1),
+                                    "attempts": attempt, "error": str(e)}
+                if attempt == attempts:
+                    logger.error("Warmup step '%s' failed: %s", name, e, exc_info=True)
+                    break
+                logger.warning("Warmup step '%s' failed (attempt %d): %s. Retrying in %.1fs.", name, attempt, e, delay)
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_BACKOFF_S)
+        return name in OPTIONAL_STEPS
+
+    def _build_agents(self) -> Dict:
+        """Builds each agent and opens the connections of its chat models."""
+        connections = 0
+        for factory in self.agent_factories:
+            agent = factory()
+            if hasattr(agent, "open_connections"):
+                connections += agent.open_connections()
+        return {"agents": len(self.agent_factories), "connections": connections}
+
+    def _prime(self, retriever) -> Dict:
+        queries = load_recent_queries(self.queries_path)[:self.max_queries]
+        return {"queries": len(queries), "embedded": retriever.prime_queries(queries)}
+
+    def run(self):
+        """Runs every step in order; stops at the first required step that fails."""
+        self.state = WARMING
+        start_time = time.perf_counter()
+        retriever = None
+
+        def build_retriever():
+            nonlocal retriever
+            retriever = self.retriever_factory()
+
+        ok = (
+            self._step("store", build_retriever)
+            and self._step("index", lambda: {"shards": retriever.warm_index()})
+            and self._step("agents", self._build_agents)
+            and self._step("embeddings", lambda: self._prime(retriever))
+        )
+        self.elapsed_s = time.perf_counter() - start_time
+        self.state = READY if ok else FAILED
+        logger.info("Warmup %s in %.2fs: %s", self.state, self.elapsed_s,
+                    ", ".join(f"{name}={'ok' if step['ok'] else 'failed'}" for name, step in self.steps.items()))
+
+    def _spawn(self):
+        self.state = WARMING
+        self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def start(self):
+        """Runs the warmup on a daemon thread, so startup (and /ping) does not wait for it."""
+        with self._lock:
+            self._spawn()
+
+    def retrigger(self) -> bool:
+        """Starts a new round after a failed warmup (called by /ready). Returns whether one started."""
+        with self._lock:
+            if self.state != FAILED:
+                return False
+            logger.info("Restarting the failed warmup.")
+            self._spawn()
+            return True
+
+    def skip(self):
+        """Marks the node ready without warming up (WARMUP_ENABLED=false)."""
+        self.state = READY
+
+    def status(self) -> Dict:
+        return {
+            "status": self.state,
+            "elapsed_s": round(self.elapsed_s, 3) if self.elapsed_s is not None else None,
+            "steps": self.steps,
+        }
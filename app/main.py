@@ -1,16 +1,121 @@
-from fastapi import FastAPI
-from app import upload_router, query_router, get_logger
+import uuid
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app import upload_router, query_router, admin_router, get_logger
+from app.agents import get_evaluator, get_retriever, get_summarizer, peek_shared
+from app.core import config
+from app.core.locks import file_lock, is_leader
+from app.core.logger import flush_logging, request_id_var
+from app.core.maintenance import OfferSweeper, StoreCompactor
+from app.core.profiling import request_profile
+from app.core.query_cache import load_recent_queries, save_recent_queries
+from app.core.usage import track_request
+from app.core.vectorstore import check_health
+from app.core.warmup import Warmup
 
 # Initialize logger and FastAPI app
 logger = get_logger(__name__)
+
+
+warmup = Warmup(get_retriever, [get_evaluator, get_summarizer])
+
+
+def _save_recent_queries():
+    """Keeps the most asked queries (topped up with the previous list) for the next warmup."""
+    retriever = peek_shared("RetrieverAgent")
+    if retriever is None:
+        return
+    try:
+        # Workers stop together: each merges into what the previous one wrote
+        with file_lock("recent_queries"):
+            queries = retriever.query_cache.top_queries(config.WARMUP_QUERIES) + load_recent_queries()
+            save_recent_queries(list(dict.fromkeys(queries))[:config.WARMUP_QUERIES])
+    except Exception as e:
+        logger.error("Could not save recent queries: %s", e, exc_info=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts the warmup and background maintenance with the app and stops them on shutdown.
+    They build the shared retriever on their own threads, so startup does not wait for it.
+    Every worker warms up its own agents; the store maintenance runs in the leader worker only.
+    """
+    if config.WARMUP_ENABLED:
+        warmup.start()
+    else:
+        warmup.skip()
+    tasks = []
+    if config.OFFER_SWEEPER_ENABLED or config.STORE_COMPACTION_ENABLED:
+        if is_leader():
+            if config.OFFER_SWEEPER_ENABLED:
+                tasks.append(OfferSweeper(get_retriever))
+            if config.STORE_COMPACTION_ENABLED:
+                tasks.append(StoreCompactor(get_retriever))
+        else:
+            logger.info("Another worker runs the store maintenance.")
+    for task in tasks:
+        task.start()
+    yield
+    for task in tasks:
+        task.stop()
+    _save_recent_queries()
+    flush_logging()
+
+
 app = FastAPI(
     title="ProcureSense-RAG: Supplier Quotation Analysis API",
     description="Multi-Agent RAG system for supplier offer extraction, evaluation, and summarization.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 logger.info("ProcureSense-RAG API has started")
 
+
+@app.middleware("http")
+async def usage_headers(request: Request, call_next):
+    """Reports the tokens, cost and model time spent on each request in X-Usage-* headers."""
+    with track_request(request.url.path) as usage:
+        response = await call_next(request)
+    if usage.records:
+        totals = usage.totals()
+        response.headers["X-Usage-LLM-Calls"] = str(totals["calls"])
+        response.headers["X-Usage-Prompt-Tokens"] = str(totals["prompt_tokens"])
+        response.headers["X-Usage-Completion-Tokens"] = str(totals["completion_tokens"])
+        response.headers["X-Usage-Cost-USD"] = f"{totals['cost_usd']:.6f}"
+        response.headers["X-Usage-Model-Time-S"] = f"{totals['wall_time_s']:.3f}"
+        response.headers["X-Usage-Agents"] = ";".join(
+            f"{agent}={t['prompt_tokens']}/{t['completion_tokens']}" for agent, t in usage.by_agent().items()
+        )
+    return response
+
+
+@app.middleware("http")
+async def profile_header(request: Request, call_next):
+    """Honours "X-Profile: 1" on @profiled routes and returns the stored profile id."""
+    holder = request_profile(request.headers.get("X-Profile"))
+    response = await call_next(request)
+    if holder and "id" in holder:
+        response.headers["X-Profile-Id"] = holder["id"]
+        response.headers["X-Profile-Elapsed-S"] = f"{holder['elapsed_s']:.3f}"
+    return response
+
+
+# Registered last so it wraps the other middlewares: every record of the request gets the id
+@app.middleware("http")
+async def request_id(request: Request, call_next):
+    """Tags every log record of a request with its id (X-Request-ID is honoured and echoed)."""
+    rid = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+    token = request_id_var.set(rid)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = rid
+    return response
+
 # Include routers with meaningful prefixes and tags
 app.include_router(
     upload_router,
@@ -24,7 +129,33 @@ app.include_router(
     tags=["Supplier Evaluation"]
 )
 
+app.include_router(
+    admin_router,
+    prefix="/procure-sense-rag/admin",
+    tags=["Admin"]
+)
+
 # Health check route
 @app.get("/ping", tags=["Health Check"])
 def ping():
     return {"status": "ok", "message": "ProcureSense-RAG API is running 🚀"}
+
+
+@app.get("/ready", tags=["Health Check"])
+def ready():
+    """
+    Readiness probe: 200 once the startup warmup has loaded the store, index and agents,
+    503 while it is still running or after it failed (a failed warmup is started again).
+    Route traffic on this, not on /ping.
+    """
+    warmup.retrigger()
+    status = warmup.status()
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=status)
+
+
+@app.get("/health", tags=["Health Check"])
+def health():
+    """Checks that the vector store is reachable."""
+    vector_store = check_health()
+    status_code = 200 if vector_store["status"] == "ok" else 503
+    return JSONResponse(status_code=status_code, content={"vector_store": vector_store})
@@ -24,4 +24,6 @@ class Offer(BaseModel):
     delivery_days: Optional[int] = None
     payment_terms: Optional[str] = None
     risk_note: Optional[str] = None
+    valid_from: Optional[str] = None   # ISO date the quoted price starts to apply
+    valid_until: Optional[str] = None  # ISO date the quotation expires
     raw_text: str
\ No newline at end of file
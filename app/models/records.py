@@ -0,0 +1,66 @@
+"""
+Internal offer record.
+Retrieved offers flow through the retriever, evaluator and routes as OfferRecord:
+a slotted dataclass built straight from Chroma metadata, carrying the risk
+classification stored at ingest (or derived once for older offers). Pydantic models are kept for the API boundary (requests, responses,
+extraction output).
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional, Union
+
+from app.core.risk import RiskProfile, classify_risk
+
+# Offer fields, in the order Offer.model_dump() produced them
+OFFER_FIELDS = (
+    "supplier", "item", "product_id", "unit_price", "min_quantity", "delivery_days",
+    "payment_terms", "risk_note", "valid_from", "valid_until", "raw_text",
+)
+
+
+@dataclass(slots=True)
+class OfferRecord:
+    supplier: str
+    item: str
+    product_id: Optional[str] = None
+    unit_price: Optional[float] = None
+    min_quantity: Optional[int] = None
+    delivery_days: Optional[int] = None
+    payment_terms: Optional[str] = None
+    risk_note: Optional[str] = None
+    valid_from: Optional[str] = None
+    valid_until: Optional[str] = None
+    raw_text: str = ""
+    id: Optional[str] = None
+    version: int = 1
+    profile: Optional[RiskProfile] = None
+    risk: str = field(init=False)
+    high_risk: bool = field(init=False)
+
+    def __post_init__(self):
+        if self.profile is None:
+            self.profile = classify_risk(self.risk_note)
+        self.risk = self.profile.level
+        self.high_risk = self.profile.high_risk
+
+    @classmethod
+    def from_metadata(cls, meta: Mapping[str, Any], id: Optional[str] = None) -> "OfferRecord":
+        """Builds a record from stored metadata without re-validating it (extra keys are ignored)."""
+        return cls(
+            **{name: meta.get(name) for name in OFFER_FIELDS if name in meta},
+            id=id,
+            version=meta.get("version", 1),
+            profile=RiskProfile.from_metadata(meta),
+        )
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Dict-style read access, so ranking and evaluation accept records and dicts alike."""
+        return getattr(self, name, default)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The offer fields as a plain dict (the shape the evaluator prompt and summarizer use)."""
+        return {name: getattr(self, name) for name in OFFER_FIELDS}
+
+
+def as_dict(offer: Union[OfferRecord, Dict]) -> Dict:
+    """Dicts pass through unchanged; records are converted once."""
+    return offer.as_dict() if isinstance(offer, OfferRecord) else offer
@@ -1,5 +1,6 @@
 # app/routes/__init__.py
 from .query import router as query_router
 from .upload import router as upload_router
+from .admin import router as admin_router
 
-__all__ = ["query_router", "upload_router"]
+__all__ = ["query_router", "upload_router", "admin_router"]
@@ -0,0 +1,146 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+import hmac
+import os
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+
+from app import get_logger
+from app.agents import get_evaluator, get_retriever
+from app.core import config
+from app.core.snapshot import SnapshotError, export_snapshot, import_snapshot, snapshot_path
+from app.core import profiling
+from app.core.maintenance import compact_store
+from app.core.usage import ledger
+from app.core.vectorstore import get_chroma_client
+
+logger = get_logger(__name__)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Guards admin endpoints: disabled (403) until ADMIN_TOKEN is configured."""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled; set ADMIN_TOKEN to enable it.")
+    if not hmac.compare_digest((x_admin_token or "").encode(), config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing admin token.")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# ----------- Request & Response Schemas -----------
+
+class SnapshotExportRequest(BaseModel):
+    name: Optional[str] = None
+
+
+class SnapshotImportRequest(BaseModel):
+    name: str
+    batch_size: int = Field(default=config.SNAPSHOT_BATCH_SIZE, gt=0)
+    verify: bool = True
+
+
+class SnapshotResponse(BaseModel):
+    path: str
+    collections: Dict[str, int]
+
+
+class ProfilingRequest(BaseModel):
+    allow_header: Optional[bool] = None
+    aggregate_requests: Optional[int] = Field(default=None, ge=0, description="Profile the next N requests together (0 stops)")
+
+# ----------- Snapshot Endpoints -----------
+
+@router.post("/snapshot/export", response_model=SnapshotResponse, summary="Export the vector store to a snapshot")
+def export_store(req: SnapshotExportRequest):
+    try:
+        path = snapshot_path(config.SNAPSHOT_DIR, req.name)
+        manifest = export_snapshot(get_chroma_client(), path, config.CHROMA_COLLECTION)
+    except SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SnapshotResponse(
+        path=path,
+        collections={c["name"]: c["count"] for c in manifest["collections"]}
+    )
+
+
+@router.post("/snapshot/import", response_model=SnapshotResponse, summary="Bulk-load a snapshot into the vector store")
+def import_store(req: SnapshotImportRequest):
+    try:
+        path = snapshot_path(config.SNAPSHOT_DIR, req.name)
+        loaded = import_snapshot(get_chroma_client(), path, batch_size=req.batch_size, verify=req.verify)
+    except SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SnapshotResponse(path=path, collections=loaded)
+
+# ----------- Usage Endpoints -----------
+
+@router.get("/usage", summary="Rolling token, cost and latency totals per agent, route and model")
+def usage_report(
+    window_s: Optional[int] = Query(default=None, gt=0, description="Rolling window in seconds (max USAGE_WINDOW_S)"),
+    recent: int = Query(default=0, ge=0, le=500, description="Also return the N most recent calls")
+):
+    report = ledger.report(window_s)
+    report["evaluation_memo"] = get_evaluator().memo.stats()
+    if recent:
+        report["recent_calls"] = ledger.recent(recent)
+    return report
+
+# ----------- Profiling Endpoints -----------
+
+@router.post("/profiling", summary="Toggle per-request profiling or start aggregate profiling")
+def configure_profiling(req: ProfilingRequest):
+    if req.allow_header is not None:
+        profiling.header_enabled = req.allow_header
+    if req.aggregate_requests is not None:
+        if req.aggregate_requests:
+            profiling.aggregate.start(req.aggregate_requests)
+        else:
+            profiling.aggregate.stop()
+    return {"allow_header": profiling.header_enabled, **profiling.aggregate.report(limit=0)}
+
+
+@router.get("/profiling", summary="Hot functions collected by aggregate profiling")
+def aggregate_profile(limit: int = Query(default=30, ge=1, le=500), sort: str = Query(default="cumulative")):
+    return {"allow_header": profiling.header_enabled, **profiling.aggregate.report(limit, sort)}
+
+
+@router.get("/profiles", summary="Stored single-request profiles")
+def stored_profiles():
+    return {"profiles": profiling.list_profiles()}
+
+
+@router.get("/profiles/{profile_id}", summary="Hot functions of a stored profile (or the raw .pstats file)")
+def stored_profile(profile_id: str, limit: int = Query(default=30, ge=1, le=500),
+                   sort: str = Query(default="cumulative"), download: bool = False):
+    try:
+        stats = profiling.load_profile(profile_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    if download:
+        return FileResponse(os.path.join(config.PROFILE_DIR, f"{profile_id}.pstats"),
+                            filename=f"{profile_id}.pstats", media_type="application/octet-stream")
+    return {"id": profile_id, "hot_functions": profiling.hot_functions(stats, limit, sort)}
+
+# ----------- Offer Maintenance -----------
+
+@router.post("/offers/sweep", summary="Archive expired and superseded offers now")
+def sweep_offers():
+    retriever = get_retriever()
+    return {"archived": retriever.archive_expired(), "superseded": retriever.archive_superseded()}
+
+
+@router.delete("/offers", summary="Delete offers by supplier and/or age")
+def purge_offers(
+    supplier: Optional[str] = Query(default=None, description="Exact supplier name (case-insensitive)"),
+    older_than_days: Optional[float] = Query(default=None, gt=0, description="Ingested more than this many days ago"),
+    include_archive: bool = Query(default=True, description="Also delete archived versions")
+):
+    if not supplier and older_than_days is None:
+        raise HTTPException(status_code=400, detail="Give a supplier, older_than_days, or both.")
+    older_than_s = older_than_days * 86400 if older_than_days is not None else None
+    return {"deleted": get_retriever().purge_offers(supplier, older_than_s, include_archive=include_archive)}
+
+
+@router.post("/maintenance/compact", summary="Rebuild offer collections and compact the store now")
+def compact_offers():
+    return compact_store(get_retriever())
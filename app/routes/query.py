@@ -1,24 +1,36 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, Iterator, List, Optional
 import json
 
-from app import RetrieverAgent, EvaluatorAgent, SummarizerAgent, get_logger
-from app.models.models import Offer
+from app import get_logger
+from app.agents import get_evaluator, get_retriever, get_summarizer
+from app.models.records import OfferRecord
+from app.agents.routing import QueryPlan
+from app.core.deadline import Deadline, DeadlineExceeded
+from app.core.profiling import profiled
 
 logger = get_logger(__name__)
 router = APIRouter()
 
 # ----------- Agents -----------
-retriever = RetrieverAgent()
-evaluator = EvaluatorAgent()
-summarizer = SummarizerAgent()
+# Built on first use, not at import (see app.agents); `query.retriever` etc. still resolve
+_AGENT_GETTERS = {"retriever": get_retriever, "evaluator": get_evaluator, "summarizer": get_summarizer}
+
+
+def __getattr__(name):
+    if name in _AGENT_GETTERS:
+        return _AGENT_GETTERS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ----------- Request & Response Schemas -----------
 
 class QueryRequest(BaseModel):
     query: str
     top_k: Optional[int] = 5
+    tenant: Optional[str] = None
+    deadline_ms: Optional[int] = Field(default=None, gt=0, description="End-to-end latency budget (defaults to QUERY_DEADLINE_MS)")
 
 
 class EvaluatedOffer(BaseModel):
@@ -33,70 +45,148 @@ class CustomQueryResponse(BaseModel):
     recommendation: Optional[str]
     reasoning: Optional[str]
     offers_evaluated: List[EvaluatedOffer]
+    degraded: bool = False
+    degraded_stages: List[str] = []
+    model_route: Optional[str] = None
 
 
 # ----------- Helper Function -----------
 
-def extract_risk_assessment(note: Optional[str]) -> str:
-    """Map supplier note text to a structured risk assessment label."""
-    note_lower = (note or "").lower()
-    if "high risk" in note_lower or "quality issues" in note_lower:
-        return "High Risk (Major quality issues last year, be cautious)"
-    elif "low risk" in note_lower or "reliable" in note_lower or "95%" in note_lower:
-        return "Low Risk (Reliable supplier, consistent on-time delivery)"
-    elif "moderate" in note_lower:
-        return "Moderate Risk (Occasional issues or delays)"
-    else:
-        return "Unknown Risk (Insufficient data)"
-
-
-# ----------- Main Endpoint -----------
-
-@router.post("/evaluate-offers", response_model=CustomQueryResponse, summary="Search, Evaluate and Summarize offers")
-def query_offers(req: QueryRequest):
-    """Multi-agent RAG pipeline: Retriever → Evaluator → Summarizer"""
-
-    # Step 1: Retrieve top-k offers
-    retrieved_offers = retriever.search(req.query, k=req.top_k)
-    offer_dicts = [offer.model_dump() for offer in retrieved_offers]
-
-    if not offer_dicts:
+RISK_LABELS = {
+    "High": "High Risk (Major quality issues last year, be cautious)",
+    "Low": "Low Risk (Reliable supplier, consistent on-time delivery)",
+    "Moderate": "Moderate Risk (Occasional issues or delays)",
+    "Unknown": "Unknown Risk (Insufficient data)",
+}
+
+
+def _evaluated_offer(offer: OfferRecord) -> Dict:
+    """Response row for one offer; validated once, by the response model."""
+    return {
+        "supplier": offer.supplier or "Unknown",
+        "item": f"{offer.item or 'N/A'} ({offer.product_id or 'N/A'})",
+        "unit_price": offer.unit_price if offer.unit_price is not None else 0.0,
+        "delivery_days": offer.delivery_days if offer.delivery_days is not None else 0,
+        "risk_assessment": RISK_LABELS[offer.risk],
+    }
+
+
+# ----------- Pipeline -----------
+
+def _run_pipeline(req: QueryRequest) -> Iterator[Dict]:
+    """
+    Multi-agent RAG pipeline: Retriever → Evaluator → Summarizer
+    Yields one event per finished stage ("offers", "recommendation", "reasoning")
+    and ends with "done", which carries the full CustomQueryResponse.
+    A stage that fails ends the stream with an "error" event instead: once the first
+    line is streamed the status code is already sent, so the error has to be a line too.
+    """
+    try:
+        yield from _pipeline_stages(req)
+    except Exception as e:
+        logger.error("❌ Query pipeline failed: %s", e, exc_info=True)
+        yield {"event": "error", "detail": str(e)}
+
+
+def _pipeline_stages(req: QueryRequest) -> Iterator[Dict]:
+    """
+    The stages behind _run_pipeline.
+    Every stage shares one latency budget; stages that would overrun it fall back
+    to local ranking / a template summary and the response is marked degraded.
+    """
+    retriever, evaluator, summarizer = get_retriever(), get_evaluator(), get_summarizer()
+    deadline = Deadline(req.deadline_ms)
+    plan = QueryPlan.from_query(req.query)
+    degraded_stages = []
+
+    # Step 1: Retrieve top-k offers (retrieval has no fallback: over budget means no offers)
+    try:
+        retrieved_offers = retriever.search(req.query, k=req.top_k, tenant=req.tenant, plan=plan, deadline=deadline)
+    except DeadlineExceeded:
+        yield {"event": "done", **CustomQueryResponse(
+            recommendation="No Offer",
+            reasoning="Supplier offers could not be retrieved within the latency budget.",
+            offers_evaluated=[],
+            degraded=True,
+            degraded_stages=["retriever"]
+        ).model_dump()}
+        return
+
+    if not retrieved_offers:
         logger.warning("⚠️ No offers retrieved. Returning 'No Offer'.")
-        return CustomQueryResponse(
+        yield {"event": "done", **CustomQueryResponse(
             recommendation="No Offer",
             reasoning="No supplier offers were retrieved for the given query.",
             offers_evaluated=[]
-        )
+        ).model_dump()}
+        return
+
+    # Format all offers for response
+    offers_evaluated = [_evaluated_offer(o) for o in retrieved_offers]
+    yield {"event": "offers", "offers_evaluated": offers_evaluated}
 
     # Evaluate offers using LLM-based EvaluatorAgent
-    best_offer = evaluator.evaluate(req.query, offer_dicts)
+    best_offer = evaluator.evaluate(req.query, retrieved_offers, deadline=deadline, plan=plan)
+    model_route = best_offer.get("model_route") if best_offer else None
+    if best_offer and best_offer.get("evaluation_mode") == "local":
+        degraded_stages.append("evaluator")
+        model_route = "local"  # The routed model never answered
+    recommendation = best_offer.get("supplier") if best_offer else "No Offer"
+    yield {"event": "recommendation", "recommendation": recommendation, "model_route": model_route}
 
     #  Summarize using SummarizerAgent (only summarizing best_offer)
     if best_offer:
         best_offer_copy = best_offer.copy()
+        best_offer_copy.pop("evaluation_mode", None)
+        best_offer_copy.pop("model_route", None)
         evaluation_reason = best_offer_copy.pop("evaluation_reason", "")
-        summary_text = summarizer.summarize(
-            query=req.query,
-            best_offer=json.dumps(best_offer_copy, indent=2)
-        )
+        try:
+            summary_text = summarizer.summarize(
+                query=req.query,
+                best_offer=json.dumps(best_offer_copy, indent=2),
+                deadline=deadline,
+                route=model_route,
+                reason=evaluation_reason
+            )
+        except DeadlineExceeded:
+            summary_text = summarizer.template_summary(best_offer_copy, evaluation_reason)
+            degraded_stages.append("summarizer")
     else:
         summary_text = None
         evaluation_reason = "No supplier found matching the required product specifications."
-
-    # Format all offers for response
-    offers_evaluated = [
-        EvaluatedOffer(
-            supplier=o.get("supplier", "Unknown"),
-            item=f"{o.get('item', 'N/A')} ({o.get('product_id', 'N/A')})",
-            unit_price=o.get("unit_price", 0.0),
-            delivery_days=o.get("delivery_days", 0),
-            risk_assessment=extract_risk_assessment(o.get("risk_note"))
-        ) for o in offer_dicts
-    ]
+    yield {"event": "reasoning", "reasoning": summary_text or evaluation_reason}
 
     # Return final structured response
-    return CustomQueryResponse(
-        recommendation=best_offer.get("supplier") if best_offer else "No Offer",
+    yield {"event": "done", **CustomQueryResponse(
+        recommendation=recommendation,
         reasoning=summary_text or evaluation_reason,
-        offers_evaluated=offers_evaluated
+        offers_evaluated=offers_evaluated,
+        degraded=bool(degraded_stages),
+        degraded_stages=degraded_stages,
+        model_route=model_route
+    ).model_dump()}
+
+
+# ----------- Main Endpoints -----------
+
+@router.post("/evaluate-offers", response_model=CustomQueryResponse, summary="Search, Evaluate and Summarize offers")
+@profiled
+def query_offers(req: QueryRequest):
+    """Runs the full pipeline and returns the final response."""
+    for event in _run_pipeline(req):
+        pass
+    if event.pop("event") == "error":
+        raise HTTPException(status_code=500, detail=event["detail"])
+    return CustomQueryResponse(**event)
+
+
+@router.post("/evaluate-offers/stream", summary="Search, Evaluate and Summarize offers (NDJSON stream)")
+def query_offers_stream(req: QueryRequest):
+    """
+    Same pipeline as /evaluate-offers, streamed as newline-delimited JSON so clients
+    can show the offers before the evaluator and summarizer have finished.
+    """
+    return StreamingResponse(
+        (json.dumps(event) + "\n" for event in _run_pipeline(req)),
+        media_type="application/x-ndjson"
     )
@@ -1,55 +1,87 @@
-import logging
-import traceback
-
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from typing import List, Optional
 
-from app import ExtractorAgent, RetrieverAgent
+from app import get_logger
+from app.agents import get_extractor, get_retriever
+from app.core.ingest_pipeline import ingest_stream
+from app.core.profiling import profiled
 
 
-# Setup logger
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 router = APIRouter()
-extractor = ExtractorAgent()
-retriever = RetrieverAgent()
 
 class UploadRequest(BaseModel):
     text: str
+    tenant: Optional[str] = None
 
 class UploadResponse(BaseModel):
     message: str
     offers_added: int
 
+class UploadBatchRequest(BaseModel):
+    texts: List[str]
+    tenant: Optional[str] = None
+
+class UploadBatchResponse(BaseModel):
+    message: str
+    offers_added: int
+    offers_per_text: List[int]
+
 @router.post(
     "/ingest-offers",
     response_model=UploadResponse,
     summary="Extract structured supplier offers and add them to the vector database"
 )
+@profiled
 def upload_text(data: UploadRequest):
     try:
         logger.info("Received upload request")
 
-        # Extract structured offers
-        offers = extractor.extract_offers(data.text)
-        if not offers:
+        # Stream structured offers into the vector store while extraction is running
+        offers_added = ingest_stream(get_extractor().stream_offers(data.text), get_retriever(), tenant=data.tenant)
+        if not offers_added:
             logger.warning("No offers could be extracted from the text")
             raise ValueError("No offers could be extracted.")
 
-        logger.info(f"Extracted {len(offers)} offer(s)")
-
-        # Add to vector store
-        retriever.add_offers(offers)
-        logger.info("Offers successfully added to vector store")
+        logger.info("Extracted and stored %d offer(s) in vector store", offers_added)
 
         return UploadResponse(
             message="Offers successfully extracted and stored.",
-            offers_added=len(offers)
+            offers_added=offers_added
+        )
+
+    except Exception as e:
+        logger.error("Error during upload processing: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post(
+    "/ingest-offers/batch",
+    response_model=UploadBatchResponse,
+    summary="Extract several quotations, packing short ones into shared LLM requests"
+)
+@profiled
+def upload_batch(data: UploadBatchRequest):
+    try:
+        logger.info("Received batch upload request with %d text(s)", len(data.texts))
+
+        extracted = get_extractor().extract_batch(data.texts)
+        offers = [offer for text_offers in extracted for offer in text_offers]
+        if not offers:
+            logger.warning("No offers could be extracted from the texts")
+            raise ValueError("No offers could be extracted.")
+
+        offers_added = len(get_retriever().add_offers(offers, tenant=data.tenant))
+        logger.info("Extracted %d and stored %d offer(s) from %d text(s)", len(offers), offers_added, len(data.texts))
+
+        return UploadBatchResponse(
+            message="Offers successfully extracted and stored.",
+            offers_added=offers_added,
+            offers_per_text=[len(text_offers) for text_offers in extracted]
         )
 
     except Exception as e:
-        logger.error("Error during upload processing")
-        traceback.print_exc()  # Full stack trace to console
-        logger.error(f"Exception detail: {str(e)}")
+        logger.error("Error during batch upload processing: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,72 @@
+"""
+Import-time benchmark for the backend.
+    python benchmarks/bench_import.py [--module app.main] [--runs 5] [--top 15]
+
+Imports the module in fresh interpreters (`python -X importtime`) and reports the
+median wall time, the slowest modules by cumulative import time, and which heavy
+dependencies were loaded. Only FastAPI and the app's own light modules should be
+needed to serve /ping; LangChain, OpenAI and Chroma load with the first agent.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("chromadb", "langchain_openai", "langchain_core", "langchain_classic", "openai")
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-bench")
+    env.setdefault("ANONYMIZED_TELEMETRY", "False")
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def measure(module: str):
+    """(wall seconds, [(cumulative us, module)], heavy modules loaded) for one cold import."""
+    probe = (
+        f"import sys, time; t = time.perf_counter(); import {module}; "
+        f"print('WALL', time.perf_counter() - t); "
+        f"print('HEAVY', ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=PROJECT_ROOT,
+                            env=_env(), capture_output=True, text=True, check=True)
+    wall, heavy = time.perf_counter() - start, []
+    for line in result.stdout.splitlines():
+        if line.startswith("WALL "):
+            wall = float(line.split()[1])
+        elif line.startswith("HEAVY"):
+            heavy = [m for m in line[len("HEAVY"):].strip().split(",") if m]
+    modules = [(int(m.group(2)), m.group(4)) for m in map(IMPORTTIME_LINE.match, result.stderr.splitlines()) if m]
+    return wall, sorted(modules, reverse=True), heavy
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    walls = [wall for wall, _, _ in runs]
+    _, modules, heavy = runs[-1]
+
+    print(f"import {args.module}: median {statistics.median(walls) * 1000:.0f} ms, "
+          f"min {min(walls) * 1000:.0f} ms over {args.runs} run(s)")
+    print(f"heavy dependencies loaded: {', '.join(heavy) or 'none'}")
+    print("\nslowest modules (cumulative, last run):")
+    for cumulative_us, name in modules[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
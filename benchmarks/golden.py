@@ -0,0 +1,419 @@
+"""
+Golden-set regression harness: answer accuracy next to latency and cost, per pipeline mode.
+    python benchmarks/golden.py [--modes full,routed,cached,local,offline] [--record] [--json]
+
+The cases in examples/2_Queries.md (query → recommended supplier) are run through the
+real /evaluate-offers pipeline against a fresh store built from benchmarks/fixtures/golden_offers.json.
+Each mode switches on one of the faster paths:
+
+    full     - every evaluation and summary goes to the LLM (router and memo off)
+    routed   - ModelRouter picks skip / gpt-4o-mini / gpt-4o per query
+    cached   - full with the evaluation memo on, measured on a second pass once the memo is warm
+    local    - no LLM: a budget under MIN_LLM_BUDGET_MS forces local ranking and template summaries
+    offline  - local, with a hashing embedder instead of OpenAI embeddings (no network at all)
+
+Model calls are replayed from benchmarks/fixtures/golden_recordings.json. With --record
+(and OPENAI_API_KEY) missing calls go to OpenAI and are saved. Calls with no recording are
+answered by a deterministic stub (the priority-chain winner, whatever the model), so the
+pipeline still runs end to end; the mode's source is then "stub" and its accuracy is
+reported as unavailable. Without recorded embeddings every mode uses the hashing embedder,
+which makes offline the same pipeline as local (noted in the report). What the modes
+still show without recordings is their own behaviour: routing decisions, LLM calls,
+memo hits, latency and token cost.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from app.core import config  # noqa: E402
+from app.core.usage import estimate_tokens, record_usage, track_request  # noqa: E402
+
+QUERIES_FILE = os.path.join(PROJECT_ROOT, "examples", "2_Queries.md")
+OFFERS_FILE = os.path.join(PROJECT_ROOT, "benchmarks", "fixtures", "golden_offers.json")
+RECORDINGS_FILE = os.path.join(PROJECT_ROOT, "benchmarks", "fixtures", "golden_recordings.json")
+MODES = ("full", "routed", "cached", "local", "offline")
+NO_OFFER = "No Offer"
+
+
+# ----------- Golden Cases -----------
+
+@dataclass
+class GoldenCase:
+    number: int
+    query: str
+    expected_supplier: str
+    expected_reasoning: str = ""
+
+
+def _section(block: str, title: str) -> str:
+    match = re.search(rf"\*\*{title}\*\*\s*\n(.*?)(?=\n\*\*|\Z)", block, re.S)
+    return match.group(1).strip() if match else ""
+
+
+def parse_cases(path: str = QUERIES_FILE) -> List[GoldenCase]:
+    """Parses the "### Query N" blocks of the examples file."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    cases = []
+    for number, block in re.findall(r"^### Query (\d+)\s*\n(.*?)(?=^### Query |\Z)", text, re.S | re.M):
+        query = block.strip().split("\n\n", 1)[0].strip()
+        cases.append(GoldenCase(int(number), query, _section(block, "Recommended Supplier"),
+                                _section(block, "Reasoning")))
+    return cases
+
+
+def same_supplier(answer: Optional[str], expected: str) -> bool:
+    return (answer or NO_OFFER).strip().lower() == expected.strip().lower()
+
+
+# ----------- Recorded / Stubbed Models -----------
+
+class Recordings:
+    """Model responses keyed on (model, prompt), persisted as JSON."""
+
+    def __init__(self, path: str = RECORDINGS_FILE, record: bool = False):
+        self.path = path
+        self.record = record
+        self.data = {"llm": {}, "embeddings": {}}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.data.update(json.load(f))
+        self.sources = set()
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\n{prompt}".encode()).hexdigest()
+
+    def save(self):
+        if self.record:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f)
+
+
+def _prompt_text(prompt) -> str:
+    """Messages (evaluator) or chain inputs (summarizer) as one string."""
+    if isinstance(prompt, dict):
+        return json.dumps(prompt, sort_keys=True)
+    return "\n".join(getattr(m, "content", str(m)) for m in prompt)
+
+
+def _stub_evaluation(prompt_text: str) -> str:
+    """Evaluator stand-in: the priority-chain winner of the offers listed in the prompt."""
+    from app.agents.ranking import explain_choice, rank_offers
+
+    offers = json.loads(prompt_text.rsplit("(JSON list):", 1)[1])
+    ranked = rank_offers(offers)
+    explanation = explain_choice(ranked[0], ranked)
+    return "```json\n" + json.dumps({
+        "supplier": ranked[0]["supplier"],
+        "reason": explanation.get("evaluation_reason", ""),
+        "score_explanation": explanation.get("score_explanation", ""),
+        "priority_breakdown": explanation.get("priority_breakdown", ""),
+    }) + "\n```"
+
+
+def _stub_summary(inputs: Dict) -> str:
+    from app.agents.summarizer import SummarizerAgent
+    return SummarizerAgent.template_summary(json.loads(inputs["best_offer"]))
+
+
+class ReplayModel:
+    """
+    Stands in for a chat model (evaluator: `.invoke(messages)`) or the summarizer chain
+    (`.invoke(inputs)`), replaying, recording or stubbing the response and recording usage.
+    """
+
+    def __init__(self, agent: str, model: str, recordings: Recordings, chain: bool = False):
+        self.agent = agent
+        self.model = model
+        self.recordings = recordings
+        self.chain = chain
+        self.calls = 0
+
+    def _live(self, prompt):
+        from langchain_openai import ChatOpenAI
+        response = ChatOpenAI(model=self.model, temperature=0).invoke(
+            prompt if not self.chain else _live_summary_messages(prompt))
+        usage = response.usage_metadata or {}
+        return response.content, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+    def invoke(self, prompt, config=None, **kwargs):
+        self.calls += 1
+        start = time.perf_counter()
+        text = _prompt_text(prompt)
+        key = Recordings.key(self.model, text)
+        entry = self.recordings.data["llm"].get(key)
+        if entry is not None:
+            self.recordings.sources.add("replay")
+        elif self.recordings.record:
+            content, prompt_tokens, completion_tokens = self._live(prompt)
+            entry = self.recordings.data["llm"][key] = {
+                "content": content, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+            self.recordings.sources.add("live")
+        else:
+            content = _stub_summary(prompt) if self.chain else _stub_evaluation(text)
+            entry = {"content": content, "prompt_tokens": estimate_tokens([text]),
+                     "completion_tokens": estimate_tokens([content])}
+            self.recordings.sources.add("stub")
+        record_usage(self.agent, self.model, entry["prompt_tokens"], entry["completion_tokens"],
+                     time.perf_counter() - start)
+        return entry["content"] if self.chain else SimpleNamespace(content=entry["content"])
+
+
+def _live_summary_messages(inputs: Dict):
+    from app.agents import get_summarizer
+    return get_summarizer().prompt.format_messages(**inputs)
+
+
+class HashingEmbedder:
+    """Offline bag-of-words embedder (hashed tokens, L2-normalized)."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+
+    def _embed(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            vec[int(hashlib.md5(token.encode()).hexdigest(), 16) % self.dim] += 1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class ReplayEmbedder:
+    """OpenAI embeddings replayed from the recordings (fetched and saved with --record)."""
+
+    model = "text-embedding-3-small"
+
+    def __init__(self, recordings: Recordings):
+        self.recordings = recordings
+
+    def _vectors(self, texts: List[str]) -> List[List[float]]:
+        store = self.recordings.data["embeddings"]
+        missing = [t for t in texts if Recordings.key(self.model, t) not in store]
+        if missing:
+            if not self.recordings.record:
+                raise LookupError(f"{len(missing)} embedding(s) not recorded; run with --record")
+            from langchain_openai import OpenAIEmbeddings
+            for text, vector in zip(missing, OpenAIEmbeddings(model=self.model).embed_documents(missing)):
+                store[Recordings.key(self.model, text)] = vector
+        return [store[Recordings.key(self.model, t)] for t in texts]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._vectors(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vectors([text])[0]
+
+
+# ----------- Pipeline Modes -----------
+
+@dataclass
+class ModeReport:
+    mode: str
+    cases: int = 0
+    correct: int = 0
+    retrieved: int = 0
+    latencies_ms: List[float] = field(default_factory=list)
+    llm_calls: int = 0
+    memo_hits: int = 0
+    routes: Dict[str, int] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    source: str = ""
+    embedder: str = ""
+    misses: List[Dict] = field(default_factory=list)
+    notes: List[str] = field(default_factory=list)
+    skipped: str = ""
+
+    @property
+    def stubbed(self) -> bool:
+        """Some answers came from the stub, so accuracy says nothing about the models."""
+        return "stub" in self.source.split(",")
+
+    @property
+    def accuracy(self) -> Optional[float]:
+        if self.stubbed:
+            return None
+        return self.correct / self.cases if self.cases else 0.0
+
+    def summary(self) -> Dict:
+        data = asdict(self)
+        data.pop("latencies_ms")
+        data["accuracy"] = None if self.accuracy is None else round(self.accuracy, 3)
+        data["retrieval_hit_rate"] = round(self.retrieved / self.cases, 3) if self.cases else 0.0
+        data["p50_ms"] = round(statistics.median(self.latencies_ms), 1) if self.latencies_ms else None
+        data["p95_ms"] = round(sorted(self.latencies_ms)[int(0.95 * (len(self.latencies_ms) - 1))], 1) if self.latencies_ms else None
+        data["cost_usd"] = round(self.cost_usd, 6)
+        return data
+
+
+def _embedder(mode: str, recordings: Recordings):
+    """OpenAI embeddings (replayed or recorded) where available, otherwise the hashing embedder."""
+    if mode != "offline" and (recordings.record or recordings.data["embeddings"]):
+        return ReplayEmbedder(recordings)
+    return HashingEmbedder()
+
+
+def _build_agents(mode: str, recordings: Recordings, store_dir: str):
+    """
+    Fresh retriever/evaluator/summarizer for one mode, installed as the shared agents.
+    Returns the evaluator and the embedding model name.
+    """
+    from app.agents import EvaluatorAgent, RetrieverAgent, SummarizerAgent, set_shared
+    from app.agents.routing import ModelRouter
+    from app.core.memo import EvaluationMemo
+    from app.models.models import Offer
+
+    router = ModelRouter(enabled=mode not in ("full", "cached"))
+    evaluator = EvaluatorAgent(router=router, memo=EvaluationMemo(enabled=mode == "cached"))
+    evaluator.llm = ReplayModel("evaluator", evaluator.model_name, recordings)
+    for model in {router.simple_model, router.complex_model} - {evaluator.model_name}:
+        evaluator._llms[model] = ReplayModel("evaluator", model, recordings)
+    summarizer = SummarizerAgent(router=router)
+    summarizer.chain = ReplayModel("summarizer", router.simple_model, recordings, chain=True)
+
+    retriever = RetrieverAgent(persist_dir=os.path.join(store_dir, mode))
+    retriever.embedder = _embedder(mode, recordings)
+    with open(OFFERS_FILE, encoding="utf-8") as f:
+        retriever.add_offers([Offer(**o) for o in json.load(f)["offers"]])
+
+    set_shared("RetrieverAgent", retriever)
+    set_shared("EvaluatorAgent", evaluator)
+    set_shared("SummarizerAgent", summarizer)
+    return evaluator, retriever.embedder.model
+
+
+def run_mode(mode: str, cases: List[GoldenCase], recordings: Recordings, store_dir: str) -> ModeReport:
+    from app.routes.query import QueryRequest, query_offers
+
+    report = ModeReport(mode)
+    recordings.sources = set()
+    try:
+        evaluator, report.embedder = _build_agents(mode, recordings, store_dir)
+        # The retriever books hashing-embedder calls as OpenAI embeddings; they cost nothing
+        counted = ("llm",) if report.embedder.startswith("hashing") else ("llm", "embedding")
+        # Enough for retrieval, too little to start an LLM call
+        deadline_ms = config.MIN_LLM_BUDGET_MS - 1 if mode in ("local", "offline") else None
+        passes = 2 if mode == "cached" else 1
+        for pass_number in range(passes):
+            measured = pass_number == passes - 1
+            memo_hits = evaluator.memo.hits
+            for case in cases:
+                start = time.perf_counter()
+                with track_request("golden") as usage:
+                    response = query_offers(QueryRequest(query=case.query, deadline_ms=deadline_ms))
+                if not measured:
+                    continue
+                report.latencies_ms.append((time.perf_counter() - start) * 1000)
+                llm = [r for r in usage.records if r.kind == "llm"]
+                report.llm_calls += len(llm)
+                report.prompt_tokens += sum(r.prompt_tokens for r in llm)
+                report.completion_tokens += sum(r.completion_tokens for r in llm)
+                report.cost_usd += sum(r.cost_usd for r in usage.records if r.kind in counted)
+                report.cases += 1
+                route = response.model_route or "none"
+                report.routes[route] = report.routes.get(route, 0) + 1
+                offered = {o.supplier.lower() for o in response.offers_evaluated}
+                report.retrieved += case.expected_supplier == NO_OFFER or case.expected_supplier.lower() in offered
+                if same_supplier(response.recommendation, case.expected_supplier):
+                    report.correct += 1
+                else:
+                    report.misses.append({"case": case.number, "expected": case.expected_supplier,
+                                          "got": response.recommendation})
+            if measured:
+                report.memo_hits = evaluator.memo.hits - memo_hits
+    except LookupError as e:
+        report.skipped = str(e)
+    report.source = ",".join(sorted(recordings.sources)) or "none"
+    if report.stubbed:
+        report.notes.append("accuracy unavailable: model calls answered by the stub (run with --record)")
+    if mode == "offline" and report.embedder.startswith("hashing") and not recordings.data["embeddings"]:
+        report.notes.append("same pipeline as local: no recorded embeddings")
+    return report
+
+
+def run(modes=MODES, record: bool = False, cases: Optional[List[GoldenCase]] = None) -> List[ModeReport]:
+    cases = cases or parse_cases()
+    recordings = Recordings(record=record)
+    from app.agents import set_shared
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="golden_") as store_dir:
+            reports = [run_mode(mode, cases, recordings, store_dir) for mode in modes]
+    finally:
+        for name in ("RetrieverAgent", "EvaluatorAgent", "SummarizerAgent"):
+            set_shared(name, None)
+    recordings.save()
+    return reports
+
+
+def _print_table(reports: List[ModeReport]):
+    print(f"{'mode':<9} {'accuracy':>9} {'retrieval':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'LLM calls':>9} {'memo hits':>9} {'tokens in/out':>15} {'cost $':>10}  source / embedder / routes")
+    for report in reports:
+        s = report.summary()
+        if report.skipped:
+            print(f"{report.mode:<9} skipped: {report.skipped}")
+            continue
+        accuracy = "n/a" if report.accuracy is None else f"{report.correct}/{report.cases}"
+        routes = ",".join(f"{route}={n}" for route, n in sorted(report.routes.items()))
+        print(f"{report.mode:<9} {accuracy:>9} {s['retrieval_hit_rate']:>9.0%} "
+              f"{s['p50_ms']:>8} {s['p95_ms']:>8} {report.llm_calls:>9} {report.memo_hits:>9} "
+              f"{report.prompt_tokens:>7}/{report.completion_tokens:<7} {s['cost_usd']:>10.5f}  "
+              f"{report.source} / {report.embedder} / {routes}")
+    for report in reports:
+        for note in report.notes:
+            print(f"  {report.mode}: {note}")
+    for report in reports:
+        if report.accuracy is None:
+            continue
+        for miss in report.misses:
+            print(f"  {report.mode}: query {miss['case']} expected {miss['expected']!r}, got {miss['got']!r}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated subset of " + ", ".join(MODES))
+    parser.add_argument("--record", action="store_true", help="Call OpenAI for missing recordings and save them")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = parser.parse_args(argv)
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(sorted(unknown))}")
+
+    reports = run(modes, record=args.record)
+    if args.json:
+        print(json.dumps([r.summary() for r in reports], indent=2))
+    else:
+        _print_table(reports)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
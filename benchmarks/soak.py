@@ -0,0 +1,425 @@
+"""
+Concurrency soak test: mixed ingest and query traffic against the real FastAPI app.
+    python benchmarks/soak.py [--concurrency 1,4,16,32] [--duration 10] [--write-ratio 0.2]
+                              [--rate 0] [--llm-ms 50] [--embed-ms 5] [--threadpool 40] [--json]
+
+app.main.app is served by uvicorn on a local port (lifespan off: no warmup or maintenance
+threads) and driven over HTTP by `concurrency` client threads per level. Each request is an
+/ingest-offers (probability --write-ratio) or an /evaluate-offers call. Model backends are
+stubbed so the run measures the service, not OpenAI:
+
+    extractor   - parses the generated quotation after --llm-ms
+    evaluator   - priority-chain stub (benchmarks/golden.py) after --llm-ms
+    summarizer  - template summary after --llm-ms
+    embeddings  - hashing embedder after --embed-ms
+
+The store is real (a fresh persistent Chroma store seeded with the golden offers), as are
+routing, threadpool dispatch and the retriever's write lock. --rate paces the total request
+rate per level (0 = closed loop, as fast as the clients get answers).
+
+Per concurrency level the report gives throughput, p50/p95/p99 latency and error rate per
+route, the time requests waited for a threadpool thread, and the wait for and hold time of
+the retriever's write lock. The saturation point is the last level that still raised
+throughput by SATURATION_GAIN or more over the level before.
+"""
+import argparse
+import contextvars
+import functools
+import json
+import os
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from benchmarks.golden import OFFERS_FILE, HashingEmbedder, Recordings, ReplayModel, parse_cases  # noqa: E402
+
+PREFIX = "/procure-sense-rag"
+INGEST, QUERY = f"{PREFIX}/ingest-offers", f"{PREFIX}/evaluate-offers"
+SATURATION_GAIN = 0.10
+EXTRA_QUERIES = [
+    "Cheapest 10mm steel bolts under $1 delivered within 10 days",
+    "Reliable supplier for 12mm steel bolts for a large order of 5,000 units",
+    "Fastest delivery for 6mm steel bolts",
+]
+QUOTE = re.compile(r"(?P<supplier>.+?) offers (?P<size>\d+)mm steel bolts at \$(?P<price>[\d.]+) per unit\. "
+                   r"Delivery in (?P<days>\d+) days\. (?P<risk>.+)$")
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+
+# ----------- Stubbed Backends -----------
+
+class SlowModel:
+    """Adds a fixed latency in front of a stub chat model or chain."""
+
+    def __init__(self, inner, delay_s: float):
+        self.inner = inner
+        self.delay_s = delay_s
+
+    def invoke(self, *args, **kwargs):
+        time.sleep(self.delay_s)
+        return self.inner.invoke(*args, **kwargs)
+
+
+class SlowEmbedder:
+    def __init__(self, inner, delay_s: float):
+        self.inner = inner
+        self.delay_s = delay_s
+        self.model = inner.model
+
+    def embed_documents(self, texts):
+        time.sleep(self.delay_s)
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text):
+        time.sleep(self.delay_s)
+        return self.inner.embed_query(text)
+
+
+class StubExtractor:
+    """One offer per generated quotation, after the simulated extraction latency."""
+
+    def __init__(self, delay_s: float):
+        self.delay_s = delay_s
+
+    def stream_offers(self, text: str):
+        from app.models.models import Offer
+
+        time.sleep(self.delay_s)
+        match = QUOTE.match(text.strip())
+        if not match:
+            raise ValueError("LLM output did not contain an offers list.")
+        yield Offer(supplier=match["supplier"], item=f"{match['size']}mm steel bolt",
+                    product_id=f"SB-{match['size']}", unit_price=float(match["price"]),
+                    delivery_days=int(match["days"]), payment_terms="Net 30",
+                    risk_note=match["risk"], raw_text=text)
+
+    def extract_offers(self, text: str):
+        return list(self.stream_offers(text))
+
+
+class TimedLock:
+    """Drop-in for the retriever's write lock that records wait and hold times."""
+
+    def __init__(self, stats: "Collector"):
+        self._lock = threading.Lock()
+        self._stats = stats
+        self._acquired_at = 0.0
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        self._stats.add("lock_wait_ms", (self._acquired_at - start) * 1000)
+        return self
+
+    def __exit__(self, *exc):
+        self._stats.add("lock_hold_ms", (time.perf_counter() - self._acquired_at) * 1000)
+        self._lock.release()
+
+
+def build_agents(store_dir: str, stats: "Collector", llm_ms: float, embed_ms: float, memo: bool):
+    """Installs the stubbed agents (on a fresh store seeded with the golden offers) as the shared ones."""
+    from app.agents import EvaluatorAgent, RetrieverAgent, SummarizerAgent, set_shared
+    from app.core.memo import EvaluationMemo
+    from app.models.models import Offer
+
+    stubs = Recordings(path="")
+    evaluator = EvaluatorAgent(memo=EvaluationMemo(enabled=memo))
+    evaluator.llm = SlowModel(ReplayModel("evaluator", evaluator.model_name, stubs), llm_ms / 1000)
+    for model in {evaluator.router.simple_model, evaluator.router.complex_model} - {evaluator.model_name}:
+        evaluator._llms[model] = SlowModel(ReplayModel("evaluator", model, stubs), llm_ms / 1000)
+    summarizer = SummarizerAgent()
+    summarizer.chain = SlowModel(ReplayModel("summarizer", summarizer.router.simple_model, stubs, chain=True), llm_ms / 1000)
+
+    retriever = RetrieverAgent(persist_dir=store_dir)
+    retriever.embedder = SlowEmbedder(HashingEmbedder(), embed_ms / 1000)
+    with open(OFFERS_FILE, encoding="utf-8") as f:
+        retriever.add_offers([Offer(**o) for o in json.load(f)["offers"]])
+    retriever._write_lock = TimedLock(stats)
+
+    set_shared("RetrieverAgent", retriever)
+    set_shared("ExtractorAgent", StubExtractor(llm_ms / 1000))
+    set_shared("EvaluatorAgent", evaluator)
+    set_shared("SummarizerAgent", summarizer)
+
+
+# ----------- Server & Instrumentation -----------
+
+class Collector:
+    """Thread-safe samples for the level being measured."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+
+    def add(self, name: str, value: float):
+        with self._lock:
+            self.samples.setdefault(name, []).append(value)
+
+    def drain(self) -> Dict[str, List[float]]:
+        with self._lock:
+            samples, self.samples = self.samples, {}
+        return samples
+
+
+_arrived_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("soak_arrived_at", default=None)
+
+
+class InstrumentedApp:
+    """ASGI wrapper: stamps each request's arrival and sizes the threadpool on the server loop."""
+
+    def __init__(self, app, threadpool: int):
+        self.app = app
+        self.threadpool = threadpool
+        self._sized = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            if not self._sized:
+                import anyio.to_thread
+                anyio.to_thread.current_default_thread_limiter().total_tokens = self.threadpool
+                self._sized = True
+            _arrived_at.set(time.perf_counter())
+        await self.app(scope, receive, send)
+
+
+def instrument_routes(app, stats: Collector, paths=(INGEST, QUERY)) -> Callable[[], None]:
+    """
+    Records how long each sync endpoint waited between arrival and a threadpool thread picking it up.
+    Returns a function that puts the original endpoints back, so the next run records into its own Collector.
+    """
+    originals = []
+    for route in app.routes:
+        if getattr(route, "path", None) in paths:
+            call = route.dependant.call
+
+            @functools.wraps(call)
+            def timed(*args, _call=call, **kwargs):
+                arrived = _arrived_at.get()
+                if arrived is not None:
+                    stats.add("pool_wait_ms", (time.perf_counter() - arrived) * 1000)
+                return _call(*args, **kwargs)
+
+            originals.append((route, call))
+            route.dependant.call = timed
+
+    def restore():
+        for route, call in originals:
+            route.dependant.call = call
+
+    return restore
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(asgi_app):
+    """Starts uvicorn on a background thread; returns (server, thread, base url) once it accepts requests."""
+    import uvicorn
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=port, lifespan="off",
+                                           log_level="error", access_log=False))
+    thread = threading.Thread(target=server.run, name="soak-server", daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("uvicorn did not start within 10s")
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+# ----------- Load Generation -----------
+
+@dataclass
+class LevelReport:
+    concurrency: int
+    duration_s: float = 0.0
+    latencies_ms: Dict[str, List[float]] = field(default_factory=lambda: {"ingest": [], "query": []})
+    errors: Dict[str, Counter] = field(default_factory=lambda: {"ingest": Counter(), "query": Counter()})
+    samples: Dict[str, List[float]] = field(default_factory=dict)
+
+    def summary(self) -> Dict:
+        total = sum(len(v) for v in self.latencies_ms.values())
+        routes = {}
+        for op, latencies in self.latencies_ms.items():
+            failed = sum(self.errors[op].values())
+            routes[op] = {
+                "requests": len(latencies),
+                "throughput_rps": round(len(latencies) / self.duration_s, 1) if self.duration_s else 0.0,
+                "error_rate": round(failed / len(latencies), 4) if latencies else 0.0,
+                "errors": dict(self.errors[op]),
+                "p50_ms": _percentile(latencies, 0.50),
+                "p95_ms": _percentile(latencies, 0.95),
+                "p99_ms": _percentile(latencies, 0.99),
+                "max_ms": round(max(latencies), 2) if latencies else None,
+            }
+        pool, lock_wait, lock_hold = (self.samples.get(n, []) for n in ("pool_wait_ms", "lock_wait_ms", "lock_hold_ms"))
+        return {
+            "concurrency": self.concurrency,
+            "throughput_rps": round(total / self.duration_s, 1) if self.duration_s else 0.0,
+            "error_rate": round(sum(sum(c.values()) for c in self.errors.values()) / total, 4) if total else 0.0,
+            "routes": routes,
+            "pool_wait_ms": {"p50": _percentile(pool, 0.50), "p95": _percentile(pool, 0.95),
+                             "max": round(max(pool), 2) if pool else None},
+            "write_lock": {"acquisitions": len(lock_wait), "wait_total_ms": round(sum(lock_wait), 1),
+                           "wait_p95_ms": _percentile(lock_wait, 0.95), "hold_total_ms": round(sum(lock_hold), 1)},
+        }
+
+
+def _quotation(n: int, rng: random.Random) -> str:
+    risk = rng.choice(["Low risk, reliable on-time delivery.", "Moderate risk, occasional delays.",
+                       "High risk, quality issues last year."])
+    return (f"Soak Supplier {n} offers {rng.choice([6, 10, 12])}mm steel bolts at ${rng.uniform(0.4, 1.6):.2f} "
+            f"per unit. Delivery in {rng.randint(3, 30)} days. {risk}")
+
+
+def run_level(base_url: str, concurrency: int, duration_s: float, write_ratio: float, rate: float,
+              queries: List[str], stats: Collector, seed: int) -> LevelReport:
+    import httpx
+
+    report = LevelReport(concurrency)
+    lock = threading.Lock()
+    counter = iter(range(seed * 1_000_000, sys.maxsize))
+    stop_at = time.perf_counter() + duration_s
+    interval = concurrency / rate if rate > 0 else 0.0
+
+    def worker(index: int):
+        rng = random.Random(seed * 1000 + index)
+        next_at = time.perf_counter() + rng.uniform(0, interval)
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            while True:
+                if interval:
+                    time.sleep(max(0.0, next_at - time.perf_counter()))
+                    next_at += interval
+                if time.perf_counter() >= stop_at:
+                    return
+                if rng.random() < write_ratio:
+                    op, path, body = "ingest", INGEST, {"text": _quotation(next(counter), rng)}
+                else:
+                    op, path, body = "query", QUERY, {"query": rng.choice(queries), "top_k": 5}
+                start = time.perf_counter()
+                try:
+                    status = client.post(path, json=body).status_code
+                    error = str(status) if status >= 400 else None
+                except httpx.HTTPError as e:
+                    error = type(e).__name__
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                with lock:
+                    report.latencies_ms[op].append(elapsed_ms)
+                    if error:
+                        report.errors[op][error] += 1
+
+    stats.drain()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), name=f"soak-client-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report.duration_s = time.perf_counter() - start
+    report.samples = stats.drain()
+    return report
+
+
+def saturation_point(reports: List[LevelReport]) -> Optional[int]:
+    """The last concurrency level that still raised throughput by SATURATION_GAIN (None if every level did)."""
+    for previous, current in zip(reports, reports[1:]):
+        gain = current.summary()["throughput_rps"] / max(previous.summary()["throughput_rps"], 1e-9) - 1
+        if gain < SATURATION_GAIN:
+            return previous.concurrency
+    return None
+
+
+def run(levels=(1, 4, 16, 32), duration_s: float = 10.0, write_ratio: float = 0.2, rate: float = 0.0,
+        llm_ms: float = 50.0, embed_ms: float = 5.0, threadpool: int = 40, memo: bool = True,
+        seed: int = 7) -> List[LevelReport]:
+    import app.main
+    from app.agents import set_shared
+
+    stats = Collector()
+    queries = [case.query for case in parse_cases()] + EXTRA_QUERIES
+    restore_routes = instrument_routes(app.main.app, stats)
+    try:
+        with tempfile.TemporaryDirectory(prefix="soak_") as store_dir:
+            build_agents(store_dir, stats, llm_ms, embed_ms, memo)
+            server, thread, base_url = serve(InstrumentedApp(app.main.app, threadpool))
+            try:
+                return [run_level(base_url, level, duration_s, write_ratio, rate, queries, stats, seed + i)
+                        for i, level in enumerate(levels)]
+            finally:
+                server.should_exit = True
+                thread.join(timeout=10)
+    finally:
+        restore_routes()
+        for name in ("RetrieverAgent", "ExtractorAgent", "EvaluatorAgent", "SummarizerAgent"):
+            set_shared(name, None)
+
+
+def _print_table(reports: List[LevelReport]):
+    print(f"{'clients':>7} {'req/s':>7} {'errors':>7}   {'query p50/p95/p99 ms':>22}   {'ingest p50/p95/p99 ms':>22}"
+          f" {'pool wait p95':>13} {'lock wait total':>15}")
+    for report in reports:
+        s = report.summary()
+        q, i = (f"{r['p50_ms']}/{r['p95_ms']}/{r['p99_ms']}" for r in (s["routes"]["query"], s["routes"]["ingest"]))
+        print(f"{s['concurrency']:>7} {s['throughput_rps']:>7} {s['error_rate']:>7.2%}   {q:>22}   {i:>22} "
+              f"{s['pool_wait_ms']['p95']!s:>13} {s['write_lock']['wait_total_ms']:>15}")
+    for report in reports:
+        for op, errors in report.errors.items():
+            for error, count in errors.items():
+                print(f"  {report.concurrency} clients: {count} x {error} on {op}")
+    point = saturation_point(reports)
+    print(f"saturation: {f'~{point} clients' if point else 'not reached'} "
+          f"(throughput gain below {SATURATION_GAIN:.0%} beyond that level)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16,32", help="Comma-separated client counts, one level each")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="Share of requests that ingest")
+    parser.add_argument("--rate", type=float, default=0.0, help="Total requests/s per level (0 = closed loop)")
+    parser.add_argument("--llm-ms", type=float, default=50.0, help="Simulated latency of each stubbed LLM call")
+    parser.add_argument("--embed-ms", type=float, default=5.0, help="Simulated latency of each embedding call")
+    parser.add_argument("--threadpool", type=int, default=40, help="Threads serving sync endpoints")
+    parser.add_argument("--no-memo", action="store_true", help="Disable the evaluation memo")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = parser.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    reports = run(levels, args.duration, args.write_ratio, args.rate, args.llm_ms, args.embed_ms,
+                  args.threadpool, memo=not args.no_memo, seed=args.seed)
+    if args.json:
+        print(json.dumps({"levels": [r.summary() for r in reports], "saturation": saturation_point(reports)},
+                         indent=2))
+    else:
+        _print_table(reports)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Backend client shared by the Streamlit pages.
+Keeps one pooled HTTP session per Streamlit server and a TTL cache of query
+responses that the upload page clears whenever new offers are ingested. Uploads
+from other clients (or the API directly) do not clear it, so the TTL bounds how
+long an answer can miss newly ingested offers.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+BASE_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+QUERY_URL = f"{BASE_URL}/procure-sense-rag/evaluate-offers"
+QUERY_STREAM_URL = f"{QUERY_URL}/stream"
+UPLOAD_URL = f"{BASE_URL}/procure-sense-rag/ingest-offers"
+
+# Also the staleness bound for offers ingested outside this frontend
+QUERY_CACHE_TTL_S = int(os.getenv("QUERY_CACHE_TTL_S", "60"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+# (connect, read) timeouts; evaluation can take a while on a cold backend
+REQUEST_TIMEOUT = (5, 120)
+
+
+class QueryCache:
+    """Thread-safe TTL cache of final query responses, keyed on the normalized query."""
+
+    def __init__(self, ttl_s: int, max_entries: int):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def get(self, query: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(self._key(query))
+            if entry and time.monotonic() - entry[0] < self.ttl_s:
+                return entry[1]
+            return None
+
+    def put(self, query: str, response: Dict):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[self._key(query)] = (time.monotonic(), response)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One keep-alive connection pool shared by every page and user session."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_resource
+def get_query_cache() -> QueryCache:
+    return QueryCache(QUERY_CACHE_TTL_S, QUERY_CACHE_MAX_ENTRIES)
+
+
+def clear_query_cache():
+    """Invalidation hook: cached answers may be stale once new offers are uploaded."""
+    get_query_cache().clear()
+
+
+def stream_query(query: str) -> Iterator[Dict]:
+    """
+    Yields the backend's pipeline events as they arrive ("offers", "recommendation",
+    "reasoning", then "done" with the full response, or "error" if the pipeline failed).
+    The final response is cached unless it is degraded, so a fallback answer given under
+    load is not served again once the backend has recovered.
+    """
+    with get_session().post(QUERY_STREAM_URL, json={"query": query}, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event.get("event") == "done" and not event.get("degraded"):
+                get_query_cache().put(query, event)
+            yield event
+
+
+def upload_offers(text: str) -> requests.Response:
+    response = get_session().post(UPLOAD_URL, json={"text": text}, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 200:
+        clear_query_cache()
+    return response
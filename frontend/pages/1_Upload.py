@@ -1,13 +1,10 @@
 import streamlit as st
-import requests
-import os
+
+from api import upload_offers
 
 st.set_page_config(page_title="Upload Offers", page_icon="📤")
 st.title("📤 Upload Supplier Offer")
 
-BASE_URL = os.getenv("BACKEND_URL", "http://localhost:8000") 
-UPLOAD_URL = f"{BASE_URL}/procure-sense-rag/ingest-offers"
-
 with st.form("upload_form"):
     quotation_text = st.text_area(
         "Paste supplier quotation text:",
@@ -19,7 +16,8 @@ with st.form("upload_form"):
 if submitted:
     if quotation_text.strip():
         try:
-            response = requests.post(UPLOAD_URL, json={"text": quotation_text})
+            # Also clears cached query answers, which may no longer be the best offer
+            response = upload_offers(quotation_text)
             if response.status_code == 200:
                 data = response.json()
                 st.success(f"{data['offers_added']} offer(s) uploaded successfully!")
@@ -1,14 +1,15 @@
+import math
+
+import pandas as pd
 import streamlit as st
-import requests
-import os
-import json
+
+from api import get_query_cache, stream_query
 
 st.set_page_config(page_title="Query Offers", page_icon="🔍")
 st.title("🔍 Query Supplier Offers")
 
-# Use environment variable for backend 
-BASE_URL = os.getenv("BACKEND_URL", "http://localhost:8000")  
-QUERY_URL = f"{BASE_URL}/procure-sense-rag/evaluate-offers" 
+PAGE_SIZES = [10, 25, 50]
+SORT_COLUMNS = {"Relevance": [], "Unit price": ["unit_price"], "Delivery": ["delivery_days"], "Supplier": ["supplier"]}
 
 with st.form("query_form"):
     query_text = st.text_input(
@@ -17,38 +18,85 @@ with st.form("query_form"):
     )
     submitted = st.form_submit_button("Search")
 
-if submitted:
-    if query_text.strip():
-        try:
-            # Send the updated payload
-            response = requests.post(QUERY_URL, json={"query": query_text})
+# Results survive reruns (pagination, sorting) without another backend call
+recommendation_slot = st.empty()
+reasoning_slot = st.empty()
+offers_slot = st.empty()
+
 
-            if response.status_code == 200:
-                data = response.json()
+def offers_frame(offers):
+    return pd.DataFrame(offers, columns=["supplier", "item", "unit_price", "delivery_days", "risk_assessment"])
 
-                # Recommendation
-                st.subheader("✅ Recommended Supplier")
-                st.write(data.get("recommendation", "No recommendation returned."))
 
-                # Reasoning
-                st.subheader("📌 Reasoning")
-                st.write(data.get("reasoning", "No reasoning provided."))
+def show_recommendation(data):
+    with recommendation_slot.container():
+        st.subheader("✅ Recommended Supplier")
+        st.write(data.get("recommendation") or "No recommendation returned.")
 
-                # All evaluated offers
-                st.subheader("📦 Offers Evaluated")
-                offers = data.get("offers_evaluated", [])
-                if offers:
-                    for idx, offer in enumerate(offers, 1):
-                        st.markdown(f"**Offer #{idx}**")
-                        st.json(offer)
-                else:
-                    st.write("No offers evaluated.")
 
-            else:
-                st.error(f" Query failed: {response.text}")
+def show_reasoning(data):
+    with reasoning_slot.container():
+        st.subheader("📌 Reasoning")
+        st.write(data.get("reasoning") or "No reasoning provided.")
+        if data.get("degraded"):
+            st.caption(f"⏱️ Answered within the latency budget using fallbacks for: {', '.join(data['degraded_stages'])}")
 
-        except Exception as e:
-            st.error(f" Error connecting to backend: {e}")
 
+if submitted:
+    if query_text.strip():
+        result = get_query_cache().get(query_text)
+        if result is None:
+            try:
+                with st.spinner("Evaluating offers..."):
+                    for event in stream_query(query_text):
+                        if event["event"] == "offers":
+                            with offers_slot.container():
+                                st.subheader("📦 Offers Evaluated")
+                                st.dataframe(offers_frame(event["offers_evaluated"]).head(PAGE_SIZES[0]), hide_index=True)
+                        elif event["event"] == "recommendation":
+                            show_recommendation(event)
+                        elif event["event"] == "reasoning":
+                            show_reasoning(event)
+                        elif event["event"] == "done":
+                            result = event
+                        elif event["event"] == "error":
+                            st.error(f" The backend failed to answer: {event['detail']}")
+            except Exception as e:
+                st.error(f" Error connecting to backend: {e}")
+        st.session_state["query_result"] = result
+        st.session_state["offers_page"] = 1
     else:
         st.warning(" Please enter a query.")
+
+result = st.session_state.get("query_result")
+if result:
+    show_recommendation(result)
+    show_reasoning(result)
+
+    with offers_slot.container():
+        st.subheader("📦 Offers Evaluated")
+        offers = result.get("offers_evaluated", [])
+        if offers:
+            # Sort the whole result, then send only one page to the browser
+            sort_col, size_col = st.columns(2)
+            sort_by = sort_col.selectbox("Sort by", list(SORT_COLUMNS), key="offers_sort")
+            page_size = size_col.selectbox("Offers per page", PAGE_SIZES, key="offers_page_size")
+            pages = max(1, math.ceil(len(offers) / page_size))
+            page = st.number_input("Page", min_value=1, max_value=pages, step=1, key="offers_page") if pages > 1 else 1
+            start = (min(page, pages) - 1) * page_size
+            frame = offers_frame(offers)
+            if SORT_COLUMNS[sort_by]:
+                frame = frame.sort_values(SORT_COLUMNS[sort_by], kind="stable")
+            st.dataframe(
+                frame.iloc[start:start + page_size],
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "unit_price": st.column_config.NumberColumn("Unit price", format="$%.2f"),
+                    "delivery_days": st.column_config.NumberColumn("Delivery (days)"),
+                    "risk_assessment": "Risk assessment",
+                }
+            )
+            st.caption(f"{len(offers)} offer(s), page {min(page, pages)} of {pages}")
+        else:
+            st.write("No offers evaluated.")
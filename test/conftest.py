@@ -0,0 +1,74 @@
+import hashlib
+import math
+import os
+import re
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.abspath("."))
+
+# `app.core.config` reads the environment at import, and agents built on first use open
+# the store with it: point them at a throwaway store, state dir and dummy key first.
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+os.environ.setdefault("CHROMA_PERSIST_DIR", tempfile.mkdtemp(prefix="chroma_test_"))
+os.environ.setdefault("STATE_DIR", tempfile.mkdtemp(prefix="state_test_"))
+os.environ.setdefault("ADMIN_TOKEN", "test-admin-token")
+
+
+class FakeEmbedder:
+    """Deterministic bag-of-words embedder so retrieval can be tested offline."""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.calls = 0
+
+    def _embed(self, text: str) -> list[float]:
+        vec = [0.0] * self.dim
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            vec[int(hashlib.md5(token.encode()).hexdigest(), 16) % self.dim] += 1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.calls += 1
+        return self._embed(text)
+
+
+class RecordingLLM:
+    """Chat model stand-in that always picks `supplier` and counts its calls."""
+
+    def __init__(self, supplier: str):
+        self.supplier = supplier
+        self.calls = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(content=f'```json\n{{"supplier": "{self.supplier}", "reason": "r", '
+                                       f'"score_explanation": "s", "priority_breakdown": "p"}}\n```')
+
+
+@pytest.fixture
+def recording_llm():
+    """Factory for RecordingLLM: `recording_llm("A")`."""
+    return RecordingLLM
+
+
+@pytest.fixture
+def make_retriever(tmp_path):
+    """Builds a RetrieverAgent on a temporary store with the fake embedder."""
+    from app.agents.retriever import RetrieverAgent
+
+    def _make(**kwargs):
+        agent = RetrieverAgent(persist_dir=str(tmp_path / "chroma"), **kwargs)
+        agent.embedder = FakeEmbedder()
+        return agent
+
+    return _make
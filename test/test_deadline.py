@@ -0,0 +1,94 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents.evaluator import EvaluatorAgent
+from app.agents.ranking import rank_offers
+from app.agents.summarizer import SummarizerAgent
+from app.core.deadline import Deadline, DeadlineExceeded, run_with_deadline
+from app.models.models import Offer
+from app.models.records import OfferRecord
+from app.routes import query
+
+OFFERS = [
+    {"supplier": "Premier Metals", "item": "10mm steel bolt", "unit_price": 0.70, "delivery_days": 8,
+     "payment_terms": "Net 60", "risk_note": "Major quality issues; high risk."},
+    {"supplier": "QuickFix", "item": "10mm steel bolt", "unit_price": 0.75, "delivery_days": 10,
+     "payment_terms": "Net 45", "risk_note": "Reliable supplier, 95% on-time."},
+    {"supplier": "SteelPro", "item": "10mm galvanized bolt", "unit_price": 0.74, "delivery_days": 12,
+     "payment_terms": "Net 30", "risk_note": "Low risk vendor."},
+]
+
+
+class SlowLLM:
+    def invoke(self, messages, **kwargs):
+        time.sleep(1.0)
+        return SimpleNamespace(content="{}")
+
+
+def test_local_ranking_follows_priority_chain():
+    assert [o["supplier"] for o in rank_offers(OFFERS)] == ["SteelPro", "QuickFix", "Premier Metals"]
+
+
+def test_run_with_deadline_times_out():
+    with pytest.raises(DeadlineExceeded):
+        run_with_deadline(time.sleep, 1.0, deadline=Deadline(600))
+    assert run_with_deadline(lambda: 42, deadline=Deadline(1000)) == 42
+
+
+def test_evaluator_falls_back_to_local_ranking():
+    agent = EvaluatorAgent()
+    agent.llm = SlowLLM()
+
+    start = time.monotonic()
+    best = agent.evaluate("10mm bolts", [dict(o) for o in OFFERS], deadline=Deadline(700))
+    assert time.monotonic() - start < 0.9
+    assert best["supplier"] == "SteelPro"
+    assert best["evaluation_mode"] == "local"
+    assert "SteelPro" in best["evaluation_reason"]
+
+
+def test_summarizer_raises_and_template_summary_uses_offer_fields():
+    agent = SummarizerAgent()
+    with pytest.raises(DeadlineExceeded):
+        agent.summarize("10mm bolts", '{"supplier": "QuickFix"}', deadline=Deadline(100))
+
+    summary = SummarizerAgent.template_summary(OFFERS[1], "Lowest risk option.")
+    assert summary.startswith("QuickFix was selected for 10mm steel bolt at $0.75 per unit")
+    assert "Net 45" in summary and "Supplier risk: Low." in summary
+
+
+def test_retrieval_runs_under_the_deadline(make_retriever, monkeypatch):
+    agent = make_retriever()
+    agent.add_offers([Offer(supplier="QuickFix", item="10mm steel bolt", unit_price=0.75, raw_text="QuickFix quote")])
+    embed_query = agent.embedder.embed_query
+    monkeypatch.setattr(agent.embedder, "embed_query", lambda text: time.sleep(1.0) or embed_query(text))
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        agent.search("10mm steel bolt", deadline=Deadline(200))
+    assert time.monotonic() - start < 0.9
+
+
+def test_pipeline_reports_retrieval_and_local_fallbacks(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+
+    def over_budget(*args, **kwargs):
+        raise DeadlineExceeded("too slow")
+
+    monkeypatch.setattr(query.retriever, "search", over_budget)
+    body = client.post("/procure-sense-rag/evaluate-offers", json={"query": "10mm bolts"}).json()
+    assert body["recommendation"] == "No Offer" and body["degraded_stages"] == ["retriever"]
+
+    record = OfferRecord(**OFFERS[1])
+    monkeypatch.setattr(query.retriever, "search", lambda *args, **kwargs: [record])
+    monkeypatch.setattr(query.evaluator, "evaluate", lambda *args, **kwargs: {
+        **OFFERS[1], "evaluation_reason": "Lowest risk.", "evaluation_mode": "local", "model_route": "complex"})
+    # Under MIN_LLM_BUDGET_MS, so the summary falls back to the template as well
+    body = client.post("/procure-sense-rag/evaluate-offers", json={"query": "10mm bolts", "deadline_ms": 100}).json()
+    assert body["model_route"] == "local"
+    assert body["degraded_stages"] == ["evaluator", "summarizer"]
@@ -0,0 +1,69 @@
+from app.core.dedup import candidate_filter, fingerprint, minhash, similarity
+from app.models.models import Offer
+
+QUOTE = (
+    "QuickFix is currently running a promotion on their specialty fastening components. They offer the "
+    "10mm steel bolt at a discounted rate of $0.75 per unit for orders over 1,000 units. Delivery is "
+    "estimated at 10 business days from order confirmation. Their standard payment terms are Net 45."
+)
+REMINDER = "Reminder: " + QUOTE.replace("Net 45.", "Net 45. Please confirm by Friday.")
+
+
+def offer(supplier, raw_text, product_id=None, price=0.75, item="10mm steel bolt"):
+    return Offer(supplier=supplier, item=item, product_id=product_id, unit_price=price, raw_text=raw_text)
+
+
+def test_minhash_separates_reworded_from_unrelated_text():
+    assert similarity(minhash(QUOTE), minhash(REMINDER)) >= 0.8
+    assert similarity(minhash(QUOTE), minhash("Apex Fasteners offers 6mm hex nuts at $0.25 per unit.")) < 0.2
+
+
+def test_candidate_filter_matches_key_or_band():
+    where = candidate_filter([fingerprint("QuickFix", "SB-10", QUOTE)])
+    assert {"dedup_key": "quickfix|sb10"} in where["$or"]
+    assert len(where["$or"]) == 17
+
+
+def test_reminder_email_collapses_into_new_version(make_retriever):
+    agent = make_retriever(shard_by="category")
+    first = agent.add_offers([offer("QuickFix", QUOTE)])
+    second = agent.add_offers([offer("QuickFix Industries", REMINDER)])
+
+    assert first == second
+    collection = agent._get_collection("supplier_offers__bolt")
+    assert collection.count() == 1
+    assert collection.get(ids=first)["metadatas"][0]["version"] == 2
+
+
+def test_requote_with_same_product_id_replaces_price(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers([offer("QuickFix", QUOTE, "SB-10")])
+    agent.add_offers([offer("quickfix", "New price list: SB-10 now $0.72.", "sb-10", price=0.72)])
+
+    results = agent.search("10mm steel bolt price", k=5)
+    assert [(o.supplier, o.unit_price) for o in results] == [("quickfix", 0.72)]
+
+
+def test_distinct_suppliers_and_in_batch_duplicates(make_retriever):
+    agent = make_retriever(shard_by="category")
+    ids = agent.add_offers([
+        offer("QuickFix", QUOTE),
+        offer("Premier Metals", QUOTE.replace("QuickFix", "Premier Metals")),
+        offer("QuickFix", REMINDER),
+    ])
+    assert len(ids) == 2
+    assert agent._get_collection("supplier_offers__bolt").count() == 2
+
+
+def test_batch_offers_replacing_the_same_stored_offer_share_one_write(make_retriever):
+    agent = make_retriever(shard_by="category")
+    (stored,) = agent.add_offers([offer("QuickFix", QUOTE, "SB-10")])
+    ids = agent.add_offers([
+        offer("QuickFix", "New price list: SB-10 now $0.72.", "SB-10", price=0.72),  # Same product ID
+        offer("QuickFix", REMINDER, price=0.70),  # Same text, no product ID
+    ])
+
+    assert ids == [stored]
+    collection = agent._get_collection("supplier_offers__bolt")
+    assert collection.count() == 1
+    assert collection.get(ids=ids)["metadatas"][0]["unit_price"] == 0.70
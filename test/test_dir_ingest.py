@@ -0,0 +1,75 @@
+import os
+
+from app.core.dir_ingest import DirectorySync, load_manifest
+from app.models.models import Offer
+
+
+class LineExtractor:
+    """One offer per "supplier|item|price" line; counts the files it was asked to extract."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def extract_offers(self, text):
+        self.calls += 1
+        offers = []
+        for line in text.splitlines():
+            supplier, item, price = line.split("|")
+            offers.append(Offer(supplier=supplier, item=item, unit_price=float(price), raw_text=line))
+        return offers
+
+
+def _write(path, text, mtime=None):
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def _live_suppliers(agent):
+    return sorted(m["supplier"] for name in agent.live_collections()
+                  for m in agent._get_collection(name).get()["metadatas"])
+
+
+def test_only_the_delta_is_extracted(make_retriever, tmp_path):
+    agent, extractor = make_retriever(), LineExtractor()
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    _write(drop / "a.txt", "QuickFix|10mm steel bolt|0.75")
+    _write(drop / "b.txt", "Bolt Barn|12mm steel bolt|0.90")
+    _write(drop / "notes.pdf", "ignored")
+    sync = DirectorySync(str(drop), extractor, agent, workers=2, batch_files=1)
+
+    report = sync.sync()
+    assert report.added == ["a.txt", "b.txt"] and report.offers_stored == 2
+    assert extractor.calls == 2
+    assert set(load_manifest(str(drop / ".ingest-manifest.json"))) == {"a.txt", "b.txt"}
+
+    # Nothing changed: nothing is read or extracted
+    assert sync.sync().unchanged == 2 and extractor.calls == 2
+
+    # Touched without a content change: re-hashed but not extracted
+    _write(drop / "a.txt", "QuickFix|10mm steel bolt|0.75", mtime=1_700_000_000)
+    assert sync.sync().unchanged == 2 and extractor.calls == 2
+
+    assert sync.sync(dry_run=True).as_dict()["added"] == []
+
+
+def test_changed_and_deleted_files_update_the_store(make_retriever, tmp_path):
+    agent, extractor = make_retriever(), LineExtractor()
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    _write(drop / "a.txt", "QuickFix|10mm steel bolt|0.75\nAcme|8mm steel washer|0.10")
+    _write(drop / "b.txt", "Bolt Barn|12mm steel bolt|0.90")
+    sync = DirectorySync(str(drop), extractor, agent)
+    sync.sync()
+    assert _live_suppliers(agent) == ["Acme", "Bolt Barn", "QuickFix"]
+
+    # a.txt drops the washer line; b.txt is deleted
+    _write(drop / "a.txt", "QuickFix|10mm steel bolt|0.72")
+    os.remove(drop / "b.txt")
+    report = sync.sync()
+    assert report.changed == ["a.txt"] and report.removed == ["b.txt"]
+    assert report.offers_withdrawn >= 2  # Washer, Bolt Barn and the old QuickFix price unless it was versioned
+    assert _live_suppliers(agent) == ["QuickFix"]
+    assert [o.unit_price for o in agent.search("10mm steel bolt")] == [0.72]
+    assert set(load_manifest(sync.manifest_path)) == {"a.txt"}
@@ -0,0 +1,50 @@
+from app.agents.evaluator import EvaluatorAgent
+from app.agents.routing import QueryPlan
+from app.core.memo import EvaluationMemo
+from app.models.records import OfferRecord
+
+
+def record(id_, supplier, price, days, version=1):
+    return OfferRecord(supplier=supplier, item="10mm steel bolt", unit_price=price, delivery_days=days,
+                       risk_note="Reliable supplier, low risk.", id=id_, version=version)
+
+
+def test_same_plan_and_candidates_reuse_the_evaluation(recording_llm):
+    agent = EvaluatorAgent()
+    agent.llm = recording_llm("B")
+    offers = [record("a", "A", 0.74, 12), record("b", "B", 0.75, 9)]
+
+    first = agent.evaluate("cheapest 10mm bolts", offers)
+    assert agent.llm.calls == 1 and "evaluation_mode" not in first
+    # Different wording, same constraints and candidates (in another order)
+    again = agent.evaluate("10mm bolts at the lowest price", list(reversed(offers)),
+                           plan=QueryPlan("10mm bolts at the lowest price", ["price"], "10"))
+    assert agent.llm.calls == 1
+    assert again["supplier"] == "B" and again["evaluation_mode"] == "memo"
+    assert again["evaluation_reason"] == first["evaluation_reason"] and again["model_route"] == "complex"
+
+    # A new version of any candidate is a different question
+    agent.evaluate("cheapest 10mm bolts", [record("a", "A", 0.74, 12), record("b", "B", 0.75, 8, version=2)])
+    assert agent.llm.calls == 2
+    # So are other constraints
+    agent.evaluate("fastest 10mm bolts", offers)
+    assert agent.llm.calls == 3
+    # Including the price cap, delivery deadline and quantity
+    for query in ("cheapest 10mm bolts under $0.75", "cheapest 10mm bolts within 10 days",
+                  "cheapest 10mm bolts, 500 units"):
+        agent.evaluate(query, offers)
+    assert agent.llm.calls == 6
+    assert agent.memo.stats() == {"entries": 6, "hits": 1, "misses": 6}
+
+
+def test_memo_lru_and_ttl():
+    memo = EvaluationMemo(max_entries=2, ttl_s=60)
+    memo.put("a", {"offer_id": "1"})
+    memo.put("b", {"offer_id": "2"})
+    memo.get("a")
+    memo.put("c", {"offer_id": "3"})
+    assert memo.get("b") is None and memo.get("a") == {"offer_id": "1"}
+
+    expired = EvaluationMemo(ttl_s=0)
+    expired.put("a", {"offer_id": "1"})
+    assert expired.get("a") is None
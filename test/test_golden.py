@@ -0,0 +1,42 @@
+from benchmarks.golden import MODES, parse_cases, run
+
+# Correct answers (of 7) the modes answered without the model stub must keep; raise one when its path improves
+MIN_CORRECT = {"routed": 4, "local": 4, "offline": 4}
+
+
+def test_examples_parse_into_golden_cases():
+    cases = parse_cases()
+    assert len(cases) == 7
+    assert cases[0].query.startswith("Find the most cost-effective supplier for 6mm hex nuts")
+    assert cases[0].expected_supplier == "Apex Fasteners"
+    assert cases[6].expected_supplier == "No Offer"
+
+
+def test_every_mode_reports_its_own_behaviour():
+    reports = {r.mode: r for r in run(MODES)}
+
+    assert all(r.cases == 7 and not r.skipped and len(r.latencies_ms) == 7 for r in reports.values())
+    assert all(sum(r.routes.values()) == 7 for r in reports.values())
+
+    # Without recordings the LLM modes are answered by the stub: no accuracy to compare
+    full, cached = reports["full"], reports["cached"]
+    for report in (full, cached):
+        assert report.source == "stub" and report.summary()["accuracy"] is None and report.notes
+    assert {mode: reports[mode].correct >= n for mode, n in MIN_CORRECT.items()} == dict.fromkeys(MIN_CORRECT, True)
+
+    # Routing off: every evaluated query takes the large model, plus one summary call;
+    # a No Offer from the size or risk filter is a skip
+    evaluated = full.routes.get("complex", 0)
+    assert set(full.routes) <= {"complex", "skip", "none"} and full.llm_calls == 2 * evaluated and full.memo_hits == 0
+    # The second pass takes every evaluation from the memo; only the summaries reach a model
+    assert cached.routes == full.routes
+    assert cached.memo_hits == evaluated and cached.llm_calls == full.llm_calls - cached.memo_hits
+    assert cached.cost_usd < full.cost_usd
+    # Routing on: skipped queries make no call, the others one evaluation and one summary
+    routed = reports["routed"]
+    llm_routed = sum(n for route, n in routed.routes.items() if route in ("simple", "complex"))
+    assert routed.llm_calls == 2 * llm_routed and routed.cost_usd <= full.cost_usd
+    assert all(reports[mode].llm_calls == 0 and reports[mode].source == "none" for mode in ("local", "offline"))
+    # Without recorded embeddings offline runs the same pipeline as local, and says so
+    assert reports["offline"].notes and reports["offline"].misses == reports["local"].misses
+    assert set(reports["offline"].summary()) >= {"accuracy", "retrieval_hit_rate", "p50_ms", "p95_ms", "cost_usd"}
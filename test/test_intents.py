@@ -0,0 +1,61 @@
+from app.agents.routing import QueryPlan
+from app.core.intents import IntentIndex, keyword_intents
+from app.models.models import Offer
+
+
+def test_paraphrases_detected_from_query_embedding(make_retriever):
+    agent = make_retriever()
+    query = "need 10mm bolts shipped as soon as possible from a trusted vendor with a good track record"
+    assert keyword_intents(query) == ["risk"]  # "trust" only; no delivery keyword
+    assert agent._detect_intents(query, agent.embedder.embed_query(query)) == ["delivery", "risk"]
+    assert agent._detect_intents("10mm steel bolt", agent.embedder.embed_query("10mm steel bolt")) == ["general"]
+    # Without an embedding only the keyword lists apply
+    assert agent._detect_intents(query) == ["risk"]
+
+
+def test_prototypes_persisted_and_reused(make_retriever):
+    agent = make_retriever()
+    embedder = agent.embedder
+    agent.intent_index.load(embedder)
+    assert embedder.calls == 1
+    assert agent.client.get_collection("intent_prototypes").count() > 0
+
+    # A new index over the same store reads the stored matrix instead of re-embedding
+    reopened = IntentIndex(agent.client)
+    reopened.load(embedder)
+    assert embedder.calls == 1
+    assert reopened.scores(embedder.embed_query("lowest price"), embedder)["price"] > 0.99
+
+    # A different embedding model invalidates the stored prototypes
+    other = type(embedder)(dim=32)
+    other.model = "another-embedding-model"
+    reopened.load(other)
+    assert other.calls == 1
+
+
+def test_search_reuses_query_embedding_and_fills_plan(make_retriever):
+    agent = make_retriever()
+    agent.add_offers([
+        Offer(supplier="QuickFix", item="10mm steel bolt", unit_price=0.75, payment_terms="Net 60",
+              risk_note="Reliable supplier, 95% on-time.", raw_text="QuickFix quote"),
+    ])
+    agent.intent_index.load(agent.embedder)
+    calls = agent.embedder.calls
+
+    plan = QueryPlan.from_query("10mm steel bolt, net 60 payment")
+    assert [o.supplier for o in agent.search(plan.query, plan=plan)] == ["QuickFix"]
+    assert agent.embedder.calls == calls + 1
+    assert plan.intents == ["payment"]
+
+
+def test_fuzzy_risk_intent_does_not_exclude_high_risk_in_store(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers([
+        Offer(supplier="QuickFix", item="steel bolt", unit_price=0.75,
+              risk_note="Reliable supplier, 95% on-time.", raw_text="QuickFix quote"),
+        Offer(supplier="Premier Metals", item="steel bolt", unit_price=0.70,
+              risk_note="Major quality issues; high risk.", raw_text="Premier quote"),
+    ])
+    plan = QueryPlan.from_query("trustworthy steel bolt supplier")
+    assert [o.supplier for o in agent.search(plan.query, plan=plan)] == ["QuickFix", "Premier Metals"]
+    assert "risk" in plan.intents
@@ -0,0 +1,61 @@
+import json
+import logging
+import queue
+
+from fastapi import APIRouter
+from fastapi.testclient import TestClient
+
+from app.core.logger import (DebugSampler, JsonFormatter, NonBlockingQueueHandler, RequestContextFilter,
+                             get_logger, request_id_var)
+
+
+def make_record(level=logging.INFO, msg="Stored %d offers", args=(3,), **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_renders_lazily_with_request_id_and_extras():
+    token = request_id_var.set("req-1")
+    record = make_record(route="skip")
+    RequestContextFilter().filter(record)
+    request_id_var.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Stored 3 offers"
+    assert (entry["request_id"], entry["route"], entry["level"]) == ("req-1", "skip", "INFO")
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.queue.qsize() == 1 and handler.dropped == 1
+    # Unformatted: the message is rendered by the listener thread
+    assert handler.queue.get_nowait().args == (3,)
+
+
+def test_debug_sampler_never_drops_info():
+    sampler = DebugSampler(0.0)
+    assert sampler.filter(make_record(logging.INFO))
+    assert not sampler.filter(make_record(logging.DEBUG))
+
+
+def test_request_id_reaches_handler_and_response():
+    from app.main import app
+
+    router = APIRouter()
+    logger = get_logger("app.test.request_id")
+
+    @router.get("/_log_probe")
+    def probe():
+        logger.info("probe handled")
+        return {"request_id": request_id_var.get()}
+
+    app.include_router(router)
+    client = TestClient(app)
+
+    response = client.get("/_log_probe", headers={"X-Request-ID": "abc123"})
+    assert response.json() == {"request_id": "abc123"}
+    assert response.headers["X-Request-ID"] == "abc123"
+    assert len(client.get("/_log_probe").headers["X-Request-ID"]) == 16
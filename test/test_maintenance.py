@@ -0,0 +1,82 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core import config
+from app.core.maintenance import compact_store
+from app.models.models import Offer
+
+
+def offer(supplier, raw_text, price=0.75):
+    return Offer(supplier=supplier, item="10mm steel bolt", unit_price=price, raw_text=raw_text)
+
+
+def test_collections_use_configured_hnsw_settings(make_retriever, monkeypatch):
+    agent = make_retriever(shard_by="category")
+    assert agent._get_collection("supplier_offers__bolt").configuration["hnsw"]["max_neighbors"] == 16
+
+    monkeypatch.setattr(config, "CHROMA_HNSW_M", 32)
+    monkeypatch.setattr(config, "CHROMA_HNSW_SEARCH_EF", 64)
+    fresh = make_retriever(shard_by="category")
+    hnsw = fresh._get_collection("supplier_offers__bolt").configuration["hnsw"]
+    # Search ef applies to the existing collection at once; M waits for a rebuild
+    assert (hnsw["ef_search"], hnsw["max_neighbors"]) == (64, 16)
+    fresh.rebuild_collection("supplier_offers__bolt")
+    assert fresh._get_collection("supplier_offers__bolt").configuration["hnsw"]["max_neighbors"] == 32
+
+
+def test_purge_by_supplier_and_age(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers([offer("QuickFix", "Quote: SB-10 at $0.75"), offer("Premier Metals", "Premier quote")])
+    agent.add_offers([offer("QuickFix", "Requote: SB-10 now $0.72", 0.72)])  # archives v1
+
+    assert agent.purge_offers(supplier="quickfix") == 2  # live version + archived version
+    assert [o.supplier for o in agent.search("10mm steel bolt")] == ["Premier Metals"]
+    assert agent.purge_offers(older_than_s=3600) == 0
+    time.sleep(0.01)
+    assert agent.purge_offers(older_than_s=0.001) == 1
+
+
+def test_compaction_rebuilds_live_collections(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers([offer(f"Supplier {i}", f"Supplier {i} quotes bolts, batch {i}") for i in range(20)])
+    agent.purge_offers(supplier="Supplier 3")
+
+    report = compact_store(agent)
+    assert report["collections"] == {"supplier_offers": 0, "supplier_offers__bolt": 19}
+    assert report["vacuumed"] and report["bytes_after"] > 0
+    assert len(agent.search("10mm steel bolt", k=3)) == 3
+    assert not any(c.name.startswith("rebuild__") for c in agent.client.list_collections())
+
+
+def test_other_processes_recover_from_a_rebuild(make_retriever):
+    from app.agents.retriever import RetrieverAgent
+
+    agent = make_retriever(shard_by="category")
+    agent.add_offers([offer(f"Supplier {i}", f"Supplier {i} quotes bolts, batch {i}") for i in range(5)])
+    # A second worker on the same store, holding handles cached before the rebuild
+    worker = RetrieverAgent(client=agent.client, shard_by="category")
+    worker.embedder = agent.embedder
+    assert len(worker.search("10mm steel bolt", k=3)) == 3
+
+    agent.rebuild_collection("supplier_offers__bolt")
+    assert len(worker.search("10mm steel bolt", k=3)) == 3
+    worker.add_offers([offer("Late Supplier", "Late Supplier quotes bolts")])
+    assert agent._get_collection("supplier_offers__bolt").count() == 6
+
+
+def test_purge_endpoint_requires_a_criterion():
+    from app.main import app
+
+    response = TestClient(app).delete("/procure-sense-rag/admin/offers", headers={"X-Admin-Token": config.ADMIN_TOKEN})
+    assert response.status_code == 400
+
+
+def test_admin_api_requires_a_configured_token(monkeypatch):
+    from app.main import app
+
+    client = TestClient(app)
+    assert client.get("/procure-sense-rag/admin/usage").status_code == 401
+    assert client.get("/procure-sense-rag/admin/usage", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    monkeypatch.setattr(config, "ADMIN_TOKEN", None)
+    assert client.get("/procure-sense-rag/admin/usage", headers={"X-Admin-Token": ""}).status_code == 403
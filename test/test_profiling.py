@@ -0,0 +1,96 @@
+import threading
+
+from fastapi import APIRouter
+from fastapi.testclient import TestClient
+
+from app.core import config, profiling
+from app.core.deadline import Deadline, run_with_deadline
+from app.core.profiling import profiled
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def unrelated(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def make_client(tmp_path, monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path))
+    router = APIRouter()
+
+    @router.get("/_profile_probe")
+    @profiled
+    def probe(n: int = 300000):
+        return {"total": busy(n)}
+
+    @router.get("/_profile_probe_offloaded")
+    @profiled
+    def probe_offloaded(n: int = 300000):
+        return {"total": run_with_deadline(busy, n, deadline=Deadline(10000), min_budget_ms=0)}
+
+    app.include_router(router)
+    return TestClient(app, headers={"X-Admin-Token": config.ADMIN_TOKEN})
+
+
+def test_header_profile_is_stored_only_when_allowed(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch)
+
+    monkeypatch.setattr(profiling, "header_enabled", False)
+    assert "X-Profile-Id" not in client.get("/_profile_probe", headers={"X-Profile": "1"}).headers
+
+    monkeypatch.setattr(profiling, "header_enabled", True)
+    assert client.get("/_profile_probe?n=5", headers={"X-Profile": "1"}).json() == {"total": 30}
+    response = client.get("/_profile_probe", headers={"X-Profile": "1"})
+    profile_id = response.headers["X-Profile-Id"]
+
+    report = client.get(f"/procure-sense-rag/admin/profiles/{profile_id}?limit=200").json()
+    assert any("busy" in row["function"] for row in report["hot_functions"])
+    assert client.get("/procure-sense-rag/admin/profiles/missing").status_code == 404
+
+
+def test_aggregate_mode_collects_n_requests(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch)
+    client.post("/procure-sense-rag/admin/profiling", json={"aggregate_requests": 2})
+
+    for _ in range(3):
+        client.get("/_profile_probe")
+
+    report = client.get("/procure-sense-rag/admin/profiling").json()
+    assert report["requests_collected"] == 2 and report["active"] is False
+    assert any("busy" in row["function"] for row in report["hot_functions"])
+
+
+def test_concurrent_profile_request_runs_unprofiled(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch)
+    monkeypatch.setattr(profiling, "header_enabled", True)
+
+    # Another request holds the (single) profiler
+    with profiling._profiler_lock:
+        response = client.get("/_profile_probe?n=5", headers={"X-Profile": "1"})
+    assert response.status_code == 200 and response.json() == {"total": 30}
+    assert "X-Profile-Id" not in response.headers
+    assert "X-Profile-Id" in client.get("/_profile_probe?n=5", headers={"X-Profile": "1"}).headers
+
+
+def test_profile_samples_offloaded_work_but_not_other_threads(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch)
+    monkeypatch.setattr(profiling, "header_enabled", True)
+
+    stop = threading.Event()
+    other = threading.Thread(target=unrelated, args=(stop,), daemon=True)
+    other.start()
+    try:
+        response = client.get("/_profile_probe_offloaded", headers={"X-Profile": "1"})
+    finally:
+        stop.set()
+        other.join()
+
+    report = client.get(f"/procure-sense-rag/admin/profiles/{response.headers['X-Profile-Id']}?limit=200").json()
+    functions = [row["function"] for row in report["hot_functions"]]
+    assert any("busy" in f for f in functions)  # Ran on an llm-call pool thread
+    assert not any("unrelated" in f for f in functions)
@@ -0,0 +1,53 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.models.records import OfferRecord
+from app.routes import query
+
+OFFERS = [
+    OfferRecord(supplier="QuickFix", item="10mm steel bolt", product_id="SB-10", unit_price=0.75, delivery_days=10,
+          payment_terms="Net 45", risk_note="Reliable supplier, 95% on-time.", raw_text="QuickFix quote"),
+    OfferRecord(supplier="Premier Metals", item="10mm steel bolt", product_id="SB-10", unit_price=0.80, delivery_days=12,
+          payment_terms="Net 30", risk_note="Major quality issues; high risk.", raw_text="Premier quote"),
+]
+
+
+def test_stream_emits_stages_and_matches_blocking_response(monkeypatch):
+    from app.main import app
+
+    # The winner dominates the runner-up, so routing skips both LLM calls
+    monkeypatch.setattr(query.retriever, "search", lambda q, k=5, tenant=None, plan=None, deadline=None: list(OFFERS))
+    client = TestClient(app)
+    body = {"query": "10mm bolts"}
+
+    response = client.post("/procure-sense-rag/evaluate-offers/stream", json=body)
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [e["event"] for e in events] == ["offers", "recommendation", "reasoning", "done"]
+    assert len(events[0]["offers_evaluated"]) == 2
+    assert events[1] == {"event": "recommendation", "recommendation": "QuickFix", "model_route": "skip"}
+
+    final = {k: v for k, v in events[-1].items() if k != "event"}
+    assert client.post("/procure-sense-rag/evaluate-offers", json=body).json() == final
+
+
+def test_failed_stage_ends_stream_with_error_event(monkeypatch):
+    from app.main import app
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("evaluator down")
+
+    monkeypatch.setattr(query.retriever, "search", lambda q, k=5, tenant=None, plan=None, deadline=None: list(OFFERS))
+    monkeypatch.setattr(query.evaluator, "evaluate", fail)
+    client = TestClient(app)
+    body = {"query": "10mm bolts"}
+
+    response = client.post("/procure-sense-rag/evaluate-offers/stream", json=body)
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [e["event"] for e in events] == ["offers", "error"]
+    assert events[-1]["detail"] == "evaluator down"
+
+    response = client.post("/procure-sense-rag/evaluate-offers", json=body)
+    assert response.status_code == 500
+    assert response.json()["detail"] == "evaluator down"
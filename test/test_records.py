@@ -0,0 +1,32 @@
+from app.agents.evaluator import EvaluatorAgent
+from app.models.models import Offer
+from app.models.records import OfferRecord
+
+
+def test_record_from_metadata_ignores_store_fields_and_precomputes_risk():
+    meta = {"supplier": "Premier Metals", "item": "10mm steel bolt", "unit_price": 0.7, "raw_text": "quote",
+            "risk_note": "Major quality issues; high risk.", "version": 3, "category": "bolt", "lsh_0": "ab"}
+    record = OfferRecord.from_metadata(meta, id="offer-1")
+
+    assert (record.id, record.version, record.risk, record.high_risk) == ("offer-1", 3, "High", True)
+    assert record.get("unit_price") == 0.7 and record.get("notes") is None
+    assert record.as_dict() == Offer(**meta).model_dump()
+    assert not hasattr(record, "__dict__")
+
+
+def test_search_returns_records_that_the_evaluator_ranks(make_retriever):
+    agent = make_retriever(shard_by="category")
+    ids = agent.add_offers([
+        Offer(supplier="QuickFix", item="10mm steel bolt", unit_price=0.75, delivery_days=10,
+              risk_note="Reliable supplier, 95% on-time.", raw_text="QuickFix quote"),
+        Offer(supplier="Premier Metals", item="10mm steel bolt", unit_price=0.70, delivery_days=8,
+              risk_note="Major quality issues; high risk.", raw_text="Premier quote"),
+    ])
+    records = agent.search("10mm steel bolt", k=5)
+    assert all(isinstance(r, OfferRecord) for r in records)
+    assert sorted(r.id for r in records) == sorted(ids)
+
+    # Critical order: the high-risk record is dropped, the winner comes back as a plain dict
+    best = EvaluatorAgent().evaluate("critical order of 10mm bolts", records)
+    assert best["supplier"] == "QuickFix" and best["model_route"] == "skip"
+    assert isinstance(best, dict) and "raw_text" in best
@@ -0,0 +1,47 @@
+from app.agents.rerank import rerank
+from app.agents.routing import QueryPlan
+from app.models.models import Offer
+from app.models.records import OfferRecord
+
+
+def record(supplier, price, days, risk_note="Low risk", item="10mm steel bolt"):
+    return OfferRecord(supplier=supplier, item=item, unit_price=price, delivery_days=days, risk_note=risk_note)
+
+
+def test_query_constraints_are_parsed():
+    plan = QueryPlan.from_query("6mm hex nuts under $0.30 that can be delivered within a week")
+    assert (plan.size_mm, plan.max_price, plan.max_delivery_days) == ("6", 0.3, 7)
+    assert QueryPlan.from_query("bolts in under 10 days").max_price is None
+    assert QueryPlan.from_query("1,000 units of 10mm bolts").quantity == 1000
+    assert QueryPlan.from_query("10mm bolts").quantity is None
+
+
+def test_constraints_lift_offers_from_further_down_the_pool():
+    records = [record("Near", 1.20, 20), record("Mid", 0.95, 12), record("Far", 0.70, 5, "Quality issues reported")]
+    distances = [0.10, 0.15, 0.40]
+
+    # No constraint in the query: the vector order is kept
+    assert [r.supplier for r in rerank(records, distances, QueryPlan.from_query("10mm steel bolts"), k=3)] == \
+        ["Near", "Mid", "Far"]
+    # Near breaks both the price cap and the deadline, so the farthest offer overtakes it
+    plan = QueryPlan.from_query("10mm steel bolts under $1 delivered within 10 days")
+    assert [r.supplier for r in rerank(records, distances, plan, k=2)] == ["Mid", "Far"]
+    # A reliability-critical order pushes the high-risk offer back down
+    assert [r.supplier for r in rerank(records, distances, plan, k=2, reliability=True)] == ["Mid", "Near"]
+
+
+def test_search_reaches_beyond_twice_k(make_retriever):
+    agent = make_retriever(shard_by="none")
+    query = "10mm steel bolt with fast delivery and net 30 payment under $1"
+    lookalikes = [
+        Offer(supplier=f"Supplier {chr(65 + i)}", item="10mm steel bolt", product_id=f"SB-{i}",
+              unit_price=1.5 + i / 10, delivery_days=14 + i, payment_terms="Net 30",
+              raw_text=f"{query} from supplier {i} batch {i * 7}")
+        for i in range(8)
+    ]
+    bargain = Offer(supplier="Bargain Bolts", item="10mm steel bolt", product_id="BB-10", unit_price=0.60,
+                    delivery_days=6, payment_terms="Net 30", raw_text="Bargain Bolts offer")
+    agent.add_offers(lookalikes + [bargain])
+
+    results = agent.search(query, k=2)
+    assert "Bargain Bolts" in [o.supplier for o in results]
@@ -0,0 +1,51 @@
+from app.core.risk import RiskProfile, classify_risk, requires_reliability
+from app.models.models import Offer
+from app.models.records import OfferRecord
+
+
+def test_classify_risk_levels_and_flags():
+    premier = classify_risk("Had major quality issues last year and caused production delays. High risk.")
+    assert premier.level == "High" and premier.high_risk
+    assert premier.flags == ("quality_issues", "delivery_delays")
+    assert classify_risk("Reliable supplier, 95% on-time delivery.") == RiskProfile("Low", ("on_time_record",))
+    assert classify_risk("Moderate Risk (Occasional issues or delays)").level == "Moderate"
+    assert classify_risk(None, "").level == "Unknown"
+
+    assert requires_reliability("critical order of 10mm bolts") and requires_reliability("1,000 units of bolts")
+    assert not requires_reliability("cheapest 10mm bolts")
+
+
+def test_risk_stored_at_ingest_and_filtered_in_store(make_retriever):
+    agent = make_retriever(shard_by="category")
+    ids = agent.add_offers([
+        Offer(supplier="QuickFix", item="10mm steel bolt", unit_price=0.75,
+              risk_note="Reliable supplier, 95% on-time.", raw_text="QuickFix quote"),
+        Offer(supplier="Premier Metals", item="10mm steel bolt", unit_price=0.70,
+              risk_note="Major quality issues; high risk.", raw_text="Premier quote"),
+    ])
+    stored = agent._get_collection("supplier_offers__bolt").get(ids=ids)["metadatas"]
+    assert [(m["risk_level"], m["high_risk"]) for m in stored] == [("Low", False), ("High", True)]
+
+    assert {o.supplier for o in agent.search("10mm steel bolt")} == {"QuickFix", "Premier Metals"}
+    critical = agent.search("critical order: 10mm steel bolt")
+    assert [(o.supplier, o.risk) for o in critical] == [("QuickFix", "Low")]
+
+
+def test_records_reuse_stored_classification():
+    # A stored level wins over the notes, which are no longer scanned
+    record = OfferRecord.from_metadata({"supplier": "A", "item": "bolt", "risk_note": "high risk",
+                                        "risk_level": "Moderate", "high_risk": False, "risk_flags": ""})
+    assert (record.risk, record.high_risk) == ("Moderate", False)
+    assert OfferRecord.from_metadata({"supplier": "A", "item": "bolt", "risk_note": "high risk"}).high_risk
+
+
+def test_risk_intent_ranks_high_risk_last_instead_of_dropping_it(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers([
+        Offer(supplier="QuickFix", item="10mm steel bolt", unit_price=0.75,
+              risk_note="Reliable supplier, 95% on-time.", raw_text="QuickFix quote"),
+        Offer(supplier="Premier Metals", item="10mm steel bolt", unit_price=0.70,
+              risk_note="Major quality issues; high risk.", raw_text="Premier quote"),
+    ])
+    results = agent.search("quality steel bolt, low risk", exclude_high_risk=False)
+    assert [o.supplier for o in results] == ["QuickFix", "Premier Metals"]
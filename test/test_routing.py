@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+from app.agents.evaluator import EvaluatorAgent
+from app.agents.routing import ModelRouter, QueryPlan
+from app.agents.summarizer import SummarizerAgent
+
+
+def offer(supplier, price, days, note):
+    return {"supplier": supplier, "item": "10mm steel bolt", "unit_price": price,
+            "delivery_days": days, "payment_terms": "Net 30", "risk_note": note}
+
+
+def test_query_plan_detects_competing_intents():
+    assert QueryPlan.from_query("cheapest 10mm bolts").intents == ["price"]
+    plan = QueryPlan.from_query("cheapest reliable 10mm bolts with fast delivery")
+    assert plan.ambiguous and plan.size_mm == "10"
+
+
+def test_router_tiers():
+    router = ModelRouter(simple_model="mini", complex_model="large", close_margin=0.05)
+    plan = QueryPlan.from_query("10mm bolts")
+    low, moderate = "Reliable supplier, low risk.", "Moderate delays."
+
+    assert router.route(plan, [offer("A", 0.7, 5, low)]).tier == "skip"
+    # Lower risk, price and delivery at once: nothing to weigh
+    assert router.route(plan, [offer("A", 0.7, 5, low), offer("B", 0.8, 9, moderate)]).tier == "skip"
+    # Lower risk but slower: the LLM only has to justify an obvious priority-chain winner
+    assert router.route(plan, [offer("A", 0.7, 9, low), offer("B", 0.8, 5, moderate)]).model == "mini"
+    # Same risk, prices within 5%: close call
+    close = router.route(plan, [offer("A", 0.74, 12, low), offer("B", 0.75, 10, low)])
+    assert close.tier == "complex" and close.model == "large"
+    ambiguous = QueryPlan.from_query("cheapest and fastest 10mm bolts")
+    assert router.route(ambiguous, [offer("A", 0.7, 9, low), offer("B", 0.8, 5, moderate)]).tier == "complex"
+
+
+def test_evaluator_and_summarizer_follow_route(recording_llm):
+    agent = EvaluatorAgent()
+    agent.llm = recording_llm("A")
+    mini = agent._llms["gpt-4o-mini"] = recording_llm("A")
+
+    best = agent.evaluate("10mm bolts", [offer("A", 0.7, 5, "low risk"), offer("B", 0.8, 9, "moderate")])
+    assert best["model_route"] == "skip" and best["evaluation_mode"] == "routed"
+    assert agent.llm.calls == mini.calls == 0
+
+    best = agent.evaluate("10mm bolts", [offer("A", 0.7, 9, "low risk"), offer("B", 0.8, 5, "moderate")])
+    assert best["model_route"] == "simple" and mini.calls == 1 and agent.llm.calls == 0
+
+    best = agent.evaluate("10mm bolts", [offer("A", 0.74, 9, "low risk"), offer("B", 0.75, 5, "low risk")])
+    assert best["model_route"] == "complex" and agent.llm.calls == 1
+
+    summary = SummarizerAgent().summarize("10mm bolts", '{"supplier": "A", "item": "10mm steel bolt"}',
+                                          route="skip", reason="Lowest risk.")
+    assert summary.startswith("A was selected for 10mm steel bolt") and summary.endswith("Lowest risk.")
+
+
+def test_summarizer_uses_the_routed_summary_model():
+    agent = SummarizerAgent(router=ModelRouter(simple_model="small-model", complex_model="large-model"))
+    assert agent.llm.model_name == "small-model"
+    assert agent._chain_for("small-model") is agent.chain
+    assert agent._chain_for("large-model") is agent._chain_for("large-model") is not agent.chain
+
+    calls = []
+    agent.chain = SimpleNamespace(invoke=lambda inputs, config=None: calls.append(inputs) or "Summary.")
+    assert agent.summarize("10mm bolts", '{"supplier": "A"}', route="complex") == "Summary."
+    assert len(calls) == 1
+
+
+def test_no_offer_results_carry_a_route(recording_llm):
+    agent = EvaluatorAgent()
+    agent.llm = recording_llm("No Offer")
+
+    best = agent.evaluate("12mm bolts", [offer("A", 0.7, 5, "low risk")])
+    assert best["supplier"] == "No Offer" and best["model_route"] == "skip"
+
+    best = agent.evaluate("10mm bolts", [offer("A", 0.74, 9, "low risk"), offer("B", 0.75, 5, "low risk")])
+    assert best["supplier"] == "No Offer" and best["model_route"] == "complex" and agent.llm.calls == 1
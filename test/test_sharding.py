@@ -0,0 +1,80 @@
+from app.models.models import Offer
+
+
+def make_offer(supplier, item, product_id, price=1.0):
+    return Offer(
+        supplier=supplier, item=item, product_id=product_id,
+        unit_price=price, delivery_days=5, raw_text=f"{supplier} {item}"
+    )
+
+
+OFFERS = [
+    make_offer("QuickFix", "10mm steel bolt", "SB-10", 0.75),
+    make_offer("Apex Fasteners", "6mm hex nuts", "HN-6", 0.25),
+    make_offer("IronClad", "M12 steel washers", "SW-12", 0.40),
+]
+
+
+def test_offers_are_routed_to_category_shards(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers(OFFERS)
+
+    names = {c.name for c in agent.client.list_collections()}
+    assert {"supplier_offers__bolt", "supplier_offers__nut", "supplier_offers__washer"} <= names
+    assert agent._get_collection("supplier_offers__bolt").count() == 1
+
+
+def test_query_only_hits_named_category(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers(OFFERS)
+
+    assert agent._shards_for_query("cheapest 10mm steel bolts") == ["supplier_offers", "supplier_offers__bolt"]
+    results = agent.search("cheapest 10mm steel bolts", k=5)
+    assert [o.supplier for o in results] == ["QuickFix"]
+
+
+def test_ambiguous_query_fans_out_over_all_shards(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers(OFFERS)
+
+    shards = agent._shards_for_query("steel components from a reliable supplier")
+    assert "supplier_offers__bolt" in shards and "supplier_offers__washer" in shards
+    results = agent.search("steel components from a reliable supplier", k=5)
+    assert {o.supplier for o in results} == {"QuickFix", "Apex Fasteners", "IronClad"}
+
+
+def test_tenants_are_isolated(make_retriever):
+    agent = make_retriever(shard_by="category,tenant")
+    agent.add_offers(OFFERS[:1], tenant="Team A")
+    agent.add_offers([make_offer("Bolt Barn", "12mm steel bolt", "SB-12")], tenant="team-b")
+
+    assert [o.supplier for o in agent.search("steel bolt", tenant="Team A")] == ["QuickFix"]
+    assert [o.supplier for o in agent.search("steel bolt", tenant="team-b")] == ["Bolt Barn"]
+    assert agent.search("steel bolt") == []
+
+
+def test_offers_stored_before_sharding_stay_reachable(make_retriever):
+    make_retriever(shard_by="none").add_offers(OFFERS[:1])
+    agent = make_retriever(shard_by="category")
+    agent.add_offers([make_offer("Bolt Barn", "12mm steel bolt", "SB-12")])
+
+    assert {o.supplier for o in agent.search("steel bolt", k=5)} == {"QuickFix", "Bolt Barn"}
+
+
+def test_tenant_filter_without_tenant_shards(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers(OFFERS[:1], tenant="Team A")
+    agent.add_offers([make_offer("QuickFix", "10mm steel bolt", "SB-10", 0.70)], tenant="team-b")
+
+    assert [o.unit_price for o in agent.search("steel bolt", tenant="Team A")] == [0.75]
+    assert [o.unit_price for o in agent.search("steel bolt", tenant="team-b")] == [0.70]
+    assert len(agent.search("steel bolt")) == 2
+
+
+def test_named_category_query_also_searches_fallback_shards(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers(OFFERS + [make_offer("Fastenal Direct", "10mm steel fastener", "SF-10", 0.60)])
+
+    assert "supplier_offers__pid-sf" in agent._shards_for_query("cheapest 10mm steel bolts")
+    results = agent.search("cheapest 10mm steel bolts", k=5)
+    assert {o.supplier for o in results} == {"Fastenal Direct", "QuickFix"}
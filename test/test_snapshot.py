@@ -0,0 +1,78 @@
+import json
+import os
+
+import chromadb
+import numpy as np
+import pytest
+
+from app.core.snapshot import SnapshotError, export_snapshot, import_snapshot, snapshot_path
+
+
+def seed(client, name, n, dim=8):
+    collection = client.get_or_create_collection(name)
+    rng = np.random.default_rng(0)
+    collection.add(
+        ids=[f"{name}-{i}" for i in range(n)],
+        documents=[f"offer {i}" for i in range(n)],
+        metadatas=[{"supplier": f"S{i}", "unit_price": float(i)} for i in range(n)],
+        embeddings=rng.random((n, dim)).tolist()
+    )
+    return collection
+
+
+def test_export_import_round_trip(tmp_path):
+    source = chromadb.PersistentClient(path=str(tmp_path / "src"))
+    seed(source, "supplier_offers__bolt", 25)
+    seed(source, "supplier_offers__nut", 3)
+    seed(source, "archive__supplier_offers__bolt", 2)
+    seed(source, "unrelated", 2)
+
+    out = str(tmp_path / "snap")
+    manifest = export_snapshot(source, out, "supplier_offers")
+    assert [c["name"] for c in manifest["collections"]] == [
+        "archive__supplier_offers__bolt", "supplier_offers__bolt", "supplier_offers__nut"]
+
+    embeddings = np.load(os.path.join(out, "supplier_offers__bolt", "embeddings.npy"), mmap_mode="r")
+    assert embeddings.shape == (25, 8) and embeddings.dtype == np.float32
+
+    target = chromadb.PersistentClient(path=str(tmp_path / "dst"))
+    loaded = import_snapshot(target, out, batch_size=10)
+    assert loaded == {"archive__supplier_offers__bolt": 2, "supplier_offers__bolt": 25, "supplier_offers__nut": 3}
+
+    original = source.get_collection("supplier_offers__bolt").get(ids=["supplier_offers__bolt-7"], include=["embeddings", "metadatas"])
+    restored = target.get_collection("supplier_offers__bolt").get(ids=["supplier_offers__bolt-7"], include=["embeddings", "metadatas"])
+    assert restored["metadatas"] == original["metadatas"]
+    np.testing.assert_allclose(restored["embeddings"], original["embeddings"], rtol=1e-6)
+
+
+def test_import_rejects_tampered_snapshot(tmp_path):
+    source = chromadb.PersistentClient(path=str(tmp_path / "src"))
+    seed(source, "supplier_offers", 4)
+    out = str(tmp_path / "snap")
+    export_snapshot(source, out, "supplier_offers")
+
+    manifest_path = os.path.join(out, "manifest.json")
+    manifest = json.load(open(manifest_path))
+    manifest["checksums"]["supplier_offers/embeddings.npy"] = "0" * 64
+    json.dump(manifest, open(manifest_path, "w"))
+
+    with pytest.raises(SnapshotError):
+        import_snapshot(chromadb.PersistentClient(path=str(tmp_path / "dst")), out)
+
+
+def test_snapshot_path_stays_under_root(tmp_path):
+    assert snapshot_path(str(tmp_path), "nightly").startswith(str(tmp_path))
+    with pytest.raises(SnapshotError):
+        snapshot_path(str(tmp_path), "../etc")
+
+
+def test_import_endpoint_rejects_missing_batch_size():
+    from fastapi.testclient import TestClient
+
+    from app.core import config
+    from app.main import app
+
+    client = TestClient(app, headers={"X-Admin-Token": config.ADMIN_TOKEN})
+    for batch_size in (None, 0):
+        response = client.post("/procure-sense-rag/admin/snapshot/import", json={"name": "nightly", "batch_size": batch_size})
+        assert response.status_code == 422
@@ -0,0 +1,19 @@
+from benchmarks.soak import run, saturation_point
+
+
+def test_soak_drives_mixed_traffic_through_the_app():
+    reports = run(levels=(1, 3), duration_s=0.6, write_ratio=0.5, llm_ms=1, embed_ms=0)
+
+    for report in reports:
+        s = report.summary()
+        assert s["error_rate"] == 0.0, s["routes"]
+        assert s["routes"]["query"]["requests"] > 0 and s["routes"]["ingest"]["requests"] > 0
+        assert s["pool_wait_ms"]["p50"] is not None
+        assert s["write_lock"]["acquisitions"] >= s["routes"]["ingest"]["requests"]
+    assert saturation_point(reports) in (None, 1)
+
+
+def test_repeated_runs_each_record_pool_wait():
+    for _ in range(2):
+        (report,) = run(levels=(1,), duration_s=0.3, write_ratio=0.5, llm_ms=1, embed_ms=0)
+        assert report.summary()["pool_wait_ms"]["p50"] is not None
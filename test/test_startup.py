@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+# Cold `import app.main` plus one /ping, in a fresh interpreter (override for slow CI machines)
+IMPORT_BUDGET_S = float(os.getenv("IMPORT_BUDGET_S", "2.0"))
+HEAVY_MODULES = ("chromadb", "langchain_openai", "langchain_core", "langchain_classic", "openai")
+
+PROBE = f"""
+import sys, time
+start = time.perf_counter()
+import app.main
+from fastapi.testclient import TestClient
+assert TestClient(app.main.app).get("/ping").status_code == 200
+print("ELAPSED", time.perf_counter() - start)
+print("HEAVY", ",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+
+
+def test_ping_served_without_loading_agents(tmp_path):
+    env = dict(os.environ, CHROMA_PERSIST_DIR=str(tmp_path / "chroma"), OPENAI_API_KEY="sk-test")
+    result = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, env=env,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), check=True)
+    lines = dict(line.partition(" ")[::2] for line in result.stdout.splitlines() if line.startswith(("ELAPSED", "HEAVY")))
+    assert lines["HEAVY"] == ""
+    assert float(lines["ELAPSED"]) < IMPORT_BUDGET_S
+    assert not os.path.exists(tmp_path / "chroma")  # No store opened at import
+
+
+def test_agents_resolve_lazily():
+    import app
+    from app.agents import get_retriever
+    from app.routes import query
+
+    assert app.RetrieverAgent.__name__ == "RetrieverAgent"
+    assert query.retriever is get_retriever()
+
+
+def test_one_worker_leads_and_the_others_skip_maintenance(tmp_path, monkeypatch):
+    from app.core import config, locks
+
+    monkeypatch.setattr(config, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(locks, "_leader_file", None)
+    probe = "from app.core.locks import is_leader; print(is_leader())"
+    env = dict(os.environ, STATE_DIR=str(tmp_path), OPENAI_API_KEY="sk-test")
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        assert locks.is_leader() and locks.is_leader()
+        other = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, env=env, cwd=cwd, check=True)
+        assert other.stdout.strip() == "False"
+    finally:
+        locks._leader_file.close()
+    other = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, env=env, cwd=cwd, check=True)
+    assert other.stdout.strip() == "True"
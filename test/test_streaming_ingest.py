@@ -0,0 +1,115 @@
+import json
+from types import SimpleNamespace
+
+from app.agents.extractor import ExtractorAgent, pack_documents
+from app.core.ingest_pipeline import ingest_stream
+from app.core.json_stream import JSONArrayStreamParser
+
+OFFERS = [
+    {"supplier": "QuickFix", "item": "10mm steel bolt", "product_id": "SB-10", "unit_price": 0.75,
+     "risk_note": 'Reliable {"quoted"} supplier]', "raw_text": "QuickFix offers ..."},
+    {"supplier": "Apex Fasteners", "item": "6mm hex nuts", "product_id": "HN-6", "unit_price": 0.25,
+     "raw_text": "Apex offers [HN-6] ..."},
+]
+DOCUMENT = json.dumps({"offers": OFFERS})
+
+
+def chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_parser_yields_each_object_once_complete():
+    parser = JSONArrayStreamParser()
+    seen, first_emitted_at = [], None
+    pieces = chunks(DOCUMENT, 7)
+    for i, piece in enumerate(pieces):
+        seen.extend(parser.feed(piece))
+        if seen and first_emitted_at is None:
+            first_emitted_at = i
+    # The first offer is available well before the stream ends
+    assert first_emitted_at < len(pieces) - 5
+    assert [o["supplier"] for o in seen] == ["QuickFix", "Apex Fasteners"]
+    assert seen[0]["risk_note"] == 'Reliable {"quoted"} supplier]'
+    assert parser.finished
+
+
+def test_parser_skips_markdown_fences():
+    parser = JSONArrayStreamParser()
+    assert len(parser.feed("```json\n" + json.dumps(OFFERS) + "\n```")) == 2
+
+
+def test_extractor_streams_offers(monkeypatch):
+    deltas = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=c))]) for c in chunks(DOCUMENT, 11)]
+    agent = ExtractorAgent()
+    monkeypatch.setattr(agent.client.chat.completions, "create", lambda **kwargs: iter(deltas))
+
+    offers = agent.extract_offers("quotation text")
+    assert [o.product_id for o in offers] == ["SB-10", "HN-6"]
+
+
+class PackingClient:
+    """Answers packed requests with `packed` and single-quotation (streamed) requests with one offer."""
+
+    def __init__(self, packed):
+        self.packed = packed
+        self.calls = []
+
+    def create(self, messages, stream=False, **kwargs):
+        text = messages[-1]["content"]
+        self.calls.append("single" if stream else "packed")
+        if not stream:
+            message = SimpleNamespace(content=json.dumps(self.packed))
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None, model="gpt-4o")
+        offer = {"supplier": text.split()[0], "item": "bolt", "raw_text": text}
+        delta = SimpleNamespace(content=json.dumps({"offers": [offer]}))
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=delta)])])
+
+
+def _packing_agent(monkeypatch, packed):
+    agent = ExtractorAgent()
+    client = PackingClient(packed)
+    monkeypatch.setattr(agent.client.chat.completions, "create", client.create)
+    return agent, client
+
+
+def test_pack_documents_respects_both_limits():
+    assert pack_documents(["a" * 10] * 5, max_docs=2, max_chars=100) == [[0, 1], [2, 3], [4]]
+    assert pack_documents(["a" * 60, "b" * 60, "c" * 500, "d"], max_docs=8, max_chars=100) == [[0], [1], [2], [3]]
+
+
+def test_packed_extraction_splits_offers_by_source(monkeypatch):
+    packed = {"offers": [dict(OFFERS[1], source_id=2), dict(OFFERS[0], source_id=1), dict(OFFERS[0], source_id=2)]}
+    agent, client = _packing_agent(monkeypatch, packed)
+
+    offers = agent.extract_batch(["QuickFix quote", "Apex quote"])
+    assert client.calls == ["packed"]
+    assert [[o.product_id for o in source] for source in offers] == [["SB-10"], ["HN-6", "SB-10"]]
+
+
+def test_packed_extraction_falls_back_per_document(monkeypatch):
+    # Unattributable offer: the whole pack is extracted again one quotation at a time
+    agent, client = _packing_agent(monkeypatch, {"offers": [dict(OFFERS[0], source_id=7)]})
+    offers = agent.extract_batch(["QuickFix quote", "Apex quote"])
+    assert client.calls == ["packed", "single", "single"]
+    assert [source[0].supplier for source in offers] == ["QuickFix", "Apex"]
+
+    # A quotation the packed answer skipped is extracted on its own
+    agent, client = _packing_agent(monkeypatch, {"offers": [dict(OFFERS[0], source_id=1)]})
+    offers = agent.extract_batch(["QuickFix quote", "Apex quote"])
+    assert client.calls == ["packed", "single"]
+    assert [source[0].supplier for source in offers] == ["QuickFix", "Apex"]
+
+
+def test_ingest_stream_writes_micro_batches():
+    class Recorder:
+        def __init__(self):
+            self.batches = []
+
+        def add_offers(self, offers, tenant=None):
+            self.batches.append((len(offers), tenant))
+            return [f"id-{o}" for o in offers if o != 4]  # Offer 4 collapses into an earlier one
+
+    recorder = Recorder()
+    stored = ingest_stream(iter(range(7)), recorder, batch_size=3, tenant="acme")
+    assert stored == 6
+    assert recorder.batches == [(3, "acme"), (3, "acme"), (1, "acme")]
@@ -0,0 +1,67 @@
+from uuid import uuid4
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from app.core import config
+from app.core.usage import UsageLedger, UsageRecord, record_usage, track_request
+from app.core.usage_callbacks import UsageCallbackHandler
+
+
+def test_cost_uses_base_model_prices():
+    record = UsageRecord("evaluator", "gpt-4o-2024-08-06", "llm", 1_000_000, 100_000, 1.0)
+    assert round(record.cost_usd, 4) == 3.5
+    mini = UsageRecord("summarizer", "gpt-4o-mini", "llm", 1_000_000, 0, 1.0)
+    assert round(mini.cost_usd, 4) == 0.15
+
+
+def test_request_usage_collects_calls_and_callback_tokens():
+    handler = UsageCallbackHandler("evaluator")
+    run_id = uuid4()
+    with track_request("/evaluate-offers") as usage:
+        handler.on_chat_model_start({}, [], run_id=run_id)
+        handler.on_llm_end(LLMResult(
+            generations=[[ChatGeneration(message=AIMessage(content="{}"))]],
+            llm_output={"token_usage": {"prompt_tokens": 900, "completion_tokens": 80}, "model_name": "gpt-4o"}
+        ), run_id=run_id)
+        record_usage("retriever", "text-embedding-3-small", 12, 0, 0.05, kind="embedding")
+
+    totals = usage.totals()
+    assert totals["calls"] == 2 and totals["prompt_tokens"] == 912 and totals["completion_tokens"] == 80
+    assert set(usage.by_agent()) == {"evaluator", "retriever"}
+    assert all(r.route == "/evaluate-offers" for r in usage.records)
+
+
+def test_ledger_groups_by_dimension():
+    ledger = UsageLedger(window_s=60)
+    ledger.add(UsageRecord("evaluator", "gpt-4o", "llm", 100, 10, 1.0, route="/q"))
+    ledger.add(UsageRecord("summarizer", "gpt-4o-mini", "llm", 50, 20, 0.5, route="/q"))
+    report = ledger.report()
+    assert report["window_totals"]["calls"] == 2
+    assert report["by_route"]["/q"]["prompt_tokens"] == 150
+    assert report["by_model"]["gpt-4o-mini"]["completion_tokens"] == 20
+
+
+def test_usage_headers_and_admin_report():
+    from app.main import usage_headers
+    from app.routes.admin import router as admin_router
+
+    # A separate app with the usage middleware, so the probe route does not leak into the shared one
+    app = FastAPI()
+    app.middleware("http")(usage_headers)
+    app.include_router(admin_router, prefix="/procure-sense-rag/admin")
+
+    @app.get("/_usage_probe")
+    def probe():
+        record_usage("evaluator", "gpt-4o", 1000, 100, 0.2)
+        return {}
+
+    client = TestClient(app, headers={"X-Admin-Token": config.ADMIN_TOKEN})
+    response = client.get("/_usage_probe")
+    assert response.headers["X-Usage-Prompt-Tokens"] == "1000"
+    assert response.headers["X-Usage-Agents"] == "evaluator=1000/100"
+
+    report = client.get("/procure-sense-rag/admin/usage").json()
+    assert report["by_route"]["/_usage_probe"]["calls"] == 1
@@ -0,0 +1,79 @@
+import time
+from types import SimpleNamespace
+
+from app.agents import retriever as retriever_module
+from app.models.models import Offer
+from app.core.maintenance import OfferSweeper
+
+
+def offer(supplier, raw_text, product_id, price, valid_until=None, valid_from=None):
+    return Offer(supplier=supplier, item="10mm steel bolt", product_id=product_id, unit_price=price,
+                 raw_text=raw_text, valid_until=valid_until, valid_from=valid_from)
+
+
+def test_search_filters_expired_and_future_offers_in_store(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers([
+        offer("QuickFix", "QuickFix 10mm bolt quote", "SB-10", 0.75),
+        offer("Premier Metals", "Premier 10mm bolt quote", "SB-10", 0.70, valid_until="2020-01-31"),
+        offer("SteelPro", "SteelPro 10mm bolt quote", "GB-10", 0.74, valid_from="2999-01-01"),
+    ])
+    assert [o.supplier for o in agent.search("10mm steel bolt", k=5)] == ["QuickFix"]
+
+
+def test_superseded_version_is_archived(make_retriever):
+    agent = make_retriever(shard_by="category")
+    first = agent.add_offers([offer("QuickFix", "Quote: SB-10 at $0.75", "SB-10", 0.75)])
+    agent.add_offers([offer("QuickFix", "Requote: SB-10 now $0.72", "SB-10", 0.72)])
+
+    live = agent._get_collection("supplier_offers__bolt")
+    assert live.get(ids=first)["metadatas"][0]["unit_price"] == 0.72
+    archive = agent._get_collection("archive__supplier_offers__bolt").get(include=["metadatas"])
+    assert archive["ids"] == [f"{first[0]}@v1"]
+    assert archive["metadatas"][0]["archived_reason"] == "superseded"
+    assert archive["metadatas"][0]["unit_price"] == 0.75
+
+
+def test_sweeper_archives_expired_and_backfills_legacy_offers(make_retriever):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers([offer("Premier Metals", "Premier quote", "SB-10", 0.70, valid_until="2020-01-31")])
+    legacy = agent._get_collection("supplier_offers")
+    legacy.add(ids=["legacy-1"], documents=["old"], embeddings=[agent.embedder.embed_query("10mm steel bolt")],
+               metadatas=[{"supplier": "Legacy Bolts", "item": "10mm steel bolt", "raw_text": "old"}])
+
+    sweeper = OfferSweeper(agent, interval_s=3600)
+    sweeper.start()
+    deadline = time.time() + 5
+    while agent._get_collection("supplier_offers__bolt").count() and time.time() < deadline:
+        time.sleep(0.05)
+    sweeper.stop()
+
+    assert agent._get_collection("supplier_offers__bolt").count() == 0
+    assert agent._get_collection("archive__supplier_offers__bolt").count() == 1
+    backfilled = legacy.get(ids=["legacy-1"])["metadatas"][0]
+    assert backfilled["valid_from_ts"] == 0 and backfilled["valid_until_ts"] > time.time()
+    assert backfilled["risk_level"] == "Unknown" and backfilled["high_risk"] is False
+    assert [o.supplier for o in agent.search("steel offers")] == ["Legacy Bolts"]
+
+
+def test_future_dated_requote_keeps_current_offer_until_it_takes_effect(make_retriever, monkeypatch):
+    clock = SimpleNamespace(time=time.time)
+    monkeypatch.setattr(retriever_module, "time", clock)
+    agent = make_retriever(shard_by="category")
+    first = agent.add_offers([offer("QuickFix", "Quote: SB-10 at $0.75", "SB-10", 0.75)])
+    second = agent.add_offers([offer("QuickFix", "Requote: SB-10 now $0.72", "SB-10", 0.72, valid_from="2999-01-01")])
+
+    assert second != first
+    assert [o.unit_price for o in agent.search("10mm steel bolt")] == [0.75]
+    assert agent.archive_superseded() == 0
+
+    clock.time = lambda: 32503680000.0  # 3000-01-01
+    # In effect: the replaced version is hidden before the sweep archives it
+    assert [o.unit_price for o in agent.search("10mm steel bolt")] == [0.72]
+    assert agent.archive_superseded() == 1
+
+    live = agent._get_collection("supplier_offers__bolt").get(include=["metadatas"])
+    assert live["ids"] == second and live["metadatas"][0]["version"] == 2
+    archive = agent._get_collection("archive__supplier_offers__bolt").get(include=["metadatas"])
+    assert archive["ids"] == [f"{first[0]}@v1"]
+    assert archive["metadatas"][0]["archived_reason"] == "superseded"
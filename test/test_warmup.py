@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import app.main
+from app.core.query_cache import QueryEmbeddingCache, load_recent_queries, save_recent_queries
+from app.agents.evaluator import EvaluatorAgent
+from app.core.warmup import FAILED, READY, Warmup
+from app.models.models import Offer
+
+OFFERS = [
+    Offer(supplier="QuickFix", item="10mm steel bolt", unit_price=0.75, delivery_days=10, raw_text="QuickFix"),
+    Offer(supplier="Apex Fasteners", item="6mm hex nuts", unit_price=0.25, delivery_days=5, raw_text="Apex"),
+]
+
+
+def test_query_cache_counts_and_evicts():
+    cache = QueryEmbeddingCache(max_entries=2)
+    for query in ["cheap bolts", "fast  nuts", "cheap bolts"]:
+        if cache.get("m", query) is None:
+            cache.put("m", query, [1.0])
+    cache.put("m", "washers", [2.0])
+
+    assert cache.top_queries(2) == ["cheap bolts", "fast nuts"]
+    assert cache.get("m", "fast nuts", record=False) is None  # Least recently used, evicted
+    assert cache.get("other-model", "cheap bolts") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_warmup_loads_index_and_primes_frequent_queries(make_retriever, tmp_path):
+    agent = make_retriever(shard_by="category")
+    agent.add_offers(OFFERS)
+    path = str(tmp_path / "recent_queries.json")
+    save_recent_queries(["cheapest 10mm steel bolts", "fastest 6mm hex nuts"], path)
+    built = []
+
+    warmup = Warmup(lambda: agent, [lambda: built.append("evaluator")], queries_path=path, max_queries=5)
+    warmup.run()
+
+    assert warmup.state == READY and built == ["evaluator"]
+    assert warmup.steps["index"]["detail"] == {"shards": 2}
+    assert warmup.steps["embeddings"]["detail"] == {"queries": 2, "embedded": 2}
+    calls = agent.embedder.calls
+    assert agent.search("cheapest 10mm steel bolts", k=1)[0].supplier == "QuickFix"
+    assert agent.embedder.calls == calls  # Served from the primed cache
+    assert load_recent_queries(path) == ["cheapest 10mm steel bolts", "fastest 6mm hex nuts"]
+
+
+def test_ready_reflects_warmup_state(monkeypatch, tmp_path):
+    def unreachable():
+        raise ConnectionError("Chroma server unreachable")
+
+    client = TestClient(app.main.app)
+    warmup = Warmup(unreachable, queries_path=str(tmp_path / "none.json"), retries=0)
+    monkeypatch.setattr(app.main, "warmup", warmup)
+    assert client.get("/ready").status_code == 503
+
+    warmup.run()
+    response = client.get("/ready")
+    assert warmup.state == FAILED and response.status_code == 503
+    assert response.json()["steps"]["store"]["error"] == "Chroma server unreachable"
+
+    warmup.skip()
+    assert client.get("/ready").status_code == 200
+    assert client.get("/ping").status_code == 200
+
+
+def test_required_steps_retry_and_ready_restarts_a_failed_warmup(monkeypatch, make_retriever, tmp_path):
+    agent = make_retriever()
+    failures = [ConnectionError("not yet")] * 2
+
+    def flaky():
+        if failures:
+            raise failures.pop()
+        return agent
+
+    warmup = Warmup(flaky, queries_path=str(tmp_path / "none.json"), retries=1, backoff_s=0)
+    warmup.run()
+    assert warmup.state == FAILED and warmup.steps["store"]["attempts"] == 2
+
+    # The store came back: the next probe starts a new round instead of staying failed
+    monkeypatch.setattr(app.main, "warmup", warmup)
+    client = TestClient(app.main.app)
+    assert client.get("/ready").json()["status"] != FAILED
+    warmup._thread.join(timeout=10)
+    assert client.get("/ready").status_code == 200
+
+
+def test_agents_step_opens_every_routed_model(tmp_path, make_retriever):
+    opened = []
+    evaluator = EvaluatorAgent()
+    for model in ("gpt-4o", "gpt-4o-mini"):
+        client = SimpleNamespace(model_name=model, root_client=SimpleNamespace(
+            models=SimpleNamespace(retrieve=opened.append)))
+        if model == evaluator.model_name:
+            evaluator.llm = client
+        else:
+            evaluator._llms[model] = client
+
+    warmup = Warmup(make_retriever, [lambda: evaluator], queries_path=str(tmp_path / "none.json"))
+    warmup.run()
+    assert warmup.steps["agents"]["detail"] == {"agents": 1, "connections": 2}
+    assert sorted(opened) == ["gpt-4o", "gpt-4o-mini"]